@@ -5,6 +5,7 @@
 
 from typing import Any as __Any
 from typing import Awaitable as __Awaitable
+from typing import Callable as __Callable
 from typing import Coroutine as __Coroutine
 from typing import NoReturn as __NoReturn
 from typing import TypeVar as __TypeVar
@@ -12,6 +13,7 @@ from typing import TypeVar as __TypeVar
 from view.typing import AsgiDict as __AsgiDict
 from view.typing import AsgiReceive as __AsgiReceive
 from view.typing import AsgiSend as __AsgiSend
+from view.typing import Callback as __Callback
 from view.typing import Parser as __Parser
 from view.typing import Part as __Part
 from view.typing import RouteInputDict as __RouteInput
@@ -36,6 +38,7 @@ class ViewApp:
         inputs: list[__RouteInput[__Any]],
         errors: dict[int, __ViewRoute],
         parts: list[__Part | str],
+        limits: tuple[float, int, bool, int] | None = None,
         /,
     ) -> None: ...
     def _post(
@@ -46,6 +49,7 @@ class ViewApp:
         inputs: list[__RouteInput[__Any]],
         errors: dict[int, __ViewRoute],
         parts: list[__Part | str],
+        limits: tuple[float, int, bool, int] | None = None,
         /,
     ) -> None: ...
     def _put(
@@ -56,6 +60,7 @@ class ViewApp:
         inputs: list[__RouteInput[__Any]],
         errors: dict[int, __ViewRoute],
         parts: list[__Part | str],
+        limits: tuple[float, int, bool, int] | None = None,
         /,
     ) -> None: ...
     def _patch(
@@ -66,6 +71,7 @@ class ViewApp:
         inputs: list[__RouteInput[__Any]],
         errors: dict[int, __ViewRoute],
         parts: list[__Part | str],
+        limits: tuple[float, int, bool, int] | None = None,
         /,
     ) -> None: ...
     def _delete(
@@ -76,6 +82,7 @@ class ViewApp:
         inputs: list[__RouteInput[__Any]],
         errors: dict[int, __ViewRoute],
         parts: list[__Part | str],
+        limits: tuple[float, int, bool, int] | None = None,
         /,
     ) -> None: ...
     def _options(
@@ -86,10 +93,65 @@ class ViewApp:
         inputs: list[__RouteInput[__Any]],
         errors: dict[int, __ViewRoute],
         parts: list[__Part | str],
+        limits: tuple[float, int, bool, int] | None = None,
         /,
     ) -> None: ...
     def _set_dev_state(self, value: bool, /) -> None: ...
-    def _exc(self, status_code: int, handler: __ViewRoute, /) -> None: ...
+    def _err(self, status_code: int, handler: __ViewRoute, /) -> None: ...
     def _supply_parsers(self, query: __Parser, json: __Parser, /) -> None: ...
+    def _set_lifespan(
+        self,
+        startup: __Callback,
+        cleanup: __Callback,
+        /,
+    ) -> None: ...
+    def _enable_access_log(self, capacity: int, /) -> None: ...
+    def _drain_access_log(
+        self,
+    ) -> tuple[list[tuple[str, str, int, float, int]], int]: ...
+    def _enable_metrics(self) -> None: ...
+    def _set_profiler(
+        self,
+        profiler: __Callable[[str, str, int, tuple[int, ...]], __Any] | None,
+        every: int,
+        /,
+    ) -> None: ...
+    def _set_tracer(
+        self,
+        tracer: __Callable[[str, str, dict, int], __Any] | None,
+        /,
+    ) -> None: ...
+    def _set_middleware(
+        self,
+        before: tuple[__Callable[[dict], __Any], ...],
+        after: tuple[__Callable[[dict, dict], __Any], ...],
+        /,
+    ) -> None: ...
+    def _set_cors(
+        self,
+        origins: frozenset[bytes] | None,
+        echo: bool,
+        reflect: bool,
+        headers: list[tuple[bytes, bytes]],
+        preflights: dict[str, list[tuple[bytes, bytes]]],
+        /,
+    ) -> None: ...
+    def _set_limits(
+        self,
+        limits: tuple[float, int, bool, int],
+        /,
+    ) -> None: ...
+    def _metrics(
+        self,
+    ) -> list[
+        tuple[str, str, int, int, tuple[int, ...], tuple[int, ...], float]
+    ]: ...
+    def _share_metrics(self, buffer: __Any | None, /) -> None: ...
 
+def parse_http(
+    data: bytes | bytearray,
+    /,
+) -> (
+    tuple[int, str, str, bytes, list[tuple[bytes, bytes]], int, bool] | None
+): ...
 def test_awaitable(coro: __Coroutine[__Any, __Any, __T], /) -> __Awaitable[__T]: ...
@@ -0,0 +1,118 @@
+#ifndef VIEW_ACCESS_H
+#define VIEW_ACCESS_H
+
+#include <Python.h>
+#include <stdbool.h>
+
+typedef struct _access_entry {
+    PyObject* method;
+    PyObject* path;
+    int status;
+    long long latency;
+    Py_ssize_t size;
+} access_entry;
+
+typedef struct _access_log {
+    access_entry* entries;
+    Py_ssize_t capacity;
+    Py_ssize_t start;
+    Py_ssize_t length;
+    Py_ssize_t dropped;
+} access_log;
+
+// bucket i counts requests that took less than 100us * 2^i
+#define METRICS_BUCKETS 18
+#define METRICS_BASE_NS 100000LL
+
+// this is also the layout of a slot in a shared table, so it has to match _SLOT in _metrics.py
+typedef struct _metrics_counters {
+    long long in_flight;
+    unsigned long long count;
+    unsigned long long statuses[5];
+    unsigned long long buckets[METRICS_BUCKETS + 1];
+    long long latency_sum;
+} metrics_counters;
+
+typedef struct _route_metrics {
+    PyObject* method;
+    PyObject* path;
+} route_metrics;
+
+typedef struct _metrics_table {
+    route_metrics* routes;
+    // points into shared.buf (after the route count) when the table is shared
+    metrics_counters* counters;
+    Py_ssize_t length;
+    Py_ssize_t capacity;
+    Py_ssize_t counters_capacity;
+    Py_buffer shared;
+    bool enabled;
+} metrics_table;
+
+// timestamps recorded for a profiled request, see access.c
+#define PROFILE_START 0
+#define PROFILE_MATCH 1
+#define PROFILE_BODY 2
+#define PROFILE_PARSE 3
+#define PROFILE_HANDLER 4
+#define PROFILE_SEND 5
+#define PROFILE_PHASES 6
+
+// see the limits section of access.c
+typedef struct _limiter {
+    long long interval;
+    long long tolerance;
+    long long tat;
+    PyObject* clients;
+    Py_ssize_t prune_at;
+    Py_ssize_t max_in_flight;
+    Py_ssize_t in_flight;
+    PyObject* too_many;
+    PyObject* busy;
+} limiter;
+
+#define LIMIT_OK 0
+#define LIMIT_RATE 1
+#define LIMIT_BUSY 2
+
+extern PyTypeObject AccessSendType;
+
+access_log* access_log_new(Py_ssize_t capacity);
+void access_log_free(access_log* log);
+PyObject* access_log_drain(access_log* log);
+PyObject* access_send_new(
+    PyObject* app,
+    access_log* log,
+    metrics_table* metrics,
+    PyObject* send,
+    PyObject* scope,
+    PyObject* after
+);
+void access_send_dispatch(PyObject* self, Py_ssize_t index);
+void access_send_profile(PyObject* self, PyObject* profiler);
+void access_send_mark(PyObject* self, int phase);
+void access_send_headers(PyObject* self, PyObject* headers);
+void access_send_trace(
+    PyObject* self,
+    PyObject* tracer,
+    PyObject* scope,
+    Py_ssize_t index
+);
+
+limiter* limiter_new(PyObject* args);
+void limiter_free(limiter* l);
+int limiter_admit(limiter* l, PyObject* scope, PyObject* send);
+
+Py_ssize_t metrics_register(
+    metrics_table* table,
+    const char* method,
+    const char* path
+);
+void metrics_clear(metrics_table* table);
+int metrics_share(
+    metrics_table* table,
+    PyObject* buffer
+);
+PyObject* metrics_snapshot(metrics_table* table);
+
+#endif
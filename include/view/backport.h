@@ -47,6 +47,10 @@ static PyObject* _PyObject_VectorcallBackport(PyObject* obj,
 #define PyObject_VectorcallDict _PyObject_FastCallDict
 #endif
 
+#ifndef Py_TPFLAGS_HAVE_VECTORCALL
+#define Py_TPFLAGS_HAVE_VECTORCALL _Py_TPFLAGS_HAVE_VECTORCALL
+#endif
+
 #ifndef Py_IS_TYPE
 #define Py_IS_TYPE(o, type) (Py_TYPE(o) == type)
 #endif
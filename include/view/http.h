@@ -0,0 +1,8 @@
+#ifndef VIEW_HTTP_H
+#define VIEW_HTTP_H
+
+#include <Python.h>
+
+PyObject* parse_http(PyObject* self, PyObject* data);
+
+#endif
@@ -5,6 +5,8 @@
 #include <view/app.h>
 #include <view/awaitable.h>
 #include <view/map.h>
+#include <view/http.h>
+#include <view/access.h>
 
 
 void view_fatal(
@@ -0,0 +1,1197 @@
+#include <Python.h>
+#include <view/access.h>
+#include <view/backport.h>
+#include <stdbool.h>
+#include <stddef.h>
+#include <string.h>
+#include <time.h>
+#ifdef _WIN32
+#include <windows.h>
+#endif
+
+/*
+ * -- access logging --
+ * when enabled, the send callable of every http request is wrapped in an AccessSend.
+ * it watches the response messages go by, and once the final body has been sent it records
+ * (method, path, status, latency, bytes) into a preallocated ring buffer owned by the app.
+ *
+ * nothing is formatted or written here, a background thread drains the buffer in batches.
+ * if the buffer fills up before it's drained, the oldest entries are overwritten and counted
+ * as dropped.
+ *
+ * -- metrics --
+ * the same wrapper is used for per-route metrics. every route registers a slot in the app's
+ * metrics table when it's loaded, and once app() has found the route for a request, it tells the
+ * AccessSend which slot to record into. the slots are plain counters (we hold the GIL, and every
+ * worker process has its own table), so recording a request is a handful of increments. with
+ * multiple workers, each one's counters live in a shared mmap, which the others read directly
+ * (see metrics_share()).
+ *
+ * -- profiling --
+ * when a profiler is set on the app, every nth request gets a profiler attached to its AccessSend.
+ * app.c marks the phase boundaries (route matched, body received, inputs parsed, handler returned)
+ * with PROFILE_MARK, and once the response is sent the profiler is called with the timestamps.
+ * when no profiler is set, each mark is a single pointer check, and building with
+ * VIEW_NO_PROFILING removes them entirely.
+ *
+ * -- tracing --
+ * when a tracer is set, it's called once the route has been found with the method, the route's
+ * path (not the requested one, so spans can be grouped), the scope, and how long ago the request
+ * came in. whatever it returns is the span, and its end() method is called with the status once the
+ * response has been sent. all of the span bookkeeping (ids, trace context, exporting) is done in
+ * python, in view/tracing.py.
+ *
+ * -- after hooks --
+ * when the app has after hooks (see App.middleware), each one is called with the scope and the
+ * http.response.start message before it's sent, so it can change the status or headers. the
+ * message is copied first, since the messages for cached and error responses are shared.
+ *
+ * the headers added by CORS (see App.cors) are appended to the same copy, before any after hooks
+ * see it.
+ *
+ * -- limits --
+ * a limiter belongs to either a route or the whole app, and can hold a rate limit, an in-flight
+ * limit, or both. the rate limit is a token bucket, stored as the time that the bucket will be full
+ * again (a "theoretical arrival time", like GCRA), so checking it is a comparison and an addition.
+ * per client limits keep one of those timestamps per address in a dict, and timestamps that have
+ * passed (full buckets, which are the same as no entry) are pruned once the dict grows.
+ *
+ * admitted requests are counted as in flight until the AccessSend sees the final body, or is
+ * deallocated without one. the 429 and 503 responses are built when the limiter is, and since
+ * AccessSend copies response.start messages before changing them, they can be shared.
+ * */
+
+static long long monotonic_ns(void) {
+#ifdef _WIN32
+    LARGE_INTEGER freq;
+    LARGE_INTEGER count;
+    QueryPerformanceFrequency(&freq);
+    QueryPerformanceCounter(&count);
+    return (long long) ((double) count.QuadPart * (1e9 / (double) freq.QuadPart));
+#else
+    struct timespec ts;
+    clock_gettime(
+        CLOCK_MONOTONIC,
+        &ts
+    );
+    return ((long long) ts.tv_sec * 1000000000LL) + ts.tv_nsec;
+#endif
+}
+
+access_log* access_log_new(Py_ssize_t capacity) {
+    access_log* log = PyMem_Malloc(sizeof(access_log));
+    if (!log) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    log->entries = PyMem_Calloc(
+        capacity,
+        sizeof(access_entry)
+    );
+
+    if (!log->entries) {
+        PyMem_Free(log);
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    log->capacity = capacity;
+    log->start = 0;
+    log->length = 0;
+    log->dropped = 0;
+    return log;
+}
+
+static void access_entry_clear(access_entry* entry) {
+    Py_CLEAR(entry->method);
+    Py_CLEAR(entry->path);
+}
+
+void access_log_free(access_log* log) {
+    for (Py_ssize_t i = 0; i < log->length; i++)
+        access_entry_clear(&log->entries[(log->start + i) % log->capacity]);
+
+    PyMem_Free(log->entries);
+    PyMem_Free(log);
+}
+
+static void access_log_push(
+    access_log* log,
+    PyObject* method,
+    PyObject* path,
+    int status,
+    long long latency,
+    Py_ssize_t size
+) {
+    access_entry* entry;
+
+    if (log->length == log->capacity) {
+        // overwrite the oldest entry
+        entry = &log->entries[log->start];
+        access_entry_clear(entry);
+        log->start = (log->start + 1) % log->capacity;
+        ++log->dropped;
+    } else {
+        entry = &log->entries[(log->start + log->length) % log->capacity];
+        ++log->length;
+    }
+
+    entry->method = Py_NewRef(method);
+    entry->path = Py_NewRef(path);
+    entry->status = status;
+    entry->latency = latency;
+    entry->size = size;
+}
+
+PyObject* access_log_drain(access_log* log) {
+    PyObject* list = PyList_New(log->length);
+    if (!list) return NULL;
+
+    for (Py_ssize_t i = 0; i < log->length; i++) {
+        access_entry* entry = &log->entries[(log->start + i) % log->capacity];
+        PyObject* item = Py_BuildValue(
+            "(OOidn)",
+            entry->method,
+            entry->path,
+            entry->status,
+            (double) entry->latency / 1e9,
+            entry->size
+        );
+
+        if (!item) {
+            Py_DECREF(list);
+            return NULL;
+        }
+
+        PyList_SET_ITEM(
+            list,
+            i,
+            item
+        );
+    }
+
+    for (Py_ssize_t i = 0; i < log->length; i++)
+        access_entry_clear(&log->entries[(log->start + i) % log->capacity]);
+
+    PyObject* result = Py_BuildValue(
+        "(Nn)",
+        list,
+        log->dropped
+    );
+    log->start = 0;
+    log->length = 0;
+    log->dropped = 0;
+    return result;
+}
+
+// the number of routes, which comes before the counters in a shared table
+#define METRICS_HEADER sizeof(unsigned long long)
+
+static int metrics_unshare(metrics_table* table) {
+    if (!table->shared.buf)
+        return 0;
+
+    metrics_counters* counters = PyMem_Malloc(
+        (table->capacity ? table->capacity : 1) * sizeof(metrics_counters)
+    );
+
+    if (!counters) {
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    memcpy(
+        counters,
+        table->counters,
+        table->length * sizeof(metrics_counters)
+    );
+    PyBuffer_Release(&table->shared);
+    table->shared.buf = NULL;
+    table->counters = counters;
+    table->counters_capacity = table->capacity;
+    return 0;
+}
+
+Py_ssize_t metrics_register(
+    metrics_table* table,
+    const char* method,
+    const char* path
+) {
+    if (table->length == table->capacity) {
+        Py_ssize_t capacity = table->capacity ? table->capacity * 2 : 8;
+        route_metrics* routes = PyMem_Realloc(
+            table->routes,
+            capacity * sizeof(route_metrics)
+        );
+
+        if (!routes) {
+            PyErr_NoMemory();
+            return -1;
+        }
+
+        table->routes = routes;
+        table->capacity = capacity;
+    }
+
+    if (table->length == table->counters_capacity) {
+        // a shared table can't grow, so the counters go back to being private
+        if (metrics_unshare(table) < 0)
+            return -1;
+
+        metrics_counters* counters = PyMem_Realloc(
+            table->counters,
+            table->capacity * sizeof(metrics_counters)
+        );
+
+        if (!counters) {
+            PyErr_NoMemory();
+            return -1;
+        }
+
+        table->counters = counters;
+        table->counters_capacity = table->capacity;
+    }
+
+    PyObject* method_lower = PyUnicode_FromString(method);
+    if (!method_lower) return -1;
+
+    PyObject* method_str = PyObject_CallMethod(
+        method_lower,
+        "upper",
+        NULL
+    );
+    Py_DECREF(method_lower);
+    if (!method_str) return -1;
+
+    PyObject* path_str = PyUnicode_FromString(path ? path : "");
+    if (!path_str) {
+        Py_DECREF(method_str);
+        return -1;
+    }
+
+    memset(
+        &table->counters[table->length],
+        0,
+        sizeof(metrics_counters)
+    );
+    table->routes[table->length].method = method_str;
+    table->routes[table->length].path = path_str;
+
+    if (table->shared.buf)
+        *((unsigned long long*) table->shared.buf) = table->length + 1;
+
+    return table->length++;
+}
+
+void metrics_clear(metrics_table* table) {
+    for (Py_ssize_t i = 0; i < table->length; i++) {
+        Py_DECREF(table->routes[i].method);
+        Py_DECREF(table->routes[i].path);
+    }
+
+    if (table->shared.buf) {
+        PyBuffer_Release(&table->shared);
+        table->shared.buf = NULL;
+    } else
+        PyMem_Free(table->counters);
+
+    PyMem_Free(table->routes);
+    table->routes = NULL;
+    table->counters = NULL;
+    table->length = 0;
+    table->capacity = 0;
+    table->counters_capacity = 0;
+}
+
+/*
+ * moves the counters into a writable buffer (an mmap, see _metrics.py), so other processes
+ * can read them without asking this one. the buffer starts with the number of routes, followed
+ * by a metrics_counters for each of them. None moves them back into private memory.
+ * */
+int metrics_share(metrics_table* table, PyObject* buffer) {
+    if (buffer == Py_None)
+        return metrics_unshare(table);
+
+    Py_buffer view;
+    if (PyObject_GetBuffer(
+        buffer,
+        &view,
+        PyBUF_WRITABLE | PyBUF_C_CONTIGUOUS
+        ) < 0)
+        return -1;
+
+    Py_ssize_t capacity = (view.len - (Py_ssize_t) METRICS_HEADER) /
+                          (Py_ssize_t) sizeof(metrics_counters);
+
+    if ((view.len < (Py_ssize_t) METRICS_HEADER) ||
+        (capacity < table->length)) {
+        PyBuffer_Release(&view);
+        PyErr_Format(
+            PyExc_ValueError,
+            "buffer is too small for %zd routes",
+            table->length
+        );
+        return -1;
+    }
+
+    metrics_counters* counters = (metrics_counters*) (
+        (char*) view.buf + METRICS_HEADER
+    );
+    memcpy(
+        counters,
+        table->counters,
+        table->length * sizeof(metrics_counters)
+    );
+    *((unsigned long long*) view.buf) = table->length;
+
+    if (table->shared.buf)
+        PyBuffer_Release(&table->shared);
+    else
+        PyMem_Free(table->counters);
+
+    table->shared = view;
+    table->counters = counters;
+    table->counters_capacity = capacity;
+    return 0;
+}
+
+static void metrics_record(
+    metrics_counters* metrics,
+    int status,
+    long long latency
+) {
+    long long q = latency / METRICS_BASE_NS;
+    int bucket = 0;
+
+    while (q && (bucket < METRICS_BUCKETS)) {
+        ++bucket;
+        q >>= 1;
+    }
+
+    ++metrics->count;
+    ++metrics->buckets[bucket];
+    metrics->latency_sum += latency;
+
+    if ((status >= 100) && (status < 600))
+        ++metrics->statuses[(status / 100) - 1];
+}
+
+static PyObject* ull_tuple(const unsigned long long* values, Py_ssize_t size) {
+    PyObject* tuple = PyTuple_New(size);
+    if (!tuple) return NULL;
+
+    for (Py_ssize_t i = 0; i < size; i++) {
+        PyObject* value = PyLong_FromUnsignedLongLong(values[i]);
+        if (!value) {
+            Py_DECREF(tuple);
+            return NULL;
+        }
+
+        PyTuple_SET_ITEM(
+            tuple,
+            i,
+            value
+        );
+    }
+
+    return tuple;
+}
+
+PyObject* metrics_snapshot(metrics_table* table) {
+    PyObject* list = PyList_New(table->length);
+    if (!list) return NULL;
+
+    for (Py_ssize_t i = 0; i < table->length; i++) {
+        route_metrics* route = &table->routes[i];
+        metrics_counters* metrics = &table->counters[i];
+        PyObject* statuses = ull_tuple(
+            metrics->statuses,
+            5
+        );
+        if (!statuses) {
+            Py_DECREF(list);
+            return NULL;
+        }
+
+        PyObject* buckets = ull_tuple(
+            metrics->buckets,
+            METRICS_BUCKETS + 1
+        );
+        if (!buckets) {
+            Py_DECREF(statuses);
+            Py_DECREF(list);
+            return NULL;
+        }
+
+        PyObject* item = Py_BuildValue(
+            "(OOLKNNd)",
+            route->method,
+            route->path,
+            metrics->in_flight,
+            metrics->count,
+            statuses,
+            buckets,
+            (double) metrics->latency_sum / 1e9
+        );
+
+        if (!item) {
+            Py_DECREF(list);
+            return NULL;
+        }
+
+        PyList_SET_ITEM(
+            list,
+            i,
+            item
+        );
+    }
+
+    return list;
+}
+
+// dicts of per client buckets are pruned once they get this big
+#define LIMITER_PRUNE 1024
+#define LIMITER_MAX 2
+
+typedef struct _AccessSend {
+    PyObject_HEAD
+    vectorcallfunc vectorcall;
+    PyObject* app;
+    access_log* log;
+    metrics_table* metrics;
+    Py_ssize_t route;
+    PyObject* send;
+    PyObject* method;
+    PyObject* path;
+    PyObject* route_path;
+    PyObject* profiler;
+    long long phases[PROFILE_PHASES];
+    PyObject* span;
+    PyObject* after;
+    PyObject* scope;
+    PyObject* headers;
+    limiter* limits[LIMITER_MAX];
+    long long start;
+    int status;
+    Py_ssize_t size;
+    bool done;
+} AccessSend;
+
+static void access_send_report(AccessSend* self) {
+    PyObject* phases = PyTuple_New(PROFILE_PHASES);
+    if (!phases) {
+        PyErr_WriteUnraisable(self->profiler);
+        return;
+    }
+
+    for (int i = 0; i < PROFILE_PHASES; i++) {
+        PyObject* value = PyLong_FromLongLong(self->phases[i]);
+        if (!value) {
+            Py_DECREF(phases);
+            PyErr_WriteUnraisable(self->profiler);
+            return;
+        }
+
+        PyTuple_SET_ITEM(
+            phases,
+            i,
+            value
+        );
+    }
+
+    // requests that didn't match a route share one row, since their paths
+    // could be anything
+    PyObject* route_path = self->route_path ? Py_NewRef(self->route_path) :
+                           PyUnicode_FromString("<no route>");
+    if (!route_path) {
+        Py_DECREF(phases);
+        PyErr_WriteUnraisable(self->profiler);
+        return;
+    }
+
+    PyObject* status = PyLong_FromLong(self->status);
+    if (!status) {
+        Py_DECREF(route_path);
+        Py_DECREF(phases);
+        PyErr_WriteUnraisable(self->profiler);
+        return;
+    }
+
+    PyObject* result = PyObject_Vectorcall(
+        self->profiler,
+        (PyObject*[]) { self->method, route_path, status, phases },
+        4,
+        NULL
+    );
+    Py_DECREF(route_path);
+    Py_DECREF(status);
+    Py_DECREF(phases);
+
+    // a broken profiler shouldn't break the response
+    if (!result) PyErr_WriteUnraisable(self->profiler);
+    else Py_DECREF(result);
+}
+
+static void access_send_release(AccessSend* self) {
+    for (int i = 0; i < LIMITER_MAX; i++) {
+        if (self->limits[i]) {
+            --self->limits[i]->in_flight;
+            self->limits[i] = NULL;
+        }
+    }
+}
+
+static int access_send_observe(AccessSend* self, PyObject* message) {
+    if (self->done || !PyDict_Check(message))
+        return 0;
+
+    PyObject* tp = PyDict_GetItemString(
+        message,
+        "type"
+    );
+    if (!tp || !PyUnicode_Check(tp))
+        return 0;
+
+    if (!PyUnicode_CompareWithASCIIString(
+        tp,
+        "http.response.start"
+        )) {
+        PyObject* status = PyDict_GetItemString(
+            message,
+            "status"
+        );
+        if (status && PyLong_Check(status)) {
+            self->status = (int) PyLong_AsLong(status);
+            if (PyErr_Occurred()) return -1;
+        }
+
+        return 0;
+    }
+
+    if (PyUnicode_CompareWithASCIIString(
+        tp,
+        "http.response.body"
+        ))
+        return 0;
+
+    PyObject* body = PyDict_GetItemString(
+        message,
+        "body"
+    );
+    if (body && PyBytes_Check(body))
+        self->size += PyBytes_GET_SIZE(body);
+
+    PyObject* more_body = PyDict_GetItemString(
+        message,
+        "more_body"
+    );
+    int more = more_body ? PyObject_IsTrue(more_body) : 0;
+    if (more < 0) return -1;
+
+    if (!more) {
+        long long now = monotonic_ns();
+        long long latency = now - self->start;
+        self->done = true;
+        access_send_release(self);
+
+        if (self->log)
+            access_log_push(
+                self->log,
+                self->method,
+                self->path,
+                self->status,
+                latency,
+                self->size
+            );
+
+        if (self->route >= 0) {
+            metrics_counters* metrics = &self->metrics->counters[self->route];
+            --metrics->in_flight;
+            metrics_record(
+                metrics,
+                self->status,
+                latency
+            );
+        }
+
+        if (self->profiler) {
+            self->phases[PROFILE_SEND] = now;
+            access_send_report(self);
+        }
+
+        if (self->span) {
+            PyObject* result = PyObject_CallMethod(
+                self->span,
+                "end",
+                "i",
+                self->status
+            );
+            if (!result) PyErr_WriteUnraisable(self->span);
+            else Py_DECREF(result);
+            Py_CLEAR(self->span);
+        }
+    }
+
+    return 0;
+}
+
+static PyObject* access_send_after(AccessSend* self, PyObject* message) {
+    if (!PyDict_Check(message))
+        return Py_NewRef(message);
+
+    PyObject* tp = PyDict_GetItemString(
+        message,
+        "type"
+    );
+    if (!tp || !PyUnicode_Check(tp) || PyUnicode_CompareWithASCIIString(
+        tp,
+        "http.response.start"
+        ))
+        return Py_NewRef(message);
+
+    PyObject* copy = PyDict_Copy(message);
+    if (!copy) return NULL;
+
+    PyObject* headers = PyDict_GetItemString(
+        message,
+        "headers"
+    );
+    if (headers || self->headers) {
+        PyObject* headers_copy = headers ? PySequence_List(headers) :
+                                 PyList_New(0);
+        if (!headers_copy) {
+            Py_DECREF(copy);
+            return NULL;
+        }
+
+        if (self->headers && (PyList_SetSlice(
+            headers_copy,
+            PY_SSIZE_T_MAX,
+            PY_SSIZE_T_MAX,
+            self->headers
+            ) < 0)) {
+            Py_DECREF(headers_copy);
+            Py_DECREF(copy);
+            return NULL;
+        }
+
+        if (PyDict_SetItemString(
+            copy,
+            "headers",
+            headers_copy
+            ) < 0) {
+            Py_DECREF(headers_copy);
+            Py_DECREF(copy);
+            return NULL;
+        }
+        Py_DECREF(headers_copy);
+    }
+
+    Py_ssize_t hooks = self->after ? PyTuple_GET_SIZE(self->after) : 0;
+    for (Py_ssize_t i = 0; i < hooks; i++) {
+        PyObject* result = PyObject_Vectorcall(
+            PyTuple_GET_ITEM(
+                self->after,
+                i
+            ),
+            (PyObject*[]) { self->scope, copy },
+            2,
+            NULL
+        );
+
+        if (!result) {
+            Py_DECREF(copy);
+            return NULL;
+        }
+        Py_DECREF(result);
+    }
+
+    return copy;
+}
+
+static PyObject* access_send_call(
+    AccessSend* self,
+    PyObject* const* args,
+    size_t nargsf,
+    PyObject* kwnames
+) {
+    Py_ssize_t nargs = PyVectorcall_NARGS(nargsf);
+    if ((nargs != 1) || kwnames)
+        return PyObject_Vectorcall(
+            self->send,
+            args,
+            nargsf,
+            kwnames
+        );
+
+    PyObject* message = (self->after || self->headers) ? access_send_after(
+        self,
+        args[0]
+    ) : Py_NewRef(args[0]);
+    if (!message) return NULL;
+
+    if (access_send_observe(
+        self,
+        message
+        ) < 0) {
+        Py_DECREF(message);
+        return NULL;
+    }
+
+    PyObject* res = PyObject_Vectorcall(
+        self->send,
+        (PyObject*[]) { message },
+        1,
+        NULL
+    );
+    Py_DECREF(message);
+    return res;
+}
+
+void access_send_dispatch(PyObject* self, Py_ssize_t index) {
+    if (Py_TYPE(self) != &AccessSendType)
+        return;
+
+    AccessSend* access_send = (AccessSend*) self;
+    if (index >= 0)
+        // profiles are grouped by the route's path, not the requested one
+        Py_XSETREF(
+            access_send->route_path,
+            Py_NewRef(access_send->metrics->routes[index].path)
+        );
+
+    if (!access_send->metrics->enabled || (index < 0) ||
+        (access_send->route >= 0))
+        return;
+
+    access_send->route = index;
+    ++access_send->metrics->counters[index].in_flight;
+}
+
+void access_send_profile(PyObject* self, PyObject* profiler) {
+    if (Py_TYPE(self) != &AccessSendType)
+        return;
+
+    AccessSend* access_send = (AccessSend*) self;
+    Py_XSETREF(
+        access_send->profiler,
+        Py_NewRef(profiler)
+    );
+    access_send->phases[PROFILE_START] = access_send->start;
+}
+
+void access_send_mark(PyObject* self, int phase) {
+    if (Py_TYPE(self) != &AccessSendType)
+        return;
+
+    AccessSend* access_send = (AccessSend*) self;
+    // only the first time a phase is reached counts
+    if (access_send->profiler && !access_send->phases[phase])
+        access_send->phases[phase] = monotonic_ns();
+}
+
+void access_send_headers(PyObject* self, PyObject* headers) {
+    if (Py_TYPE(self) != &AccessSendType)
+        return;
+
+    AccessSend* access_send = (AccessSend*) self;
+    Py_XSETREF(
+        access_send->headers,
+        Py_NewRef(headers)
+    );
+}
+
+void access_send_trace(
+    PyObject* self,
+    PyObject* tracer,
+    PyObject* scope,
+    Py_ssize_t index
+) {
+    if (Py_TYPE(self) != &AccessSendType)
+        return;
+
+    AccessSend* access_send = (AccessSend*) self;
+    if (access_send->span)
+        return;
+
+    PyObject* route = (index >= 0) ? access_send->metrics->routes[index].path :
+                      access_send->path;
+    PyObject* elapsed = PyLong_FromLongLong(monotonic_ns() - access_send->start);
+    if (!elapsed) {
+        PyErr_WriteUnraisable(tracer);
+        return;
+    }
+
+    PyObject* span = PyObject_Vectorcall(
+        tracer,
+        (PyObject*[]) { access_send->method, route, scope, elapsed },
+        4,
+        NULL
+    );
+    Py_DECREF(elapsed);
+
+    // like profilers, a broken tracer shouldn't break the response
+    if (!span) {
+        PyErr_WriteUnraisable(tracer);
+        return;
+    }
+
+    if (span == Py_None) {
+        // the tracer decided not to sample this request
+        Py_DECREF(span);
+        return;
+    }
+
+    access_send->span = span;
+}
+
+static void access_send_dealloc(AccessSend* self) {
+    if ((self->route >= 0) && !self->done) {
+        // the response never finished
+        --self->metrics->counters[self->route].in_flight;
+    }
+
+    // the response never finished either, if these are still set
+    access_send_release(self);
+
+    Py_XDECREF(self->app);
+    Py_XDECREF(self->send);
+    Py_XDECREF(self->method);
+    Py_XDECREF(self->path);
+    Py_XDECREF(self->route_path);
+    Py_XDECREF(self->profiler);
+    Py_XDECREF(self->span);
+    Py_XDECREF(self->after);
+    Py_XDECREF(self->scope);
+    Py_XDECREF(self->headers);
+    Py_TYPE(self)->tp_free(self);
+}
+
+PyTypeObject AccessSendType = {
+    PyVarObject_HEAD_INIT(
+        NULL,
+        0
+    )
+    .tp_name = "_view.AccessSend",
+    .tp_basicsize = sizeof(AccessSend),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_VECTORCALL,
+    .tp_vectorcall_offset = offsetof(AccessSend, vectorcall),
+    .tp_call = PyVectorcall_Call,
+    .tp_dealloc = (destructor) access_send_dealloc
+};
+
+PyObject* access_send_new(
+    PyObject* app,
+    access_log* log,
+    metrics_table* metrics,
+    PyObject* send,
+    PyObject* scope,
+    PyObject* after
+) {
+    PyObject* method = PyDict_GetItemString(
+        scope,
+        "method"
+    );
+    PyObject* path = PyDict_GetItemString(
+        scope,
+        "path"
+    );
+
+    if (!method || !path) {
+        // not something we can log, so just use send as is
+        return Py_NewRef(send);
+    }
+
+    AccessSend* self = PyObject_New(
+        AccessSend,
+        &AccessSendType
+    );
+    if (!self) return NULL;
+
+    self->vectorcall = (vectorcallfunc) access_send_call;
+    // the app owns the log, so keep it alive until the response is done
+    self->app = Py_NewRef(app);
+    self->log = log;
+    self->metrics = metrics;
+    self->route = -1;
+    self->send = Py_NewRef(send);
+    self->method = Py_NewRef(method);
+    self->path = Py_NewRef(path);
+    self->route_path = NULL;
+    self->profiler = NULL;
+    self->span = NULL;
+    self->after = after ? Py_NewRef(after) : NULL;
+    self->scope = after ? Py_NewRef(scope) : NULL;
+    self->headers = NULL;
+    for (int i = 0; i < LIMITER_MAX; i++)
+        self->limits[i] = NULL;
+    memset(
+        self->phases,
+        0,
+        sizeof(self->phases)
+    );
+    self->start = monotonic_ns();
+    self->status = 200;
+    self->size = 0;
+    self->done = false;
+    return (PyObject*) self;
+}
+
+static PyObject* limiter_response(
+    int status,
+    const char* body,
+    long long retry_after
+) {
+    PyObject* headers = Py_BuildValue(
+        "[(yy)]",
+        "content-type",
+        "text/plain"
+    );
+    if (!headers) return NULL;
+
+    if (retry_after > 0) {
+        char buf[24];
+        snprintf(
+            buf,
+            sizeof(buf),
+            "%lld",
+            retry_after
+        );
+
+        PyObject* value = PyBytes_FromString(buf);
+        if (!value) {
+            Py_DECREF(headers);
+            return NULL;
+        }
+
+        PyObject* header = Py_BuildValue(
+            "(yN)",
+            "retry-after",
+            value
+        );
+        if (!header || (PyList_Append(
+            headers,
+            header
+            ) < 0)) {
+            Py_XDECREF(header);
+            Py_DECREF(headers);
+            return NULL;
+        }
+        Py_DECREF(header);
+    }
+
+    return Py_BuildValue(
+        "({s:s,s:i,s:N}{s:s,s:y})",
+        "type",
+        "http.response.start",
+        "status",
+        status,
+        "headers",
+        headers,
+        "type",
+        "http.response.body",
+        "body",
+        body
+    );
+}
+
+limiter* limiter_new(PyObject* args) {
+    double rate;
+    Py_ssize_t burst;
+    int per_client;
+    Py_ssize_t max_in_flight;
+
+    if (!PyArg_ParseTuple(
+        args,
+        "dnpn",
+        &rate,
+        &burst,
+        &per_client,
+        &max_in_flight
+        ))
+        return NULL;
+
+    limiter* l = malloc(sizeof(limiter));
+    if (!l) return (limiter*) PyErr_NoMemory();
+
+    // a rate of 0 means there's no rate limit
+    l->interval = (rate > 0) ? (long long) (1e9 / rate) : 0;
+    l->tolerance = l->interval * ((burst > 1 ? burst : 1) - 1);
+    l->tat = 0;
+    l->clients = NULL;
+    l->prune_at = LIMITER_PRUNE;
+    l->max_in_flight = max_in_flight;
+    l->in_flight = 0;
+    l->busy = NULL;
+
+    // clients should wait for at least one token before trying again
+    long long retry_after = (l->interval + 999999999LL) / 1000000000LL;
+    l->too_many = limiter_response(
+        429,
+        "Too Many Requests",
+        retry_after > 0 ? retry_after : 1
+    );
+    if (!l->too_many) {
+        limiter_free(l);
+        return NULL;
+    }
+
+    l->busy = limiter_response(
+        503,
+        "Service Unavailable",
+        1
+    );
+    if (!l->busy) {
+        limiter_free(l);
+        return NULL;
+    }
+
+    if (per_client && l->interval) {
+        l->clients = PyDict_New();
+        if (!l->clients) {
+            limiter_free(l);
+            return NULL;
+        }
+    }
+
+    return l;
+}
+
+void limiter_free(limiter* l) {
+    Py_XDECREF(l->clients);
+    Py_XDECREF(l->too_many);
+    Py_XDECREF(l->busy);
+    free(l);
+}
+
+static int limiter_prune(limiter* l, long long now) {
+    PyObject* expired = PyList_New(0);
+    if (!expired) return -1;
+
+    PyObject* key;
+    PyObject* value;
+    Py_ssize_t pos = 0;
+
+    while (PyDict_Next(
+        l->clients,
+        &pos,
+        &key,
+        &value
+    )) {
+        if ((PyLong_AsLongLong(value) <= now) && (PyList_Append(
+            expired,
+            key
+            ) < 0)) {
+            Py_DECREF(expired);
+            return -1;
+        }
+    }
+
+    for (Py_ssize_t i = 0; i < PyList_GET_SIZE(expired); i++) {
+        if (PyDict_DelItem(
+            l->clients,
+            PyList_GET_ITEM(
+                expired,
+                i
+            )
+            ) < 0) {
+            Py_DECREF(expired);
+            return -1;
+        }
+    }
+
+    Py_DECREF(expired);
+    Py_ssize_t size = PyDict_GET_SIZE(l->clients) * 2;
+    l->prune_at = size > LIMITER_PRUNE ? size : LIMITER_PRUNE;
+    return 0;
+}
+
+// returns 1 if a token was taken, 0 if the bucket is empty
+static int limiter_take(limiter* l, PyObject* scope) {
+    long long now = monotonic_ns();
+
+    if (!l->clients) {
+        long long tat = l->tat > now ? l->tat : now;
+        if (tat - now > l->tolerance) return 0;
+
+        l->tat = tat + l->interval;
+        return 1;
+    }
+
+    // clients without an address share a bucket
+    PyObject* key = Py_None;
+    PyObject* client = PyDict_GetItemString(
+        scope,
+        "client"
+    );
+
+    if (client && (PyTuple_Check(client) || PyList_Check(client)) &&
+        PySequence_Fast_GET_SIZE(client))
+        key = PySequence_Fast_GET_ITEM(
+            client,
+            0
+        );
+
+    PyObject* stored = PyDict_GetItemWithError(
+        l->clients,
+        key
+    );
+    long long tat = now;
+
+    if (stored) {
+        long long value = PyLong_AsLongLong(stored);
+        if (value == -1 && PyErr_Occurred()) return -1;
+        if (value > now) tat = value;
+    } else if (PyErr_Occurred()) return -1;
+
+    if (tat - now > l->tolerance) return 0;
+
+    PyObject* value = PyLong_FromLongLong(tat + l->interval);
+    if (!value) return -1;
+
+    int res = PyDict_SetItem(
+        l->clients,
+        key,
+        value
+    );
+    Py_DECREF(value);
+    if (res < 0) return -1;
+
+    if ((PyDict_GET_SIZE(l->clients) >= l->prune_at) && (limiter_prune(
+        l,
+        now
+        ) < 0))
+        return -1;
+
+    return 1;
+}
+
+int limiter_admit(limiter* l, PyObject* scope, PyObject* send) {
+    // full routes are checked first, so they don't use up tokens
+    if (l->max_in_flight && (l->in_flight >= l->max_in_flight))
+        return LIMIT_BUSY;
+
+    if (l->interval) {
+        int taken = limiter_take(
+            l,
+            scope
+        );
+        if (taken < 0) return -1;
+        if (!taken) return LIMIT_RATE;
+    }
+
+    if (l->max_in_flight && (Py_TYPE(send) == &AccessSendType)) {
+        AccessSend* access_send = (AccessSend*) send;
+
+        for (int i = 0; i < LIMITER_MAX; i++) {
+            if (!access_send->limits[i]) {
+                access_send->limits[i] = l;
+                ++l->in_flight;
+                break;
+            }
+        }
+    }
+
+    return LIMIT_OK;
+}
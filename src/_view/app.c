@@ -13,15 +13,17 @@
     Py_ssize_t cache_rate; \
     PyObject* errors; \
     PyObject* parts = NULL; \
+    PyObject* limits = NULL; \
     if (!PyArg_ParseTuple( \
         args, \
-        "zOnOOO", \
+        "zOnOOO|O", \
         &path, \
         &callable, \
         &cache_rate, \
         &inputs, \
         &errors, \
-        &parts \
+        &parts, \
+        &limits \
         )) return NULL; \
     route* r = route_new( \
         callable, \
@@ -30,18 +32,36 @@
         figure_has_body(inputs) \
     ); \
     if (!r) return NULL; \
+    r->metrics_index = metrics_register( \
+        &self->metrics, \
+        #target, \
+        path \
+    ); \
+    if (r->metrics_index < 0) return NULL; \
     if (load( \
         r, \
         inputs \
         ) < 0) return NULL; \
     if (load_errors(r, errors) < 0) \
         return NULL; \
+    if (limits && (limits != Py_None)) { \
+        r->limits = limiter_new(limits); \
+        if (!r->limits) return NULL; \
+        self->limited = true; \
+    } \
     if (!PySequence_Size(parts)) \
         map_set(self-> target, path, r); \
     else \
         if (load_parts(self, self-> target, parts, r) < 0) return NULL; \
     Py_RETURN_NONE;
 #define TRANSPORT_MAP() map_new(2, (map_free_func) route_free)
+#ifdef VIEW_NO_PROFILING
+#define PROFILE_MARK(app, send, phase) do {} while (0)
+#else
+#define PROFILE_MARK(app, send, phase) do { \
+        if ((app)->profiler) access_send_mark(send, phase); \
+} while (0)
+#endif
 
 #define ROUTE(target) static PyObject* target ( \
     ViewApp* self, \
@@ -66,6 +86,8 @@
 #define TYPECODE_CLASS 7
 #define TYPECODE_CLASSTYPES 8
 #define TYPECODE_LIST 9
+#define CLIENT_ERRORS 29
+#define SERVER_ERRORS 12
 
 typedef struct _route_input route_input;
 typedef struct _app_parsers app_parsers;
@@ -77,6 +99,20 @@ typedef struct _app_parsers {
     PyObject* json;
 } app_parsers;
 
+typedef struct _error_response {
+    PyObject* start;
+    PyObject* body;
+} error_response;
+
+typedef struct _cors_settings {
+    bool enabled;
+    bool echo; // respond with the request's origin instead of *
+    bool reflect; // allow whichever headers a preflight asks for
+    PyObject* origins; // allowed origins, or NULL for any
+    PyObject* headers; // added to every response to an allowed origin
+    PyObject* preflights; // path -> headers for its preflight response
+} cors_settings;
+
 typedef struct _ViewApp {
     PyObject ob_base; // PyObject_HEAD doesn't work on windows for some reason
     PyObject* startup;
@@ -87,8 +123,22 @@ typedef struct _ViewApp {
     map* patch;
     map* delete;
     map* options;
-    PyObject* client_errors[28];
-    PyObject* server_errors[11];
+    PyObject* client_errors[CLIENT_ERRORS];
+    PyObject* server_errors[SERVER_ERRORS];
+    error_response client_responses[CLIENT_ERRORS];
+    error_response server_responses[SERVER_ERRORS];
+    PyObject* error_cache;
+    access_log* access;
+    metrics_table metrics;
+    PyObject* profiler;
+    Py_ssize_t profile_every;
+    Py_ssize_t profile_count;
+    PyObject* tracer;
+    PyObject* before_hooks;
+    PyObject* after_hooks;
+    cors_settings cors;
+    limiter* limits;
+    bool limited;
     bool dev;
     PyObject* exceptions;
     app_parsers parsers;
@@ -126,11 +176,13 @@ struct Route {
     Py_ssize_t cache_rate;
     route_input** inputs;
     Py_ssize_t inputs_size;
-    PyObject* client_errors[28];
-    PyObject* server_errors[11];
+    PyObject* client_errors[CLIENT_ERRORS];
+    PyObject* server_errors[SERVER_ERRORS];
     PyObject* exceptions;
     bool pass_context;
     bool has_body;
+    Py_ssize_t metrics_index;
+    limiter* limits;
     map* routes;
     route* r;
 };
@@ -205,15 +257,17 @@ route* route_new(
     r->inputs_size = inputs_size;
     r->pass_context = false;
     r->has_body = has_body;
+    r->metrics_index = -1;
+    r->limits = NULL;
 
     // transports
     r->routes = NULL;
     r->r = NULL;
 
-    for (int i = 0; i < 28; i++)
+    for (int i = 0; i < CLIENT_ERRORS; i++)
         r->client_errors[i] = NULL;
 
-    for (int i = 0; i < 11; i++)
+    for (int i = 0; i < SERVER_ERRORS; i++)
         r->server_errors[i] = NULL;
 
     return r;
@@ -237,13 +291,14 @@ void route_free(route* r) {
     Py_XDECREF(r->cache_headers);
     Py_DECREF(r->callable);
 
-    for (int i = 0; i < 11; i++)
+    for (int i = 0; i < SERVER_ERRORS; i++)
         Py_XDECREF(r->server_errors[i]);
 
-    for (int i = 0; i < 28; i++)
+    for (int i = 0; i < CLIENT_ERRORS; i++)
         Py_XDECREF(r->client_errors[i]);
 
     if (r->cache) free(r->cache);
+    if (r->limits) limiter_free(r->limits);
     free(r);
 }
 
@@ -346,11 +401,13 @@ route* route_transport_new(route* r) {
     rt->inputs_size = 0;
     rt->pass_context = false;
     rt->has_body = false;
+    rt->metrics_index = -1;
+    rt->limits = NULL;
 
-    for (int i = 0; i < 28; i++)
+    for (int i = 0; i < CLIENT_ERRORS; i++)
         rt->client_errors[i] = NULL;
 
-    for (int i = 0; i < 11; i++)
+    for (int i = 0; i < SERVER_ERRORS; i++)
         rt->server_errors[i] = NULL;
 
     rt->routes = NULL;
@@ -842,6 +899,8 @@ static PyObject** json_parser(
     return ob;
 }
 
+static int build_error_responses(ViewApp* self);
+
 static PyObject* new(PyTypeObject* tp, PyObject* args, PyObject* kwds) {
     ViewApp* self = (ViewApp*) tp->tp_alloc(
         tp,
@@ -880,13 +939,46 @@ static PyObject* new(PyTypeObject* tp, PyObject* args, PyObject* kwds) {
         return NULL;
     };
 
-    for (int i = 0; i < 28; i++)
+    for (int i = 0; i < CLIENT_ERRORS; i++)
         self->client_errors[i] = NULL;
 
-    for (int i = 0; i < 11; i++)
+    for (int i = 0; i < SERVER_ERRORS; i++)
         self->server_errors[i] = NULL;
 
     self->has_path_params = false;
+    self->access = NULL;
+    self->metrics.routes = NULL;
+    self->metrics.counters = NULL;
+    self->metrics.length = 0;
+    self->metrics.capacity = 0;
+    self->metrics.counters_capacity = 0;
+    self->metrics.shared.buf = NULL;
+    self->metrics.enabled = false;
+    self->profiler = NULL;
+    self->profile_every = 1;
+    self->profile_count = 0;
+    self->tracer = NULL;
+    self->before_hooks = NULL;
+    self->after_hooks = NULL;
+    self->cors.enabled = false;
+    self->cors.echo = false;
+    self->cors.reflect = false;
+    self->cors.origins = NULL;
+    self->cors.headers = NULL;
+    self->cors.preflights = NULL;
+    self->limits = NULL;
+    self->limited = false;
+    self->error_cache = PyDict_New();
+
+    if (!self->error_cache) {
+        Py_DECREF(self);
+        return NULL;
+    }
+
+    if (build_error_responses(self) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
 
     return (PyObject*) self;
 }
@@ -1225,11 +1317,17 @@ static const char* get_err_str(int status) {
     return NULL;
 }
 
+static inline bool is_stream(PyObject* ob) {
+    PyAsyncMethods* as_async = Py_TYPE(ob)->tp_as_async;
+    return as_async && as_async->am_anext;
+}
+
 static int find_result_for(
     PyObject* target,
     char** res_str,
     int* status,
-    PyObject* headers
+    PyObject* headers,
+    PyObject** stream     /* may be NULL */
 ) {
     if (Py_IS_TYPE(
         target,
@@ -1271,12 +1369,9 @@ static int find_result_for(
                 item_bytes
                 ) < 0) {
                 Py_DECREF(header_list);
-                Py_DECREF(item_bytes);
                 return -1;
             };
 
-            Py_DECREF(item_bytes);
-
             PyObject* v_bytes = PyBytes_FromString(v_str);
 
             if (!v_bytes) {
@@ -1293,8 +1388,6 @@ static int find_result_for(
                 return -1;
             };
 
-            Py_DECREF(v_bytes);
-
             if (PyList_Append(
                 headers,
                 header_list
@@ -1337,6 +1430,8 @@ static int find_result_for(
         if (PyErr_Occurred()) {
             return -1;
         }
+    } else if (stream && is_stream(target)) {
+        *stream = Py_NewRef(target);
     } else {
         PyErr_SetString(
             PyExc_TypeError,
@@ -1351,9 +1446,11 @@ static int handle_result(
     PyObject* raw_result,
     char** res_target,
     int* status_target,
-    PyObject** headers_target
+    PyObject** headers_target,
+    PyObject** stream_target     /* may be NULL */
 ) {
     char* res_str = NULL;
+    PyObject* stream = NULL;
     int status = 200;
     PyObject* headers = PyList_New(0);
     PyObject* result;
@@ -1376,6 +1473,8 @@ static int handle_result(
         const char* tmp = PyUnicode_AsUTF8(result);
         if (!tmp) return -1;
         res_str = strdup(tmp);
+    } else if (stream_target && is_stream(result)) {
+        stream = Py_NewRef(result);
     } else if (PyTuple_CheckExact(
         result
                )) {
@@ -1405,21 +1504,24 @@ static int handle_result(
                 first,
                 &res_str,
                 &status,
-                headers
+                headers,
+                stream_target ? &stream : NULL
                 ) < 0) return -1;
 
             if (second && find_result_for(
                 second,
                 &res_str,
                 &status,
-                headers
+                headers,
+                stream_target ? &stream : NULL
                 ) < 0) return -1;
 
             if (third && find_result_for(
                 third,
                 &res_str,
                 &status,
-                headers
+                headers,
+                stream_target ? &stream : NULL
                 ) < 0) return -1;
         }
     } else {
@@ -1434,15 +1536,230 @@ static int handle_result(
     *res_target = res_str;
     *status_target = status;
     *headers_target = headers;
+    if (stream_target) *stream_target = stream;
+    return 0;
+}
+
+/*
+ * copies a header list so a cached one can be handed to send. ASGI middleware is free to
+ * mutate the messages it's sent, so the list and any mutable pairs in it are copied.
+ * */
+static PyObject* copy_headers(PyObject* headers) {
+    Py_ssize_t size = PyList_GET_SIZE(headers);
+    PyObject* copy = PyList_New(size);
+    if (!copy) return NULL;
+
+    for (Py_ssize_t i = 0; i < size; i++) {
+        PyObject* pair = PyList_GET_ITEM(
+            headers,
+            i
+        );
+        pair = PyTuple_CheckExact(pair) ? Py_NewRef(pair) : PySequence_Tuple(
+            pair
+        );
+
+        if (!pair) {
+            Py_DECREF(copy);
+            return NULL;
+        }
+        PyList_SET_ITEM(
+            copy,
+            i,
+            pair
+        );
+    }
+
+    return copy;
+}
+
+/*
+ * -- error responses --
+ * the default error responses (and the results of error handlers) never change,
+ * so the ASGI messages for them are built once and then reused for every request.
+ * each send gets its own copy of them, so middleware can't change the cached ones.
+ * */
+
+static const int error_codes[] = {
+    400, 401, 402, 403, 404, 405, 406, 407, 408, 409, 410, 411, 412, 413,
+    414, 415, 416, 417, 418, 421, 422, 423, 424, 425, 426, 428, 429, 431,
+    451, 500, 501, 502, 503, 504, 505, 506, 507, 508, 510, 511
+};
+
+static int error_response_new(
+    error_response* target,
+    int status,
+    const char* message,
+    PyObject* headers     /* may be NULL */
+) {
+    if (!headers) {
+        target->start = Py_BuildValue(
+            "{s:s,s:i,s:[[y,y]]}",
+            "type",
+            "http.response.start",
+            "status",
+            status,
+            "headers",
+            "content-type",
+            "text/plain"
+        );
+    } else {
+        target->start = Py_BuildValue(
+            "{s:s,s:i,s:O}",
+            "type",
+            "http.response.start",
+            "status",
+            status,
+            "headers",
+            headers
+        );
+    }
+
+    if (!target->start)
+        return -1;
+
+    target->body = Py_BuildValue(
+        "{s:s,s:y}",
+        "type",
+        "http.response.body",
+        "body",
+        message
+    );
+
+    if (!target->body) {
+        Py_CLEAR(target->start);
+        return -1;
+    }
+
+    return 0;
+}
+
+static int build_error_responses(ViewApp* self) {
+    for (int i = 0; i < CLIENT_ERRORS; i++) {
+        self->client_responses[i].start = NULL;
+        self->client_responses[i].body = NULL;
+    }
+
+    for (int i = 0; i < SERVER_ERRORS; i++) {
+        self->server_responses[i].start = NULL;
+        self->server_responses[i].body = NULL;
+    }
+
+    for (size_t i = 0; i < (sizeof(error_codes) / sizeof(int)); i++) {
+        int status = error_codes[i];
+        error_response* target = status >= 500 ?
+            &self->server_responses[status - 500] :
+            &self->client_responses[hash_client_error(status)];
+
+        if (error_response_new(
+            target,
+            status,
+            get_err_str(status),
+            NULL
+            ) < 0)
+            return -1;
+    }
+
+    return 0;
+}
+
+static error_response* get_error_response(ViewApp* self, int status) {
+    error_response* res;
+
+    if (status >= 500) {
+        if (status - 500 >= SERVER_ERRORS) return NULL;
+        res = &self->server_responses[status - 500];
+    } else {
+        uint16_t index = hash_client_error(status);
+        if (index >= CLIENT_ERRORS) return NULL;
+        res = &self->client_responses[index];
+    }
+
+    return res->start ? res : NULL;
+}
+
+static int send_error_response(
+    PyObject* awaitable,
+    PyObject* send,
+    PyObject* start,
+    PyObject* body
+) {
+    PyObject* start_copy = PyDict_Copy(start);
+    if (!start_copy) return -1;
+
+    PyObject* headers = copy_headers(
+        PyDict_GetItemString(
+            start,
+            "headers"
+        )
+    );
+
+    if (!headers || (PyDict_SetItemString(
+        start_copy,
+        "headers",
+        headers
+        ) < 0)) {
+        Py_XDECREF(headers);
+        Py_DECREF(start_copy);
+        return -1;
+    }
+    Py_DECREF(headers);
+
+    PyObject* coro = PyObject_Vectorcall(
+        send,
+        (PyObject*[]) { start_copy },
+        1,
+        NULL
+    );
+    Py_DECREF(start_copy);
+
+    if (!coro)
+        return -1;
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        coro
+        ) < 0) {
+        Py_DECREF(coro);
+        return -1;
+    }
+
+    Py_DECREF(coro);
+    PyObject* body_copy = PyDict_Copy(body);
+    if (!body_copy) return -1;
+
+    coro = PyObject_Vectorcall(
+        send,
+        (PyObject*[]) { body_copy },
+        1,
+        NULL
+    );
+    Py_DECREF(body_copy);
+
+    if (!coro)
+        return -1;
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        coro
+        ) < 0) {
+        Py_DECREF(coro);
+        return -1;
+    }
+
+    Py_DECREF(coro);
     return 0;
 }
 
 static int finalize_err_cb(PyObject* awaitable, PyObject* result) {
     PyObject* send;
+    ViewApp* self;
+    PyObject* handler;
 
     if (PyAwaitable_UnpackValues(
         awaitable,
-        &send
+        &send,
+        &self,
+        &handler
         ) < 0) {
         return -1;
     }
@@ -1455,29 +1772,57 @@ static int finalize_err_cb(PyObject* awaitable, PyObject* result) {
         result,
         &res_str,
         &status_code,
-        &headers
+        &headers,
+        NULL
         ) < 0) {
-        Py_DECREF(result);
         return -1;
     }
 
-    if (send_raw_text(
-        awaitable,
-        send,
+    error_response res;
+    int err = error_response_new(
+        &res,
         status_code,
         res_str,
         headers
-        ) < 0) {
-        Py_DECREF(result);
-        free(res_str);
+    );
+    free(res_str);
+    Py_DECREF(headers);
+
+    if (err < 0)
+        return -1;
+
+    // error handlers don't take any parameters, so the result can be reused
+    PyObject* cached = PyTuple_Pack(
+        2,
+        res.start,
+        res.body
+    );
+
+    if (!cached || (PyDict_SetItem(
+        self->error_cache,
+        handler,
+        cached
+        ) < 0)) {
+        Py_XDECREF(cached);
+        Py_DECREF(res.start);
+        Py_DECREF(res.body);
         return -1;
     }
 
-    free(res_str);
-    return 0;
+    Py_DECREF(cached);
+    err = send_error_response(
+        awaitable,
+        send,
+        res.start,
+        res.body
+    );
+    Py_DECREF(res.start);
+    Py_DECREF(res.body);
+    return err;
 }
 
 static int run_err_cb(
+    ViewApp* self,
     PyObject* awaitable,
     PyObject* handler,
     PyObject* send,
@@ -1486,11 +1831,25 @@ static int run_err_cb(
 ) {
     if (!handler) {
         if (called) *called = false;
+        error_response* res = get_error_response(
+            self,
+            status
+        );
+
+        if (res) {
+            return send_error_response(
+                awaitable,
+                send,
+                res->start,
+                res->body
+            );
+        }
+
         if (send_raw_text(
             awaitable,
             send,
             status,
-            get_err_str(status),
+            "",
             NULL
             ) < 0
         ) {
@@ -1501,6 +1860,26 @@ static int run_err_cb(
     }
     if (called) *called = true;
 
+    PyObject* cached = PyDict_GetItem(
+        self->error_cache,
+        handler
+    );
+
+    if (cached) {
+        return send_error_response(
+            awaitable,
+            send,
+            PyTuple_GET_ITEM(
+                cached,
+                0
+            ),
+            PyTuple_GET_ITEM(
+                cached,
+                1
+            )
+        );
+    }
+
     PyObject* coro = PyObject_CallNoArgs(handler);
 
     if (!coro)
@@ -1515,8 +1894,10 @@ static int run_err_cb(
 
     if (PyAwaitable_SaveValues(
         new_awaitable,
-        1,
-        send
+        3,
+        send,
+        self,
+        handler
         ) < 0) {
         Py_DECREF(new_awaitable);
         Py_DECREF(coro);
@@ -1534,15 +1915,17 @@ static int run_err_cb(
         return -1;
     }
 
+    Py_DECREF(coro);
+
     if (PyAwaitable_AWAIT(
         awaitable,
         new_awaitable
         ) < 0) {
         Py_DECREF(new_awaitable);
-        Py_DECREF(coro);
         return -1;
     }
 
+    Py_DECREF(new_awaitable);
     return 0;
 }
 
@@ -1563,6 +1946,13 @@ static int fire_error(
         ) < 0)
         return -1;
 
+    // for errors raised by the route, this is where its handler finished
+    PROFILE_MARK(
+        self,
+        send,
+        PROFILE_HANDLER
+    );
+
     uint16_t index = 0;
     PyObject* handler = NULL;
 
@@ -1582,6 +1972,7 @@ static int fire_error(
     }
 
     if (run_err_cb(
+        self,
         awaitable,
         handler,
         send,
@@ -1620,8 +2011,14 @@ static int lifespan(PyObject* awaitable, PyObject* result) {
         result,
         "type"
     );
+
+    if (!tp)
+        return PyErr_BadASGI();
+
     const char* type = PyUnicode_AsUTF8(tp);
-    Py_DECREF(tp);
+
+    if (!type)
+        return -1;
 
     bool is_startup = !strcmp(
         type,
@@ -1629,8 +2026,11 @@ static int lifespan(PyObject* awaitable, PyObject* result) {
     );
     PyObject* target_obj = is_startup ? self->startup : self->cleanup;
     if (target_obj) {
-        if (!PyObject_CallNoArgs(target_obj))
+        PyObject* res = PyObject_CallNoArgs(target_obj);
+        if (!res)
             return -1;
+
+        Py_DECREF(res);
     }
 
     PyObject* send_dict = Py_BuildValue(
@@ -1650,11 +2050,11 @@ static int lifespan(PyObject* awaitable, PyObject* result) {
         NULL
     );
 
+    Py_DECREF(send_dict);
+
     if (!send_coro)
         return -1;
 
-    Py_DECREF(send_dict);
-
     if (PyAwaitable_AWAIT(
         awaitable,
         send_coro
@@ -1665,27 +2065,22 @@ static int lifespan(PyObject* awaitable, PyObject* result) {
     Py_DECREF(send_coro);
     if (!is_startup) return 0;
 
-    PyObject* aw = PyAwaitable_New();
-    if (!aw)
-        return -1;
-
+    // wait for the shutdown message on the same awaitable
     PyObject* recv_coro = PyObject_CallNoArgs(receive);
-    if (!recv_coro) {
-        Py_DECREF(aw);
+    if (!recv_coro)
         return -1;
-    }
 
     if (PyAwaitable_AddAwait(
-        aw,
+        awaitable,
         recv_coro,
         lifespan,
         NULL
         ) < 0) {
-        Py_DECREF(aw);
         Py_DECREF(recv_coro);
         return -1;
     };
 
+    Py_DECREF(recv_coro);
     return 0;
 }
 
@@ -1700,12 +2095,33 @@ static void dealloc(ViewApp* self) {
     map_free(self->options);
     Py_XDECREF(self->exceptions);
 
-    for (int i = 0; i < 11; i++)
+    for (int i = 0; i < SERVER_ERRORS; i++)
         Py_XDECREF(self->server_errors[i]);
 
-    for (int i = 0; i < 28; i++)
+    for (int i = 0; i < CLIENT_ERRORS; i++)
         Py_XDECREF(self->client_errors[i]);
 
+    for (int i = 0; i < SERVER_ERRORS; i++) {
+        Py_XDECREF(self->server_responses[i].start);
+        Py_XDECREF(self->server_responses[i].body);
+    }
+
+    for (int i = 0; i < CLIENT_ERRORS; i++) {
+        Py_XDECREF(self->client_responses[i].start);
+        Py_XDECREF(self->client_responses[i].body);
+    }
+
+    Py_XDECREF(self->error_cache);
+    if (self->access) access_log_free(self->access);
+    metrics_clear(&self->metrics);
+    Py_XDECREF(self->profiler);
+    Py_XDECREF(self->tracer);
+    Py_XDECREF(self->before_hooks);
+    Py_XDECREF(self->after_hooks);
+    Py_XDECREF(self->cors.origins);
+    Py_XDECREF(self->cors.headers);
+    Py_XDECREF(self->cors.preflights);
+    if (self->limits) limiter_free(self->limits);
     Py_TYPE(self)->tp_free(self);
 }
 
@@ -1778,45 +2194,377 @@ static int route_error(
 }
 
 
-static int handle_route_callback(
+/*
+ * -- streaming --
+ * a route may return an async iterator (such as an async generator) instead of a string.
+ * the response is started right away, and every chunk it yields is sent with more_body set.
+ * once the iterator raises StopAsyncIteration, the response is finished with an empty body.
+ *
+ * streaming only begins once the start message has been sent, so an error from the iterator (or a
+ * bad chunk) can't be turned into an error response anymore. instead, the error is printed, the
+ * body is ended where it is, and the iterator is closed.
+ * */
+
+static int stream_send(
     PyObject* awaitable,
-    PyObject* result
+    PyObject* send,
+    PyObject* body,
+    bool more_body
 ) {
-    PyObject* send;
-    route* r;
-
-    if (PyAwaitable_UnpackValues(
-        awaitable,
-        NULL,
-        NULL,
-        NULL,
-        &send
-        ) < 0) return -1;
+    PyObject* dict = Py_BuildValue(
+        "{s:s,s:O,s:O}",
+        "type",
+        "http.response.body",
+        "body",
+        body,
+        "more_body",
+        more_body ? Py_True : Py_False
+    );
 
-    if (PyAwaitable_UnpackArbValues(
-        awaitable,
-        &r,
-        NULL,
-        NULL
-        ) < 0) return -1;
+    if (!dict)
+        return -1;
+
+    PyObject* coro = PyObject_Vectorcall(
+        send,
+        (PyObject*[]) { dict },
+        1,
+        NULL
+    );
+    Py_DECREF(dict);
+
+    if (!coro)
+        return -1;
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        coro
+        ) < 0) {
+        Py_DECREF(coro);
+        return -1;
+    }
+
+    Py_DECREF(coro);
+    return 0;
+}
+
+static int stream_chunk(PyObject* awaitable, PyObject* chunk);
+static int stream_done(
+    PyObject* awaitable,
+    PyObject* tp,
+    PyObject* value,
+    PyObject* tb
+);
+
+static int stream_abort(
+    PyObject* awaitable,
+    PyObject* send,
+    PyObject* stream
+) {
+    PyObject* empty = PyBytes_FromStringAndSize(
+        "",
+        0
+    );
+    if (!empty) return -1;
+
+    int res = stream_send(
+        awaitable,
+        send,
+        empty,
+        false
+    );
+    Py_DECREF(empty);
+    if (res < 0) return -1;
+
+    PyObject* aclose = PyObject_GetAttrString(
+        stream,
+        "aclose"
+    );
+
+    if (!aclose) {
+        // not every async iterator can be closed
+        if (!PyErr_ExceptionMatches(PyExc_AttributeError))
+            return -1;
+
+        PyErr_Clear();
+        return 0;
+    }
+
+    PyObject* coro = PyObject_CallNoArgs(aclose);
+    Py_DECREF(aclose);
+    if (!coro) return -1;
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        coro
+        ) < 0) {
+        Py_DECREF(coro);
+        return -1;
+    }
+
+    Py_DECREF(coro);
+    return 0;
+}
+
+static int stream_next(PyObject* awaitable, PyObject* stream) {
+    PyObject* coro = Py_TYPE(stream)->tp_as_async->am_anext(stream);
+
+    if (!coro)
+        return -1;
+
+    if (PyAwaitable_AddAwait(
+        awaitable,
+        coro,
+        stream_chunk,
+        stream_done
+        ) < 0) {
+        Py_DECREF(coro);
+        return -1;
+    }
+
+    Py_DECREF(coro);
+    return 0;
+}
+
+static int stream_chunk(PyObject* awaitable, PyObject* chunk) {
+    PyObject* send;
+    PyObject* stream;
+
+    if (PyAwaitable_UnpackValues(
+        awaitable,
+        &send,
+        &stream
+        ) < 0)
+        return -1;
+
+    PyObject* body;
+
+    if (PyUnicode_Check(chunk)) {
+        body = PyUnicode_AsUTF8String(chunk);
+        if (!body) return -1;
+    } else if (PyBytes_Check(chunk)) {
+        body = Py_NewRef(chunk);
+    } else {
+        PyErr_Format(
+            PyExc_TypeError,
+            "streamed chunks must be str or bytes, not %R",
+            chunk
+        );
+        PyErr_Print();
+        return stream_abort(
+            awaitable,
+            send,
+            stream
+        );
+    }
+
+    if (PyBytes_GET_SIZE(body) && (stream_send(
+        awaitable,
+        send,
+        body,
+        true
+        ) < 0)) {
+        Py_DECREF(body);
+        return -1;
+    }
+
+    Py_DECREF(body);
+    return stream_next(
+        awaitable,
+        stream
+    );
+}
+
+static int stream_done(
+    PyObject* awaitable,
+    PyObject* tp,
+    PyObject* value,
+    PyObject* tb
+) {
+    PyObject* send;
+    PyObject* stream;
+
+    if (PyAwaitable_UnpackValues(
+        awaitable,
+        &send,
+        &stream
+        ) < 0)
+        return -1;
+
+    if (!PyErr_GivenExceptionMatches(
+        tp,
+        PyExc_StopAsyncIteration
+        )) {
+        PyErr_Display(
+            tp,
+            value,
+            tb
+        );
+        return stream_abort(
+            awaitable,
+            send,
+            stream
+        );
+    }
+
+    PyObject* empty = PyBytes_FromStringAndSize(
+        "",
+        0
+    );
+    if (!empty) return -1;
+
+    int res = stream_send(
+        awaitable,
+        send,
+        empty,
+        false
+    );
+    Py_DECREF(empty);
+    return res;
+}
+
+static int start_stream(
+    PyObject* awaitable,
+    PyObject* send,
+    int status,
+    PyObject* headers,
+    PyObject* stream
+) {
+    PyObject* start = Py_BuildValue(
+        "{s:s,s:i,s:O}",
+        "type",
+        "http.response.start",
+        "status",
+        status,
+        "headers",
+        headers
+    );
+
+    if (!start)
+        return -1;
+
+    PyObject* coro = PyObject_Vectorcall(
+        send,
+        (PyObject*[]) { start },
+        1,
+        NULL
+    );
+    Py_DECREF(start);
+
+    if (!coro)
+        return -1;
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        coro
+        ) < 0) {
+        Py_DECREF(coro);
+        return -1;
+    }
+
+    Py_DECREF(coro);
+    PyObject* stream_aw = PyAwaitable_New();
+
+    if (!stream_aw)
+        return -1;
+
+    if (PyAwaitable_SaveValues(
+        stream_aw,
+        2,
+        send,
+        stream
+        ) < 0) {
+        Py_DECREF(stream_aw);
+        return -1;
+    }
+
+    if (stream_next(
+        stream_aw,
+        stream
+        ) < 0) {
+        Py_DECREF(stream_aw);
+        return -1;
+    }
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        stream_aw
+        ) < 0) {
+        Py_DECREF(stream_aw);
+        return -1;
+    }
+
+    Py_DECREF(stream_aw);
+    return 0;
+}
+
+static int handle_route_callback(
+    PyObject* awaitable,
+    PyObject* result
+) {
+    ViewApp* self;
+    PyObject* send;
+    route* r;
+
+    if (PyAwaitable_UnpackValues(
+        awaitable,
+        &self,
+        NULL,
+        NULL,
+        &send
+        ) < 0) return -1;
+
+    PROFILE_MARK(
+        self,
+        send,
+        PROFILE_HANDLER
+    );
+
+    if (PyAwaitable_UnpackArbValues(
+        awaitable,
+        &r,
+        NULL,
+        NULL
+        ) < 0) return -1;
 
     char* res_str;
     int status;
     PyObject* headers;
+    PyObject* stream;
 
     if (handle_result(
         result,
         &res_str,
         &status,
-        &headers
+        &headers,
+        &stream
         ) < 0) {
         return -1;
     }
 
+    if (stream) {
+        int res = start_stream(
+            awaitable,
+            send,
+            status,
+            headers,
+            stream
+        );
+        free(res_str);
+        Py_DECREF(headers);
+        Py_DECREF(stream);
+        return res;
+    }
+
     if (r->cache_rate > 0) {
         r->cache = res_str;
         r->cache_status = status;
-        r->cache_headers = Py_NewRef(headers);
+        r->cache_headers = copy_headers(headers);
+        if (!r->cache_headers) {
+            r->cache = NULL;
+            free(res_str);
+            Py_DECREF(headers);
+            return -1;
+        }
         r->cache_index = 0;
     }
 
@@ -1897,6 +2645,7 @@ static int handle_route_impl(
 ) {
     route* r;
     ViewApp* self;
+    PyObject* send;
     Py_ssize_t* size;
     PyObject** path_params;
 
@@ -1905,11 +2654,18 @@ static int handle_route_impl(
         &self,
         NULL,
         NULL,
-        NULL
+        &send
         ) < 0) {
         return -1;
     }
 
+    // the body has been fully received by now
+    PROFILE_MARK(
+        self,
+        send,
+        PROFILE_BODY
+    );
+
     if (PyAwaitable_UnpackArbValues(
         awaitable,
         &r,
@@ -1958,6 +2714,11 @@ static int handle_route_impl(
     }
 
     PyObject* coro;
+    PROFILE_MARK(
+        self,
+        send,
+        PROFILE_PARSE
+    );
 
     if (size) {
         PyObject** merged = calloc(
@@ -2145,6 +2906,7 @@ static int body_inc_buf(PyObject* awaitable, PyObject* result) {
 
 static int handle_route_query(PyObject* awaitable, char* query) {
     ViewApp* self;
+    PyObject* send;
     route* r;
     PyObject** path_params;
     Py_ssize_t* size;
@@ -2154,7 +2916,7 @@ static int handle_route_query(PyObject* awaitable, char* query) {
         &self,
         NULL,
         NULL,
-        NULL
+        &send
         ) < 0) {
         return -1;
     }
@@ -2269,6 +3031,11 @@ static int handle_route_query(PyObject* awaitable, char* query) {
     for (int i = 0; i < final_size; i++)
         merged[*size + i] = params[i];
 
+    PROFILE_MARK(
+        self,
+        send,
+        PROFILE_PARSE
+    );
     PyObject* coro = PyObject_VectorcallDict(
         r->callable,
         merged,
@@ -2389,26 +3156,613 @@ static int handle_route(PyObject* awaitable, char* query) {
         return -1;
     }
 
-    if (PyAwaitable_AddAwait(
-        aw,
-        receive_coro,
-        body_inc_buf,
-        NULL
-        ) < 0) {
-        Py_DECREF(aw);
-        free(buf);
-        return -1;
-    }
+    if (PyAwaitable_AddAwait(
+        aw,
+        receive_coro,
+        body_inc_buf,
+        NULL
+        ) < 0) {
+        Py_DECREF(aw);
+        free(buf);
+        return -1;
+    }
+
+    Py_DECREF(receive_coro);
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        aw
+        ) < 0) {
+        Py_DECREF(aw);
+        free(buf);
+        return -1;
+    }
+
+    return 0;
+}
+
+/*
+ * -- limits --
+ * global limits are checked before middleware, and route limits once the route has been found, but
+ * before anything (the body, or its inputs) is parsed. see access.c for how they work.
+ * */
+
+// returns 1 if the request was turned away
+static int admit(
+    limiter* l,
+    PyObject* awaitable,
+    PyObject* scope,
+    PyObject* send
+) {
+    int res = limiter_admit(
+        l,
+        scope,
+        send
+    );
+    if (res <= LIMIT_OK)
+        return res;
+
+    PyObject* messages = (res == LIMIT_RATE) ? l->too_many : l->busy;
+
+    // the messages are shared by every request, so middleware gets copies
+    if (send_error_response(
+        awaitable,
+        send,
+        PyTuple_GET_ITEM(
+            messages,
+            0
+        ),
+        PyTuple_GET_ITEM(
+            messages,
+            1
+        )
+        ) < 0)
+        return -1;
+
+    return 1;
+}
+
+/*
+ * -- cors --
+ * everything that doesn't depend on the request (the allowed methods of each path, the allowed
+ * headers, max age, and so on) is turned into response headers by App.cors() when the app is loaded.
+ * here, we only check the request's origin, and then either answer the preflight right away, or
+ * tell the AccessSend to add the headers to the response.
+ *
+ * this happens before any middleware, since preflights don't carry credentials.
+ * */
+
+// borrowed, or NULL (without an exception set) if the request doesn't have the header
+static PyObject* scope_header(PyObject* scope, const char* name) {
+    PyObject* headers = PyDict_GetItemString(
+        scope,
+        "headers"
+    );
+    if (!headers || !(PyList_Check(headers) || PyTuple_Check(headers)))
+        return NULL;
+
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(headers);
+    PyObject** items = PySequence_Fast_ITEMS(headers);
+
+    for (Py_ssize_t i = 0; i < size; i++) {
+        PyObject* item = items[i];
+        if (!(PyList_Check(item) || PyTuple_Check(item)) ||
+            (PySequence_Fast_GET_SIZE(item) != 2))
+            continue;
+
+        PyObject* key = PySequence_Fast_GET_ITEM(
+            item,
+            0
+        );
+        if (PyBytes_Check(key) && !strcmp(
+            PyBytes_AS_STRING(key),
+            name
+            ))
+            return PySequence_Fast_GET_ITEM(
+                item,
+                1
+            );
+    }
+
+    return NULL;
+}
+
+static int append_header(
+    PyObject* headers,
+    const char* name,
+    PyObject* value
+) {
+    PyObject* header = Py_BuildValue(
+        "(yO)",
+        name,
+        value
+    );
+    if (!header) return -1;
+
+    int res = PyList_Append(
+        headers,
+        header
+    );
+    Py_DECREF(header);
+    return res;
+}
+
+/*
+ * sets target to a new list of headers to add to the response (or NULL if there aren't any), and
+ * allowed to whether the origin is allowed. when the origin is echoed back, every response varies
+ * by origin (even ones without an allowed origin), so caches don't hand one origin's response to
+ * another.
+ * */
+static int cors_headers_for(
+    ViewApp* self,
+    PyObject* origin,
+    PyObject** target,
+    bool* allowed
+) {
+    *target = NULL;
+    *allowed = origin && PyBytes_Check(origin);
+
+    if (*allowed && self->cors.origins) {
+        int contains = PySet_Contains(
+            self->cors.origins,
+            origin
+        );
+        if (contains < 0) return -1;
+        *allowed = contains;
+    }
+
+    if (!*allowed && !self->cors.echo)
+        return 0;
+
+    PyObject* headers = *allowed ? PySequence_List(
+        self->cors.headers
+    ) : PyList_New(0);
+    if (!headers) return -1;
+
+    if (self->cors.echo) {
+        PyObject* vary = PyBytes_FromString("Origin");
+        if (!vary) {
+            Py_DECREF(headers);
+            return -1;
+        }
+
+        int res = (*allowed && (append_header(
+            headers,
+            "access-control-allow-origin",
+            origin
+            ) < 0)) || (append_header(
+            headers,
+            "vary",
+            vary
+            ) < 0);
+        Py_DECREF(vary);
+
+        if (res) {
+            Py_DECREF(headers);
+            return -1;
+        }
+    }
+
+    *target = headers;
+    return 0;
+}
+
+static int cors_preflight(
+    ViewApp* self,
+    PyObject* awaitable,
+    PyObject* scope,
+    PyObject* send,
+    PyObject* headers,
+    bool allowed,
+    PyObject* preflight
+) {
+    if (!allowed) {
+        if (!headers)
+            return send_raw_text(
+                awaitable,
+                send,
+                400,
+                "Disallowed CORS origin",
+                NULL
+            );
+
+        PyObject* content_type = PyBytes_FromString("text/plain");
+        if (!content_type) return -1;
+
+        int res = append_header(
+            headers,
+            "content-type",
+            content_type
+        );
+        Py_DECREF(content_type);
+
+        return (res < 0) ? -1 : send_raw_text(
+            awaitable,
+            send,
+            400,
+            "Disallowed CORS origin",
+            headers
+        );
+    }
+
+    if (PyList_SetSlice(
+        headers,
+        PY_SSIZE_T_MAX,
+        PY_SSIZE_T_MAX,
+        preflight
+        ) < 0)
+        return -1;
+
+    PyObject* requested = scope_header(
+        scope,
+        "access-control-request-headers"
+    );
+    if (self->cors.reflect && requested && (append_header(
+        headers,
+        "access-control-allow-headers",
+        requested
+        ) < 0))
+        return -1;
+
+    return send_raw_text(
+        awaitable,
+        send,
+        204,
+        "",
+        headers
+    );
+}
+
+// returns 1 if the request was a preflight that has been answered
+static int cors_handle(
+    ViewApp* self,
+    PyObject* awaitable,
+    PyObject* scope,
+    PyObject* send
+) {
+    PyObject* headers;
+    bool allowed;
+    if (cors_headers_for(
+        self,
+        scope_header(
+            scope,
+            "origin"
+        ),
+        &headers,
+        &allowed
+        ) < 0)
+        return -1;
+
+    PyObject* method = PyDict_GetItemString(
+        scope,
+        "method"
+    );
+    PyObject* path = PyDict_GetItemString(
+        scope,
+        "path"
+    );
+
+    if (method && path && PyUnicode_Check(method) &&
+        !PyUnicode_CompareWithASCIIString(
+            method,
+            "OPTIONS"
+        ) && scope_header(
+            scope,
+            "origin"
+        ) && scope_header(
+            scope,
+            "access-control-request-method"
+        )) {
+        PyObject* preflight = PyDict_GetItemWithError(
+            self->cors.preflights,
+            path
+        );
+
+        if (!preflight && !PyErr_Occurred()) {
+            // routes with path parameters share one preflight
+            preflight = PyDict_GetItemString(
+                self->cors.preflights,
+                ""
+            );
+        }
+
+        if (preflight) {
+            int res = cors_preflight(
+                self,
+                awaitable,
+                scope,
+                send,
+                headers,
+                allowed,
+                preflight
+            );
+            Py_XDECREF(headers);
+            return res < 0 ? -1 : 1;
+        }
+
+        if (PyErr_Occurred()) {
+            Py_XDECREF(headers);
+            return -1;
+        }
+    }
+
+    if (headers) {
+        access_send_headers(
+            send,
+            headers
+        );
+        Py_DECREF(headers);
+    }
+
+    return 0;
+}
+
+/*
+ * -- middleware --
+ * before hooks are called with the scope before the route is looked up. when a hook returns None,
+ * the next one is called, and anything else is sent as the response instead of calling the route.
+ * if a hook returns an awaitable, it's awaited in a small awaitable of its own, and once it's done
+ * before_hook_done() picks the request back up with the next hook (see app_impl()).
+ *
+ * after hooks are called by the AccessSend wrapper, see access.c.
+ * */
+
+static PyObject* app_impl(
+    ViewApp* self,
+    PyObject* scope,
+    PyObject* receive,
+    PyObject* send,
+    Py_ssize_t hook
+);
+
+static int hook_error(
+    ViewApp* self,
+    PyObject* awaitable,
+    PyObject* tp,
+    PyObject* value,
+    PyObject* tb
+) {
+    bool handler_was_called;
+
+    if (fire_error(
+        self,
+        awaitable,
+        500,
+        NULL,
+        &handler_was_called
+        ) < 0)
+        return -1;
+
+    if (!handler_was_called) {
+        PyErr_NormalizeException(
+            &tp,
+            &value,
+            &tb
+        );
+        PyErr_Display(
+            tp,
+            value,
+            tb
+        );
+    }
+
+    return 0;
+}
+
+static int hook_respond(
+    PyObject* awaitable,
+    PyObject* send,
+    PyObject* result
+) {
+    char* res_str;
+    int status;
+    PyObject* headers;
+
+    if (handle_result(
+        result,
+        &res_str,
+        &status,
+        &headers,
+        NULL
+        ) < 0)
+        return -1;
+
+    int res = send_raw_text(
+        awaitable,
+        send,
+        status,
+        res_str ? res_str : "",
+        headers
+    );
+    free(res_str);
+    Py_DECREF(headers);
+    return res;
+}
+
+static int before_hook_done(PyObject* hook_aw, PyObject* result) {
+    ViewApp* self;
+    PyObject* awaitable;
+    void* next;
+
+    if (PyAwaitable_UnpackValues(
+        hook_aw,
+        &self
+        ) < 0) return -1;
+
+    if (PyAwaitable_UnpackArbValues(
+        hook_aw,
+        &awaitable,
+        &next
+        ) < 0) return -1;
+
+    PyObject* scope;
+    PyObject* receive;
+    PyObject* send;
+
+    if (PyAwaitable_UnpackValues(
+        awaitable,
+        NULL,
+        &scope,
+        &receive,
+        &send
+        ) < 0) return -1;
+
+    if (result != Py_None)
+        return hook_respond(
+            awaitable,
+            send,
+            result
+        );
+
+    // send is already wrapped, so this only continues from the next hook
+    PyObject* rest = app_impl(
+        self,
+        scope,
+        receive,
+        send,
+        (Py_ssize_t) next
+    );
+    if (!rest) return -1;
+
+    if (PyAwaitable_AWAIT(
+        awaitable,
+        rest
+        ) < 0) {
+        Py_DECREF(rest);
+        return -1;
+    }
+
+    Py_DECREF(rest);
+    return 0;
+}
+
+static int before_hook_error(
+    PyObject* hook_aw,
+    PyObject* tp,
+    PyObject* value,
+    PyObject* tb
+) {
+    ViewApp* self;
+    PyObject* awaitable;
+
+    if (PyAwaitable_UnpackValues(
+        hook_aw,
+        &self
+        ) < 0) return -1;
+
+    if (PyAwaitable_UnpackArbValues(
+        hook_aw,
+        &awaitable,
+        NULL
+        ) < 0) return -1;
+
+    return hook_error(
+        self,
+        awaitable,
+        tp,
+        value,
+        tb
+    );
+}
+
+// returns 1 if a hook took over the request, 0 if the route should be dispatched
+static int run_before_hooks(
+    ViewApp* self,
+    PyObject* awaitable,
+    PyObject* scope,
+    PyObject* send,
+    Py_ssize_t start
+) {
+    Py_ssize_t size = PyTuple_GET_SIZE(self->before_hooks);
+
+    for (Py_ssize_t i = start; i < size; i++) {
+        PyObject* result = PyObject_Vectorcall(
+            PyTuple_GET_ITEM(
+                self->before_hooks,
+                i
+            ),
+            (PyObject*[]) { scope },
+            1,
+            NULL
+        );
+
+        if (!result) {
+            PyObject* tp;
+            PyObject* value;
+            PyObject* tb;
+            PyErr_Fetch(
+                &tp,
+                &value,
+                &tb
+            );
+            int res = hook_error(
+                self,
+                awaitable,
+                tp,
+                value,
+                tb
+            );
+            Py_XDECREF(tp);
+            Py_XDECREF(value);
+            Py_XDECREF(tb);
+            return res < 0 ? -1 : 1;
+        }
+
+        if (result == Py_None) {
+            Py_DECREF(result);
+            continue;
+        }
+
+        if (!Py_TYPE(result)->tp_as_async ||
+            !Py_TYPE(result)->tp_as_async->am_await) {
+            int res = hook_respond(
+                awaitable,
+                send,
+                result
+            );
+            Py_DECREF(result);
+            return res < 0 ? -1 : 1;
+        }
+
+        PyObject* hook_aw = PyAwaitable_New();
+        if (!hook_aw) {
+            Py_DECREF(result);
+            return -1;
+        }
+
+        // the request's awaitable is borrowed, it's what awaits hook_aw
+        if ((PyAwaitable_SaveValues(
+            hook_aw,
+            1,
+            self
+            ) < 0) || (PyAwaitable_SaveArbValues(
+            hook_aw,
+            2,
+            awaitable,
+            (void*) (i + 1)
+            ) < 0) || (PyAwaitable_AddAwait(
+            hook_aw,
+            result,
+            before_hook_done,
+            before_hook_error
+            ) < 0)) {
+            Py_DECREF(hook_aw);
+            Py_DECREF(result);
+            return -1;
+        }
+
+        Py_DECREF(result);
 
-    Py_DECREF(receive_coro);
+        if (PyAwaitable_AWAIT(
+            awaitable,
+            hook_aw
+            ) < 0) {
+            Py_DECREF(hook_aw);
+            return -1;
+        }
 
-    if (PyAwaitable_AWAIT(
-        awaitable,
-        aw
-        ) < 0) {
-        Py_DECREF(aw);
-        free(buf);
-        return -1;
+        Py_DECREF(hook_aw);
+        return 1;
     }
 
     return 0;
@@ -2420,10 +3774,22 @@ static PyObject* app(
     Py_ssize_t nargs
 ) {
     assert(nargs == 3);
-    PyObject* scope = args[0];
-    PyObject* receive = args[1];
-    PyObject* send = args[2];
+    return app_impl(
+        self,
+        args[0],
+        args[1],
+        args[2],
+        0
+    );
+}
 
+static PyObject* app_impl(
+    ViewApp* self,
+    PyObject* scope,
+    PyObject* receive,
+    PyObject* send,
+    Py_ssize_t hook
+) {
     PyObject* tp = PyDict_GetItemString(
         scope,
         "type"
@@ -2434,12 +3800,46 @@ static PyObject* app(
         return NULL;
     }
 
+    // tp is borrowed from the scope
     const char* type = PyUnicode_AsUTF8(tp);
-    Py_DECREF(tp);
+    if (!type)
+        return NULL;
+
+    PyObject* access_send = NULL;
+
+    // requests picked back up after an async before hook are already wrapped
+    if (!hook && (self->access || self->metrics.enabled || self->profiler ||
+                  self->tracer || self->after_hooks || self->cors.enabled ||
+                  self->limited) &&
+        !strcmp(
+        type,
+        "http"
+        )) {
+        access_send = access_send_new(
+            (PyObject*) self,
+            self->access,
+            &self->metrics,
+            send,
+            scope,
+            self->after_hooks
+        );
+        if (!access_send)
+            return NULL;
+        send = access_send;
+
+        if (self->profiler &&
+            ((++self->profile_count % self->profile_every) == 0))
+            access_send_profile(
+                access_send,
+                self->profiler
+            );
+    }
 
     PyObject* awaitable = PyAwaitable_New();
-    if (!awaitable)
+    if (!awaitable) {
+        Py_XDECREF(access_send);
         return NULL;
+    }
 
     if (PyAwaitable_SaveValues(
         awaitable,
@@ -2450,9 +3850,20 @@ static PyObject* app(
         send
         ) < 0) {
         Py_DECREF(awaitable);
+        Py_XDECREF(access_send);
         return NULL;
     }
 
+    // the awaitable holds a reference now, so access_send is borrowed from here on
+    Py_XDECREF(access_send);
+
+    // picked back up after an async before hook, so it was wrapped the first time around
+    if (hook && Py_IS_TYPE(
+        send,
+        &AccessSendType
+        ))
+        access_send = send;
+
     if (!strcmp(
         type,
         "lifespan"
@@ -2477,6 +3888,67 @@ static PyObject* app(
         return awaitable;
     }
 
+    if (self->cors.enabled && !hook && !strcmp(
+        type,
+        "http"
+        )) {
+        int res = cors_handle(
+            self,
+            awaitable,
+            scope,
+            send
+        );
+
+        if (res < 0) {
+            Py_DECREF(awaitable);
+            return NULL;
+        }
+
+        if (res == 1)
+            return awaitable;
+    }
+
+    if (self->limits && !hook && !strcmp(
+        type,
+        "http"
+        )) {
+        int res = admit(
+            self->limits,
+            awaitable,
+            scope,
+            send
+        );
+
+        if (res < 0) {
+            Py_DECREF(awaitable);
+            return NULL;
+        }
+
+        if (res == 1)
+            return awaitable;
+    }
+
+    if (self->before_hooks && !strcmp(
+        type,
+        "http"
+        )) {
+        int res = run_before_hooks(
+            self,
+            awaitable,
+            scope,
+            send,
+            hook
+        );
+
+        if (res < 0) {
+            Py_DECREF(awaitable);
+            return NULL;
+        }
+
+        if (res == 1)
+            return awaitable;
+    }
+
     const char* raw_path = dict_get_str(
         scope,
         "path"
@@ -2511,8 +3983,6 @@ static PyObject* app(
         return NULL;
     }
 
-    char* query = strdup(query_str);
-
     map* ptr = NULL;
     if (!strcmp(
         method,
@@ -2718,16 +4188,64 @@ static PyObject* app(
         }
     }
 
+    if (access_send) {
+        access_send_dispatch(
+            access_send,
+            r->metrics_index
+        );
+        PROFILE_MARK(
+            self,
+            access_send,
+            PROFILE_MATCH
+        );
+
+        if (self->tracer)
+            access_send_trace(
+                access_send,
+                self->tracer,
+                scope,
+                r->metrics_index
+            );
+    }
+
+    if (r->limits) {
+        int res = admit(
+            r->limits,
+            awaitable,
+            scope,
+            send
+        );
+
+        if (res != 0) {
+            if (size) {
+                for (int i = 0; i < *size; i++)
+                    Py_DECREF(params[i]);
+
+                free(params);
+                free(size);
+            }
+            free(path);
+
+            if (res < 0) {
+                Py_DECREF(awaitable);
+                return NULL;
+            }
+
+            return awaitable;
+        }
+    }
+
     if ((r->cache_index++ < r->cache_rate) && r->cache) {
-        PyObject* dct = Py_BuildValue(
-            "{s:s,s:i,s:O}",
+        PyObject* cache_headers = copy_headers(r->cache_headers);
+        PyObject* dct = cache_headers ? Py_BuildValue(
+            "{s:s,s:i,s:N}",
             "type",
             "http.response.start",
             "status",
             r->cache_status,
             "headers",
-            r->cache_headers
-        );
+            cache_headers
+        ) : NULL;
 
         if (!dct) {
             if (size) {
@@ -2859,6 +4377,13 @@ static PyObject* app(
         return NULL;
     }
 
+    // only copied once we know the route exists, so 404s don't allocate it
+    char* query = strdup(query_str);
+    if (!query) {
+        Py_DECREF(awaitable);
+        return PyErr_NoMemory();
+    }
+
     if (r->inputs_size != 0) {
         if (!r->has_body) {
             if (handle_route_query(
@@ -2884,6 +4409,12 @@ static PyObject* app(
         return awaitable;
     } else {
         PyObject* res_coro;
+        PROFILE_MARK(
+            self,
+            send,
+            PROFILE_PARSE
+        );
+
         if (size) {
             res_coro = PyObject_Vectorcall(
                 r->callable,
@@ -3526,6 +5057,232 @@ static PyObject* supply_parsers(ViewApp* self, PyObject* args) {
     Py_RETURN_NONE;
 }
 
+static PyObject* set_lifespan(ViewApp* self, PyObject* args) {
+    PyObject* startup;
+    PyObject* cleanup;
+
+    if (!PyArg_ParseTuple(
+        args,
+        "OO",
+        &startup,
+        &cleanup
+        ))
+        return NULL;
+
+    Py_XDECREF(self->startup);
+    Py_XDECREF(self->cleanup);
+    self->startup = Py_NewRef(startup);
+    self->cleanup = Py_NewRef(cleanup);
+    Py_RETURN_NONE;
+}
+
+static PyObject* enable_access_log(ViewApp* self, PyObject* args) {
+    Py_ssize_t capacity;
+
+    if (!PyArg_ParseTuple(
+        args,
+        "n",
+        &capacity
+        ))
+        return NULL;
+
+    if (capacity <= 0) {
+        PyErr_SetString(
+            PyExc_ValueError,
+            "access log capacity must be positive"
+        );
+        return NULL;
+    }
+
+    if (self->access) {
+        // requests in flight may point to the current buffer
+        PyErr_SetString(
+            PyExc_RuntimeError,
+            "access log is already enabled"
+        );
+        return NULL;
+    }
+
+    self->access = access_log_new(capacity);
+    if (!self->access)
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+static PyObject* drain_access_log(ViewApp* self, PyObject* args) {
+    if (!self->access) {
+        PyErr_SetString(
+            PyExc_RuntimeError,
+            "access log is not enabled"
+        );
+        return NULL;
+    }
+
+    return access_log_drain(self->access);
+}
+
+static PyObject* enable_metrics(ViewApp* self, PyObject* args) {
+    self->metrics.enabled = true;
+    Py_RETURN_NONE;
+}
+
+static PyObject* metrics(ViewApp* self, PyObject* args) {
+    return metrics_snapshot(&self->metrics);
+}
+
+static PyObject* share_metrics(ViewApp* self, PyObject* buffer) {
+    if (metrics_share(
+        &self->metrics,
+        buffer
+        ) < 0)
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+static PyObject* set_profiler(ViewApp* self, PyObject* args) {
+    PyObject* profiler;
+    Py_ssize_t every;
+
+    if (!PyArg_ParseTuple(
+        args,
+        "On",
+        &profiler,
+        &every
+        ))
+        return NULL;
+
+    if (every <= 0) {
+        PyErr_SetString(
+            PyExc_ValueError,
+            "profiling interval must be positive"
+        );
+        return NULL;
+    }
+
+    if (profiler != Py_None && !PyCallable_Check(profiler)) {
+        PyErr_SetString(
+            PyExc_TypeError,
+            "profiler must be callable or None"
+        );
+        return NULL;
+    }
+
+    Py_XSETREF(
+        self->profiler,
+        profiler == Py_None ? NULL : Py_NewRef(profiler)
+    );
+    self->profile_every = every;
+    self->profile_count = 0;
+    Py_RETURN_NONE;
+}
+
+static PyObject* set_tracer(ViewApp* self, PyObject* tracer) {
+    if (tracer != Py_None && !PyCallable_Check(tracer)) {
+        PyErr_SetString(
+            PyExc_TypeError,
+            "tracer must be callable or None"
+        );
+        return NULL;
+    }
+
+    Py_XSETREF(
+        self->tracer,
+        tracer == Py_None ? NULL : Py_NewRef(tracer)
+    );
+    Py_RETURN_NONE;
+}
+
+static PyObject* set_middleware(ViewApp* self, PyObject* args) {
+    PyObject* before;
+    PyObject* after;
+
+    if (!PyArg_ParseTuple(
+        args,
+        "O!O!",
+        &PyTuple_Type,
+        &before,
+        &PyTuple_Type,
+        &after
+        ))
+        return NULL;
+
+    // without any hooks, requests skip this entirely
+    Py_XSETREF(
+        self->before_hooks,
+        PyTuple_GET_SIZE(before) ? Py_NewRef(before) : NULL
+    );
+    Py_XSETREF(
+        self->after_hooks,
+        PyTuple_GET_SIZE(after) ? Py_NewRef(after) : NULL
+    );
+    Py_RETURN_NONE;
+}
+
+static PyObject* set_cors(ViewApp* self, PyObject* args) {
+    PyObject* origins;
+    int echo;
+    int reflect;
+    PyObject* headers;
+    PyObject* preflights;
+
+    if (!PyArg_ParseTuple(
+        args,
+        "OppO!O!",
+        &origins,
+        &echo,
+        &reflect,
+        &PyList_Type,
+        &headers,
+        &PyDict_Type,
+        &preflights
+        ))
+        return NULL;
+
+    if (origins != Py_None && !PyFrozenSet_Check(origins)) {
+        PyErr_SetString(
+            PyExc_TypeError,
+            "origins must be a frozenset or None"
+        );
+        return NULL;
+    }
+
+    self->cors.enabled = true;
+    self->cors.echo = echo;
+    self->cors.reflect = reflect;
+    Py_XSETREF(
+        self->cors.origins,
+        origins == Py_None ? NULL : Py_NewRef(origins)
+    );
+    Py_XSETREF(
+        self->cors.headers,
+        Py_NewRef(headers)
+    );
+    Py_XSETREF(
+        self->cors.preflights,
+        Py_NewRef(preflights)
+    );
+    Py_RETURN_NONE;
+}
+
+static PyObject* set_limits(ViewApp* self, PyObject* limits) {
+    if (self->limits) {
+        // requests in flight point to the current limiter
+        PyErr_SetString(
+            PyExc_RuntimeError,
+            "limits have already been set"
+        );
+        return NULL;
+    }
+
+    self->limits = limiter_new(limits);
+    if (!self->limits) return NULL;
+
+    self->limited = true;
+    Py_RETURN_NONE;
+}
+
 static PyMethodDef methods[] = {
     {"asgi_app_entry", (PyCFunction) app, METH_FASTCALL, NULL},
     {"_get", (PyCFunction) get, METH_VARARGS, NULL},
@@ -3538,6 +5295,18 @@ static PyMethodDef methods[] = {
     {"_err", (PyCFunction) err_handler, METH_VARARGS, NULL},
     {"_supply_parsers", (PyCFunction) supply_parsers, METH_VARARGS,
      NULL},
+    {"_set_lifespan", (PyCFunction) set_lifespan, METH_VARARGS, NULL},
+    {"_enable_access_log", (PyCFunction) enable_access_log, METH_VARARGS,
+     NULL},
+    {"_drain_access_log", (PyCFunction) drain_access_log, METH_NOARGS, NULL},
+    {"_enable_metrics", (PyCFunction) enable_metrics, METH_NOARGS, NULL},
+    {"_metrics", (PyCFunction) metrics, METH_NOARGS, NULL},
+    {"_share_metrics", (PyCFunction) share_metrics, METH_O, NULL},
+    {"_set_profiler", (PyCFunction) set_profiler, METH_VARARGS, NULL},
+    {"_set_tracer", (PyCFunction) set_tracer, METH_O, NULL},
+    {"_set_middleware", (PyCFunction) set_middleware, METH_VARARGS, NULL},
+    {"_set_cors", (PyCFunction) set_cors, METH_VARARGS, NULL},
+    {"_set_limits", (PyCFunction) set_limits, METH_O, NULL},
     {NULL, NULL, 0, NULL}
 };
 
@@ -235,8 +235,14 @@ gen_next(PyObject *self)
         PyObject *occurred = PyErr_Occurred();
         if (!occurred) {
             // coro is done
-            g->gw_current_await = NULL;
-            return gen_next(self);
+            if (cb->callback == NULL) {
+                g->gw_current_await = NULL;
+                return gen_next(self);
+            }
+
+            // it returned None, which the callback should still see
+            PyErr_SetNone(PyExc_StopIteration);
+            occurred = PyErr_Occurred();
         }
 
         if (!PyErr_GivenExceptionMatches(occurred, PyExc_StopIteration)) {
@@ -0,0 +1,443 @@
+#include <Python.h>
+#include <view/http.h>
+#include <stdbool.h>
+#include <string.h>
+
+/*
+ * -- http parsing --
+ * parse_http takes the current connection buffer and attempts to read a single
+ * request head (request line + headers) from it.
+ *
+ * if the head isn't complete yet, None is returned so the protocol can wait for more data.
+ * otherwise, it returns a tuple of:
+ *   (head_size, method, path, query_string, headers, content_length, keep_alive)
+ *
+ * the body isn't touched here, the protocol is responsible for waiting on content_length bytes
+ * after head_size.
+ * */
+
+#define MAX_HEADERS 100
+
+static const char* find_crlf(const char* str, const char* end) {
+    for (const char* c = str; c + 1 < end; c++) {
+        if (c[0] == '\r' && c[1] == '\n') return c;
+    }
+
+    return NULL;
+}
+
+static int bad_request(const char* msg) {
+    PyErr_SetString(
+        PyExc_ValueError,
+        msg
+    );
+    return -1;
+}
+
+// tchar from RFC 9110, which is what a field name is made of
+static inline bool is_token_char(unsigned char c) {
+    if ((c >= '0' && c <= '9') || (c >= 'a' && c <= 'z') ||
+        (c >= 'A' && c <= 'Z'))
+        return true;
+
+    return c && strchr(
+        "!#$%&'*+-.^_`|~",
+        c
+    ) != NULL;
+}
+
+static inline int hex_value(char c) {
+    if (c >= '0' && c <= '9') return c - '0';
+    if (c >= 'a' && c <= 'f') return c - 'a' + 10;
+    if (c >= 'A' && c <= 'F') return c - 'A' + 10;
+    return -1;
+}
+
+static PyObject* decode_path(const char* raw, Py_ssize_t len) {
+    if (!memchr(
+        raw,
+        '%',
+        len
+        ))
+        return PyUnicode_DecodeUTF8(
+            raw,
+            len,
+            "surrogateescape"
+        );
+
+    char* buf = PyMem_Malloc(len);
+    if (!buf) return PyErr_NoMemory();
+    Py_ssize_t size = 0;
+
+    for (Py_ssize_t i = 0; i < len; i++) {
+        int hi;
+        int lo;
+        if ((raw[i] == '%') && (i + 2 < len) &&
+            ((hi = hex_value(raw[i + 1])) >= 0) &&
+            ((lo = hex_value(raw[i + 2])) >= 0)) {
+            buf[size++] = (char) ((hi << 4) | lo);
+            i += 2;
+        } else buf[size++] = raw[i];
+    }
+
+    PyObject* result = PyUnicode_DecodeUTF8(
+        buf,
+        size,
+        "surrogateescape"
+    );
+    PyMem_Free(buf);
+    return result;
+}
+
+static bool ci_equals(
+    const char* a,
+    Py_ssize_t a_len,
+    const char* b
+) {
+    Py_ssize_t b_len = strlen(b);
+    if (a_len != b_len) return false;
+
+    for (Py_ssize_t i = 0; i < a_len; i++) {
+        char c = a[i];
+        if (c >= 'A' && c <= 'Z') c += 32;
+        if (c != b[i]) return false;
+    }
+
+    return true;
+}
+
+static bool ci_contains(
+    const char* haystack,
+    Py_ssize_t len,
+    const char* needle
+) {
+    Py_ssize_t needle_len = strlen(needle);
+    for (Py_ssize_t i = 0; i + needle_len <= len; i++) {
+        if (ci_equals(
+            haystack + i,
+            needle_len,
+            needle
+            ))
+            return true;
+    }
+
+    return false;
+}
+
+static PyObject* lower_bytes(const char* str, Py_ssize_t len) {
+    PyObject* bytes = PyBytes_FromStringAndSize(
+        NULL,
+        len
+    );
+    if (!bytes) return NULL;
+    char* buf = PyBytes_AS_STRING(bytes);
+
+    for (Py_ssize_t i = 0; i < len; i++) {
+        char c = str[i];
+        buf[i] = (c >= 'A' && c <= 'Z') ? c + 32 : c;
+    }
+
+    return bytes;
+}
+
+static int parse_request_line(
+    const char* data,
+    Py_ssize_t len,
+    PyObject** method,
+    PyObject** path,
+    PyObject** query,
+    bool* http10
+) {
+    const char* end = data + len;
+    const char* sp = memchr(
+        data,
+        ' ',
+        len
+    );
+    if (!sp || sp == data) return bad_request("malformed request line");
+
+    const char* target = sp + 1;
+    const char* sp2 = memchr(
+        target,
+        ' ',
+        end - target
+    );
+    if (!sp2 || sp2 == target)
+        return bad_request("malformed request line");
+
+    const char* version = sp2 + 1;
+    Py_ssize_t version_len = end - version;
+
+    if ((version_len != 8) || strncmp(
+        version,
+        "HTTP/1.",
+        7
+        ))
+        return bad_request("unsupported http version");
+
+    if (version[7] == '0') *http10 = true;
+    else if (version[7] == '1') *http10 = false;
+    else return bad_request("unsupported http version");
+
+    const char* qs = memchr(
+        target,
+        '?',
+        sp2 - target
+    );
+    const char* path_end = qs ? qs : sp2;
+
+    *method = PyUnicode_FromStringAndSize(
+        data,
+        sp - data
+    );
+    if (!*method) return -1;
+
+    *path = decode_path(
+        target,
+        path_end - target
+    );
+    if (!*path) {
+        Py_DECREF(*method);
+        return -1;
+    }
+
+    *query = qs ? PyBytes_FromStringAndSize(
+        qs + 1,
+        sp2 - qs - 1
+    ) : PyBytes_FromStringAndSize(
+        "",
+        0
+    );
+    if (!*query) {
+        Py_DECREF(*method);
+        Py_DECREF(*path);
+        return -1;
+    }
+
+    return 0;
+}
+
+PyObject* parse_http(PyObject* self, PyObject* data) {
+    Py_buffer view;
+    if (PyObject_GetBuffer(
+        data,
+        &view,
+        PyBUF_SIMPLE
+        ) < 0)
+        return NULL;
+
+    const char* buf = view.buf;
+    Py_ssize_t len = view.len;
+
+    // skip stray newlines between pipelined requests (rfc 9112 2.2)
+    Py_ssize_t start = 0;
+    while (start < len && (buf[start] == '\r' || buf[start] == '\n'))
+        ++start;
+
+    const char* head = buf + start;
+    Py_ssize_t head_len = len - start;
+    const char* head_end = NULL;
+
+    for (Py_ssize_t i = 0; i + 3 < head_len; i++) {
+        if (head[i] == '\r' && head[i + 1] == '\n' &&
+            head[i + 2] == '\r' && head[i + 3] == '\n') {
+            head_end = head + i;
+            break;
+        }
+    }
+
+    if (!head_end) {
+        PyBuffer_Release(&view);
+        Py_RETURN_NONE;
+    }
+
+    // head_end points at a crlf, so this can't be NULL
+    const char* line_end = find_crlf(
+        head,
+        head_end + 2
+    );
+    PyObject* method;
+    PyObject* path;
+    PyObject* query;
+    bool http10;
+
+    if (parse_request_line(
+        head,
+        line_end - head,
+        &method,
+        &path,
+        &query,
+        &http10
+        ) < 0) {
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+
+    PyObject* headers = PyList_New(0);
+    if (!headers) {
+        Py_DECREF(method);
+        Py_DECREF(path);
+        Py_DECREF(query);
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+
+    Py_ssize_t content_length = 0;
+    bool has_length = false;
+    bool keep_alive = !http10;
+    const char* line = line_end + 2;
+    int count = 0;
+
+    while (line < head_end) {
+        const char* next = find_crlf(
+            line,
+            head_end + 2
+        );
+        const char* colon = memchr(
+            line,
+            ':',
+            next - line
+        );
+
+        if (!colon || colon == line || (++count > MAX_HEADERS)) {
+            bad_request(count > MAX_HEADERS ? "too many headers" : "malformed header");
+            goto error;
+        }
+
+        const char* value = colon + 1;
+        const char* value_end = next;
+        while (value < value_end && (*value == ' ' || *value == '\t'))
+            ++value;
+        while (value_end > value &&
+               (value_end[-1] == ' ' || value_end[-1] == '\t'))
+            --value_end;
+
+        Py_ssize_t name_len = colon - line;
+        Py_ssize_t value_len = value_end - value;
+
+        // whitespace before the colon ("Transfer-Encoding : chunked") lets a
+        // proxy and this server disagree on the header, so it's rejected
+        for (Py_ssize_t i = 0; i < name_len; i++) {
+            if (!is_token_char((unsigned char) line[i])) {
+                bad_request("malformed header");
+                goto error;
+            }
+        }
+
+        for (Py_ssize_t i = 0; i < value_len; i++) {
+            if (value[i] == '\r' || value[i] == '\n' || value[i] == '\0') {
+                bad_request("malformed header");
+                goto error;
+            }
+        }
+
+        if (ci_equals(
+            line,
+            name_len,
+            "content-length"
+            )) {
+            // a second content-length (even an equal one) is a smuggling
+            // vector, so it's rejected instead of picking one
+            if (has_length) {
+                bad_request("duplicate content-length");
+                goto error;
+            }
+            has_length = true;
+            content_length = 0;
+            if (!value_len) {
+                bad_request("invalid content-length");
+                goto error;
+            }
+            for (Py_ssize_t i = 0; i < value_len; i++) {
+                if (value[i] < '0' || value[i] > '9' ||
+                    content_length > (PY_SSIZE_T_MAX / 10)) {
+                    bad_request("invalid content-length");
+                    goto error;
+                }
+                content_length = (content_length * 10) + (value[i] - '0');
+            }
+        } else if (ci_equals(
+            line,
+            name_len,
+            "transfer-encoding"
+                   )) {
+            PyErr_SetString(
+                PyExc_NotImplementedError,
+                "transfer-encoding is not supported"
+            );
+            goto error;
+        } else if (ci_equals(
+            line,
+            name_len,
+            "connection"
+                   )) {
+            if (ci_contains(
+                value,
+                value_len,
+                "close"
+                ))
+                keep_alive = false;
+            else if (ci_contains(
+                value,
+                value_len,
+                "keep-alive"
+                     ))
+                keep_alive = true;
+        }
+
+        PyObject* name_ob = lower_bytes(
+            line,
+            name_len
+        );
+        if (!name_ob) goto error;
+        PyObject* value_ob = PyBytes_FromStringAndSize(
+            value,
+            value_len
+        );
+        if (!value_ob) {
+            Py_DECREF(name_ob);
+            goto error;
+        }
+
+        PyObject* pair = PyTuple_Pack(
+            2,
+            name_ob,
+            value_ob
+        );
+        Py_DECREF(name_ob);
+        Py_DECREF(value_ob);
+        if (!pair) goto error;
+
+        if (PyList_Append(
+            headers,
+            pair
+            ) < 0) {
+            Py_DECREF(pair);
+            goto error;
+        }
+
+        Py_DECREF(pair);
+        line = next + 2;
+    }
+
+    Py_ssize_t head_size = (head_end + 4) - buf;
+    PyBuffer_Release(&view);
+
+    return Py_BuildValue(
+        "(nNNNNnO)",
+        head_size,
+        method,
+        path,
+        query,
+        headers,
+        content_length,
+        keep_alive ? Py_True : Py_False
+    );
+error:
+    Py_DECREF(method);
+    Py_DECREF(path);
+    Py_DECREF(query);
+    Py_DECREF(headers);
+    PyBuffer_Release(&view);
+    return NULL;
+}
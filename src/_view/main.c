@@ -14,7 +14,10 @@
 
 
 
-static PyMethodDef methods[] = {{NULL, NULL, 0, NULL}};
+static PyMethodDef methods[] = {
+    {"parse_http", parse_http, METH_O, NULL},
+    {NULL, NULL, 0, NULL}
+};
 
 static struct PyModuleDef module = {PyModuleDef_HEAD_INIT, "_view", NULL, -1,
                                     methods};
@@ -48,7 +51,8 @@ PyMODINIT_FUNC PyInit__view() {
 
     if ((PyType_Ready(&PyAwaitable_Type) < 0) ||
         (PyType_Ready(&ViewAppType) < 0) ||
-        (PyType_Ready(&_PyAwaitable_GenWrapper_Type) < 0)) {
+        (PyType_Ready(&_PyAwaitable_GenWrapper_Type) < 0) ||
+        (PyType_Ready(&AccessSendType) < 0)) {
         Py_DECREF(m);
         return NULL;
     }
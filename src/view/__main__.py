@@ -160,12 +160,15 @@ def clear(path: Path):
     os.remove(service)
 
 
-def _run(*, force_prod: bool = False) -> None:
+def _run(*, force_prod: bool = False, workers: int | None = None) -> None:
     from .config import load_config
     from .util import run as run_path
 
     os.environ["_VIEW_RUN"] = "1"
 
+    if workers:
+        os.environ["view_server_workers"] = str(workers)
+
     conf = load_config()
     if force_prod:
         conf.dev = True
@@ -177,13 +180,132 @@ def _run(*, force_prod: bool = False) -> None:
 
 
 @main.command()
-def serve():
-    _run()
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of worker processes.",
+    type=click.IntRange(min=1),
+    default=None,
+)
+def serve(workers: int | None):
+    _run(workers=workers)
 
 
 @main.command()
-def prod():
-    _run(force_prod=True)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of worker processes.",
+    type=click.IntRange(min=1),
+    default=None,
+)
+def prod(workers: int | None):
+    _run(force_prod=True, workers=workers)
+
+
+@main.command()
+@click.option(
+    "--duration",
+    "-t",
+    help="How long to profile for, in seconds.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=30.0,
+)
+@click.option(
+    "--every",
+    "-e",
+    help="Profile one in every N requests.",
+    type=click.IntRange(min=1),
+    default=1,
+)
+def profile(duration: float, every: int):
+    os.environ["_VIEW_PROFILE"] = f"{duration}:{every}"
+    # the profile is collected per process, and fancy mode would hide it
+    os.environ["view_log_fancy"] = "false"
+
+    try:
+        _run(workers=1)
+    except KeyboardInterrupt:
+        # the server is stopped with SIGINT once the duration is up
+        ...
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "-s",
+    "path",
+    help="Dashboard socket of the running app.",
+    type=click.Path(path_type=Path),
+    default=None,
+)
+def top(path: Path | None):
+    from ._dashboard import run_top
+    from .config import load_config
+
+    if not path:
+        socket = load_config().log.top_socket
+
+        if not socket:
+            error("no socket to attach to, pass --socket or set `top_socket`")
+
+        path = Path(socket)
+
+    try:
+        run_top(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        error(f"nothing is listening on `{path}`, is the app running?")
+    except KeyboardInterrupt:
+        ...
+
+
+@main.command("compile")
+@click.argument(
+    "path",
+    type=click.Path(
+        exists=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default="./",
+)
+@click.option(
+    "--bytecode/--no-bytecode",
+    help="Whether to write bytecode for the compiled files.",
+    default=True,
+)
+def compile_(path: Path, bytecode: bool):
+    import py_compile
+
+    from ._codec import cache_directory, is_view_source, transform
+
+    files = [path] if path.is_file() else sorted(path.rglob("*.py"))
+    count = 0
+
+    for file in files:
+        source = file.read_bytes()
+        if not is_view_source(source):
+            continue
+
+        try:
+            transform(source.decode("utf-8"))
+            if bytecode:
+                py_compile.compile(str(file), doraise=True)
+        except (SyntaxError, py_compile.PyCompileError) as e:
+            error(f"failed to compile `{file}`: {e}")
+
+        info(f"Compiled `{file}`")
+        count += 1
+
+    if not count:
+        warn(f"No files using the view encoding were found in `{path}`")
+        return
+
+    cache = cache_directory()
+    success(
+        f"Compiled {count} file(s)"
+        + (f", cached in `{cache}`" if cache else "")
+    )
 
 
 @main.command()
@@ -7,17 +7,25 @@ if TYPE_CHECKING:
 
 import codecs
 import encodings
+import hashlib
+import os
 import re
 from dataclasses import dataclass
 from encodings.utf_8 import StreamReader as UTF8StreamReader
 from html.parser import HTMLParser
 from io import StringIO
+from pathlib import Path
+
+from .__about__ import __version__
 
 Input = Union[bytes, bytearray, memoryview]
 
 UTF8 = encodings.search_function("utf-8")
 assert UTF8
 TAG = re.compile(r"< *([A-z]+) *(.*) *>(.*)< *\/([A-z]+) *>")
+CODING = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*view\b", re.MULTILINE)
+# bump this whenever the output of _transform changes
+_CACHE_VERSION = 1
 
 
 @dataclass()
@@ -107,18 +115,73 @@ def _transform(code: str) -> str:
     return "from view.nodes import new_node as _vpy_newnode\n" + source.getvalue()
 
 
+def cache_directory() -> Path | None:
+    """Directory that transformed sources are cached in, or `None` if caching is disabled."""
+    target = os.environ.get("view_codec_cache")
+
+    if target is not None:
+        return Path(target) if target else None
+
+    base = os.environ.get("XDG_CACHE_HOME") or (Path.home() / ".cache")
+    return Path(base) / "view" / "codec"
+
+
+def _cache_path(directory: Path, code: str) -> Path:
+    digest = hashlib.sha256(
+        f"{__version__}:{_CACHE_VERSION}\n{code}".encode(
+            errors="surrogateescape",
+        ),
+    ).hexdigest()
+    return directory / f"{digest}.py"
+
+
+def transform(code: str) -> str:
+    """Transform `view` source into Python, using the on-disk cache when possible."""
+    directory = cache_directory()
+
+    if not directory:
+        return _transform(code)
+
+    path = _cache_path(directory, code)
+
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        ...
+
+    result = _transform(code)
+
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        # write then rename, so other processes never see a partial file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(result, encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        # a read-only cache shouldn't stop the import
+        ...
+
+    return result
+
+
+def is_view_source(source: bytes) -> bool:
+    """Whether the source declares the `view` encoding in its first two lines."""
+    head = b"\n".join(source.split(b"\n", 2)[:2])
+    return CODING.search(head) is not None
+
+
 def decode(source: Input) -> str:
-    return _transform(bytes(source).decode())
+    return transform(bytes(source).decode())
 
 
 def view_decode(input: bytes, errors: str = "strict") -> tuple[str, int]:
     code, length = UTF8.decode(input, errors)
 
-    return _transform(code), length
+    return transform(code), length
 
 
 def transform_stream(stream: Any) -> StringIO:
-    return StringIO(_transform(stream.read()))
+    return StringIO(transform(stream.read()))
 
 
 class IncrementalDecoder(codecs.BufferedIncrementalDecoder):
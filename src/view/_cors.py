@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
+
+from .exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    from .config import CorsConfig
+    from .routing import Route
+
+__all__ = ("build_cors", "check_cors")
+
+Headers = List[Tuple[bytes, bytes]]
+CorsArgs = Tuple[
+    Optional[FrozenSet[bytes]],
+    bool,
+    bool,
+    Headers,
+    Dict[str, Headers],
+]
+
+# preflights for paths that aren't known until a request comes in (routes
+# with path parameters) use this key, since a real path always starts with /
+_FALLBACK = ""
+
+
+def _preflight(
+    config: CorsConfig,
+    methods: set[str],
+    reflect: bool,
+) -> Headers:
+    headers: Headers = [
+        (
+            b"access-control-allow-methods",
+            ", ".join(sorted(methods)).encode(),
+        ),
+        (b"access-control-max-age", str(config.max_age).encode()),
+    ]
+
+    if not reflect:
+        headers.append(
+            (
+                b"access-control-allow-headers",
+                ", ".join(config.headers).encode(),
+            )
+        )
+
+    return headers
+
+
+def check_cors(origins: list[str], credentials: bool) -> None:
+    """Make sure the CORS settings can be sent to a browser."""
+    if credentials and ("*" in origins):
+        # echoing every origin with credentials would let any site make
+        # authenticated requests
+        raise ConfigurationError(
+            "cors credentials can't be used with any origin (*),"
+            " list the allowed origins instead",
+        )
+
+
+def build_cors(config: CorsConfig, routes: list[Route]) -> CorsArgs:
+    """Turn the CORS settings into the arguments of `ViewApp._set_cors`.
+
+    Everything that doesn't depend on the request is computed here, so _view
+    only has to check the origin of each request."""
+    check_cors(config.origins, config.credentials)
+    any_origin = "*" in config.origins
+    echo = not any_origin
+    reflect = config.credentials and ("*" in config.headers)
+
+    headers: Headers = []
+
+    if not echo:
+        headers.append((b"access-control-allow-origin", b"*"))
+
+    if config.credentials:
+        headers.append((b"access-control-allow-credentials", b"true"))
+
+    if config.expose_headers:
+        headers.append(
+            (
+                b"access-control-expose-headers",
+                ", ".join(config.expose_headers).encode(),
+            )
+        )
+
+    methods: dict[str, set[str]] = {}
+
+    for route in routes:
+        key = (route.path.rstrip("/") or "/") if route.path else _FALLBACK
+        methods.setdefault(key, set()).add(route.method.name)
+
+    preflights: dict[str, Headers] = {}
+
+    for path, allowed in methods.items():
+        preflight = _preflight(config, allowed, reflect)
+        preflights[path] = preflight
+
+        if path not in {"/", _FALLBACK}:
+            # _view ignores trailing slashes when finding routes
+            preflights[path + "/"] = preflight
+
+    return (
+        None if any_origin else frozenset(i.encode() for i in config.origins),
+        echo,
+        reflect,
+        headers,
+        preflights,
+    )
@@ -0,0 +1,532 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import selectors
+import socket
+import stat
+import time
+from pathlib import Path
+from threading import Event, Thread
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator
+
+from rich import box
+from rich.align import Align
+from rich.console import Console
+from rich.layout import Layout
+from rich.live import Live
+from rich.panel import Panel
+from rich.progress import BarColumn, TaskProgressColumn, TextColumn
+from rich.table import Table
+from rich.text import Text
+
+from ._logging import (
+    _METHOD_COLORS,
+    HeatedProgress,
+    Internal,
+    Plot,
+    _needs_fancy,
+    convert_kb,
+)
+from ._metrics import BUCKETS
+from .exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    from _view import ViewApp
+
+__all__ = ("Sampler", "TopServer", "Widgets", "Dynamic", "attach", "run_top")
+
+Snapshot = Dict[str, Any]
+
+
+def _psutil():
+    try:
+        import psutil
+    except ModuleNotFoundError:
+        return None
+
+    return psutil
+
+
+def _p99(buckets: list[int], count: int) -> float:
+    target = count * 0.99
+    total = 0
+
+    for bound, amount in zip(BUCKETS, buckets):
+        total += amount
+        if total >= target:
+            return bound
+
+    return BUCKETS[-1]
+
+
+class Sampler:
+    """Collects everything the dashboard shows, from a single thread.
+
+    Every `interval` seconds, this reads the system counters (if `psutil` is
+    installed) and the app's route metrics, and passes the differences since
+    the last sample to each subscriber and connected `view top` client."""
+
+    def __init__(
+        self,
+        app: ViewApp | None,
+        *,
+        interval: float = 1.0,
+        server: TopServer | None = None,
+    ) -> None:
+        self.app = app
+        self.interval = interval
+        self.server = server
+        self.subscribers: list[Callable[[Snapshot], None]] = []
+        self._psutil = _psutil()
+        self._process = self._psutil.Process() if self._psutil else None
+        self._last_time = time.monotonic()
+        self._last_net = self._net_counters()
+        self._last_io = self._io_counters()
+        self._last_routes: dict[tuple[str, str], tuple] = {}
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+        # the first call of both of these is only used as a baseline
+        if self._psutil:
+            self._psutil.cpu_percent()
+
+        if app:
+            self._routes(1.0)
+
+    def _net_counters(self):
+        return self._psutil.net_io_counters() if self._psutil else None
+
+    def _io_counters(self):
+        if not self._process:
+            return None
+
+        try:
+            return self._process.io_counters()
+        except (AttributeError, NotImplementedError, OSError):
+            # not available on every platform
+            return None
+
+    def _routes(self, elapsed: float) -> list[dict[str, Any]]:
+        assert self.app
+        routes: list[dict[str, Any]] = []
+
+        for item in self.app._metrics():
+            method, path, in_flight, count, statuses, buckets, total = item
+            last = self._last_routes.get((method, path))
+            self._last_routes[(method, path)] = item
+
+            if last:
+                count_delta = count - last[3]
+                buckets = [a - b for a, b in zip(buckets, last[5])]
+                total_delta = total - last[6]
+                errors = statuses[4] - last[4][4]
+            else:
+                count_delta = count
+                buckets = list(buckets)
+                total_delta = total
+                errors = statuses[4]
+
+            routes.append(
+                {
+                    "method": method,
+                    "path": path,
+                    "in_flight": in_flight,
+                    "rps": count_delta / elapsed,
+                    "mean_ms": (total_delta / count_delta * 1000)
+                    if count_delta
+                    else 0.0,
+                    "p99_ms": _p99(buckets, count_delta) * 1000
+                    if count_delta
+                    else 0.0,
+                    "errors": errors,
+                    "total": count,
+                }
+            )
+
+        return routes
+
+    def sample(self) -> Snapshot:
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-9)
+        self._last_time = now
+        snapshot: Snapshot = {
+            "pid": os.getpid(),
+            "interval": elapsed,
+            "system": None,
+            "network": None,
+            "io": None,
+            "routes": self._routes(elapsed) if self.app else [],
+        }
+
+        if not self._psutil:
+            return snapshot
+
+        psutil = self._psutil
+        snapshot["system"] = {
+            "cpu": psutil.cpu_percent(),
+            "memory": psutil.virtual_memory().percent,
+            "swap": psutil.swap_memory().percent,
+            "disk": psutil.disk_usage("/").percent,
+        }
+
+        net = self._net_counters()
+        snapshot["network"] = {
+            "sent": convert_kb(net.bytes_sent - self._last_net.bytes_sent)
+            / elapsed,
+            "received": convert_kb(net.bytes_recv - self._last_net.bytes_recv)
+            / elapsed,
+        }
+        self._last_net = net
+
+        io = self._io_counters()
+        if io and self._last_io:
+            snapshot["io"] = {
+                "read": (io.read_count - self._last_io.read_count) / elapsed,
+                "write": (io.write_count - self._last_io.write_count)
+                / elapsed,
+            }
+        self._last_io = io
+        return snapshot
+
+    def _run(self) -> None:
+        # psutil raises its own errors (such as AccessDenied) for some calls
+        errors: tuple[type[Exception], ...] = (OSError, ValueError)
+        if self._psutil:
+            errors += (self._psutil.Error,)
+
+        while not self._stop.wait(self.interval):
+            try:
+                snapshot = self.sample()
+
+                for subscriber in self.subscribers:
+                    subscriber(snapshot)
+
+                if self.server:
+                    self.server.broadcast(snapshot)
+            except errors as e:
+                Internal.warning(f"dashboard sampler failed: {e!r}")
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        if self.server:
+            self.server.close()
+
+
+class TopServer:
+    """Sends samples to `view top` clients over a Unix socket.
+
+    Nothing here blocks or starts a thread: new connections are accepted and
+    samples are written by the sampler thread, and clients that can't keep up
+    are disconnected."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+        if self.path.exists():
+            if not stat.S_ISSOCK(self.path.stat().st_mode):
+                raise ConfigurationError(
+                    f"{self.path} already exists and isn't a socket",
+                )
+
+            # left over from a server that didn't shut down cleanly
+            self.path.unlink()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(str(self.path))
+        os.chmod(self.path, 0o600)
+        self.sock.listen(8)
+        self.sock.setblocking(False)
+        self.clients: list[socket.socket] = []
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+
+            client.setblocking(False)
+            self.clients.append(client)
+
+    def broadcast(self, snapshot: Snapshot) -> None:
+        self._accept()
+        if not self.clients:
+            return
+
+        data = json.dumps(snapshot).encode() + b"\n"
+
+        for client in self.clients.copy():
+            try:
+                client.sendall(data)
+            except OSError:
+                client.close()
+                self.clients.remove(client)
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.close()
+
+        self.clients.clear()
+        self.sock.close()
+
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            ...
+
+
+def _worker_sockets(path: Path) -> list[Path]:
+    # every worker serves its own `{path}.{pid}`, see App._spawn()
+    return sorted(
+        i
+        for i in path.parent.glob(f"{glob.escape(path.name)}.*")
+        if i.suffix[1:].isdigit() and i.is_socket()
+    )
+
+
+def _merge_snapshots(snapshots: list[Snapshot]) -> Snapshot:
+    routes: dict[tuple[str, str], dict[str, Any]] = {}
+
+    for snapshot in snapshots:
+        for route in snapshot["routes"]:
+            key = (route["method"], route["path"])
+            existing = routes.get(key)
+
+            if not existing:
+                routes[key] = dict(route)
+                continue
+
+            rps = existing["rps"] + route["rps"]
+            if rps:
+                existing["mean_ms"] = (
+                    (existing["mean_ms"] * existing["rps"])
+                    + (route["mean_ms"] * route["rps"])
+                ) / rps
+
+            existing["rps"] = rps
+            existing["p99_ms"] = max(existing["p99_ms"], route["p99_ms"])
+
+            for field in ("in_flight", "errors", "total"):
+                existing[field] += route[field]
+
+    io = [i["io"] for i in snapshots if i["io"]]
+
+    # the system and network counters are for the whole machine, so they're
+    # the same for every worker
+    return {
+        **snapshots[-1],
+        "workers": len(snapshots),
+        "io": {
+            "read": sum(i["read"] for i in io),
+            "write": sum(i["write"] for i in io),
+        }
+        if io
+        else None,
+        "routes": list(routes.values()),
+    }
+
+
+def _attach_workers(path: Path) -> Iterator[Snapshot]:
+    selector = selectors.DefaultSelector()
+    buffers: dict[Path, bytearray] = {}
+    latest: dict[Path, Snapshot] = {}
+
+    def connect(worker: Path) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(str(worker))
+        except OSError:
+            # the worker exited before we got to it
+            sock.close()
+            return
+
+        selector.register(sock, selectors.EVENT_READ, worker)
+        buffers[worker] = bytearray()
+
+    try:
+        for worker in _worker_sockets(path):
+            connect(worker)
+
+        if not buffers:
+            raise FileNotFoundError(path)
+
+        while buffers:
+            changed = False
+
+            for key, _ in selector.select(timeout=1):
+                worker = key.data
+                data = key.fileobj.recv(65536)  # type: ignore
+
+                if not data:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()  # type: ignore
+                    del buffers[worker]
+                    latest.pop(worker, None)
+                    continue
+
+                *lines, rest = (buffers[worker] + data).split(b"\n")
+                buffers[worker] = bytearray(rest)
+
+                if lines:
+                    latest[worker] = json.loads(lines[-1])
+                    changed = True
+
+            if changed and latest:
+                yield _merge_snapshots(list(latest.values()))
+
+            # restarted workers come back with a new pid
+            for worker in _worker_sockets(path):
+                if worker not in buffers:
+                    connect(worker)
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()  # type: ignore
+
+        selector.close()
+
+
+def attach(path: str | Path) -> Iterator[Snapshot]:
+    """Connect to a running app's dashboard socket, and yield its samples.
+
+    When the app runs with multiple workers, each of them has its own socket,
+    and the latest samples of all of them are merged into one."""
+    path = Path(path)
+
+    if not path.exists():
+        yield from _attach_workers(path)
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(path))
+
+        with sock.makefile("r", encoding="utf-8") as file:
+            for line in file:
+                yield json.loads(line)
+
+
+class Widgets:
+    """The parts of the dashboard that are drawn from samples."""
+
+    def __init__(self) -> None:
+        self.start = time.monotonic()
+        self.system = HeatedProgress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(finished_style="dim red"),
+            TaskProgressColumn(),
+        )
+        self._cpu = self.system.add_task("CPU")
+        self._mem = self.system.add_task("Memory (Virtual)")
+        self._swap = self.system.add_task("Memory (Swap)")
+        self._disk = self.system.add_task("Disk Usage")
+        self.network = Plot("Network", "Seconds", "Usage (KbPS)")
+        self.io = Plot("IO", "Seconds", "Usage (Per Second)")
+        self.routes = _route_table([])
+        self.has_system = _psutil() is not None
+
+    @property
+    def system_panel(self) -> Panel:
+        if not self.has_system:
+            return _needs_fancy()
+
+        return Panel(self.system, title="System")
+
+    def update(self, snapshot: Snapshot) -> None:
+        now = time.monotonic() - self.start
+        system = snapshot["system"]
+        self.has_system = system is not None
+
+        if system:
+            self.system.update(self._cpu, completed=system["cpu"])
+            self.system.update(self._mem, completed=system["memory"])
+            self.system.update(self._swap, completed=system["swap"])
+            self.system.update(self._disk, completed=system["disk"])
+
+        network = snapshot["network"]
+        if network:
+            self.network.dataset("Upload").add_point(now, network["sent"])
+            self.network.dataset("Download").add_point(
+                now,
+                network["received"],
+            )
+
+        io = snapshot["io"]
+        if io:
+            self.io.dataset("Read").add_point(now, io["read"])
+            self.io.dataset("Write").add_point(now, io["write"])
+
+        self.routes = _route_table(snapshot["routes"])
+
+
+def _route_table(routes: list[dict[str, Any]]) -> Table:
+    table = Table(box=box.ROUNDED, expand=True, title="Routes")
+
+    for column in ("Method", "Route", "Req/s", "Mean", "p99", "5xx"):
+        table.add_column(column)
+
+    for route in sorted(routes, key=lambda r: -r["rps"]):
+        method = route["method"]
+        table.add_row(
+            f"[bold {_METHOD_COLORS.get(method, 'white')}]{method}[/]",
+            route["path"],
+            f"{route['rps']:.1f}",
+            f"{route['mean_ms']:.2f}ms",
+            f"{route['p99_ms']:.2f}ms",
+            f"[red]{route['errors']}[/]" if route["errors"] else "0",
+        )
+
+    return table
+
+
+class Dynamic:
+    """Renderable that is looked up again every time it's drawn."""
+
+    def __init__(self, get: Callable[[], Any]) -> None:
+        self.get = get
+
+    def __rich__(self) -> Any:
+        return self.get()
+
+
+def run_top(path: str | Path) -> None:
+    """Draw the dashboard for an app running in another process."""
+    widgets = Widgets()
+    status = Text("connecting...", style="dim")
+    layout = Layout()
+    layout.split_column(
+        Layout(Align.center(status), name="header", size=1),
+        Layout(Dynamic(lambda: widgets.routes), name="routes"),
+        Layout(name="bottom"),
+    )
+    layout["bottom"].split_row(
+        Layout(Dynamic(lambda: widgets.system_panel)),
+        Layout(widgets.network),
+        Layout(widgets.io),
+    )
+
+    with Live(
+        layout,
+        console=Console(),
+        screen=True,
+        transient=True,
+        refresh_per_second=2,
+    ):
+        for snapshot in attach(path):
+            total = sum(route["rps"] for route in snapshot["routes"])
+            workers = snapshot.get("workers")
+            source = (
+                f"{workers} workers" if workers else f"pid {snapshot['pid']}"
+            )
+            status.plain = f"{source}: {total:.1f} requests/s"
+            widgets.update(snapshot)
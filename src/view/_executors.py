@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib
+import inspect
+import multiprocessing
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
+
+from ._logging import Internal, Service
+from .exceptions import InvalidRouteError
+from .typing import ExecutorType
+
+if TYPE_CHECKING:
+    from .config import ExecutorConfig
+
+__all__ = ("ExecutorPool",)
+
+_SATURATED = ("Service Unavailable", 503)
+
+
+class _ProcessTarget:
+    """Picklable reference to a route function for process pools.
+
+    Route decorators replace the module level name with a `Route`, so the
+    original function can't be pickled by reference. Instead, the function
+    is looked up again by module and qualified name in the worker process."""
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.module = func.__module__
+        self.qualname = func.__qualname__
+
+        if "<locals>" in self.qualname:
+            raise InvalidRouteError(
+                f"{func!r} is defined in a local scope and cannot"
+                " be run in a process pool",
+            )
+
+        main = sys.modules.get("__main__")
+        if (
+            (self.module == "__main__")
+            and (not getattr(main, "__file__", None))
+            and (multiprocessing.get_start_method() != "fork")
+        ):
+            # spawned workers run __main__ again from its file, but there
+            # isn't one in an interactive session or with python -c
+            raise InvalidRouteError(
+                f"{func!r} is defined in a __main__ module without a file,"
+                " which process pool workers can't import",
+            )
+
+    def _resolve(self) -> Callable[..., Any]:
+        try:
+            target: Any = importlib.import_module(self.module)
+
+            for part in self.qualname.split("."):
+                target = getattr(target, part)
+        except (ImportError, AttributeError) as e:
+            # this is raised in the worker, so the hint wouldn't survive
+            # being sent back to the app
+            raise InvalidRouteError(
+                f"{self.module}.{self.qualname} could not be imported in a"
+                f" process pool worker ({e}), routes that run in a process"
+                " pool must be defined in an importable module",
+            ) from None
+
+        return getattr(target, "func", target)
+
+    def __call__(self, *args: Any) -> Any:
+        return self._resolve()(*args)
+
+
+class ExecutorPool:
+    """App owned thread and process pools for CPU bound routes."""
+
+    def __init__(self, config: ExecutorConfig) -> None:
+        self.config = config
+        self._executors: dict[ExecutorType, Executor] = {}
+        self._pending: dict[ExecutorType, int] = {"thread": 0, "process": 0}
+
+    def _make(self, kind: ExecutorType) -> Executor:
+        if kind == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.config.thread_workers,
+                thread_name_prefix="view_worker",
+            )
+
+        return ProcessPoolExecutor(max_workers=self.config.process_workers)
+
+    def get(self, kind: ExecutorType) -> Executor:
+        """Get (or lazily create) the executor for `kind`."""
+        executor = self._executors.get(kind)
+        if not executor:
+            Internal.info(f"creating {kind} executor")
+            executor = self._make(kind)
+            self._executors[kind] = executor
+
+        return executor
+
+    def start(self, kinds: set[ExecutorType]) -> None:
+        """Create the executors needed by the loaded routes."""
+        for kind in kinds:
+            self.get(kind)
+
+    def shutdown(self) -> None:
+        """Shut down all running executors."""
+        for kind, executor in self._executors.items():
+            Internal.info(f"shutting down {kind} executor")
+            executor.shutdown(wait=True)
+
+        self._executors.clear()
+
+    def wrap(
+        self,
+        func: Callable[..., Any],
+        kind: ExecutorType,
+    ) -> Callable[..., Any]:
+        """Wrap a synchronous route so it's dispatched to an executor."""
+        if inspect.iscoroutinefunction(func):
+            raise InvalidRouteError(
+                f"{func!r} is asynchronous and cannot be run in an executor",
+            )
+
+        target = _ProcessTarget(func) if kind == "process" else func
+        limit = self.config.max_queue
+
+        @functools.wraps(func)
+        async def inner(*args: Any) -> Any:
+            if limit and (self._pending[kind] >= limit):
+                Service.warning(f"{kind} executor is saturated")
+                return _SATURATED
+
+            self._pending[kind] += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self.get(kind),
+                    target,
+                    *args,
+                )
+            finally:
+                self._pending[kind] -= 1
+
+        return inner
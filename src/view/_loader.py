@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 import os
 import sys
 import warnings
@@ -24,7 +25,8 @@ from ._logging import Internal
 from ._util import is_annotated, is_union, set_load
 from .exceptions import (DuplicateRouteError, InvalidBodyError,
                          InvalidRouteError, LoaderWarning)
-from .routing import BodyParam, Method, Route, RouteInput, _NoDefault
+from .routing import (BodyParam, Method, Part, RateLimit, Route, RouteInput,
+                      _NoDefault)
 from .typing import Any, RouteInputDict, TypeInfo, ValueType
 
 ExtNotRequired = None
@@ -53,7 +55,7 @@ if TYPE_CHECKING:
 else:
     from typing import _TypedDictMeta
 
-__all__ = "load_fs", "load_simple", "finalize"
+__all__ = "load_fs", "load_simple", "finalize", "format_limits"
 
 
 TYPECODE_ANY = 0
@@ -445,15 +447,45 @@ def finalize(routes: list[Route], app: ViewApp):
                 )
         app.loaded_routes.append(route)
         target(
-            route.path,  # type: ignore
-            route.func,
+            # the path is only used to name the route's metrics when it has parts
+            route.path or _format_parts(route.parts),
+            route.func
+            if not route.executor
+            else app.executors.wrap(route.func, route.executor),
             route.cache_rate,
             _format_inputs(route.inputs),
             route.errors or {},
             route.parts,  # type: ignore
+            format_limits(route.rate_limit, route.max_in_flight),
         )
 
 
+def format_limits(
+    rate_limit: RateLimit | None,
+    max_in_flight: int | None,
+) -> tuple[float, int, bool, int] | None:
+    """Convert limits into the tuple `_view` expects, or `None` if there
+    aren't any. Zero means no limit."""
+    if (not rate_limit) and (not max_in_flight):
+        return None
+
+    if not rate_limit:
+        return (0.0, 0, False, max_in_flight or 0)
+
+    return (
+        rate_limit.rate,
+        rate_limit.burst or math.ceil(rate_limit.rate),
+        rate_limit.per_client,
+        max_in_flight or 0,
+    )
+
+
+def _format_parts(parts: list[str | Part[Any]]) -> str:
+    return "".join(
+        i if isinstance(i, str) else f"/{{{i.name.lstrip('/')}}}" for i in parts
+    )
+
+
 def load_fs(app: ViewApp, target_dir: Path) -> None:
     """Filesystem loading implementation.
     Similiar to NextJS's routing system. You take `target_dir` and search it,
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
 import queue
 import random
 import re
+import socket
 import sys
-import time
 import warnings
+import weakref
 from abc import ABC
-from threading import Event, Thread
-from typing import IO, Callable, Iterable, NamedTuple, TextIO
+from threading import Event, Thread, current_thread
+from typing import (IO, TYPE_CHECKING, Any, Callable, Iterable, Literal,
+                    NamedTuple, TextIO)
 
 from ._util import shell_hint
 from rich import box
@@ -21,8 +24,7 @@ from rich.layout import Layout
 from rich.live import Live
 from rich.logging import RichHandler
 from rich.panel import Panel
-from rich.progress import (BarColumn, Progress, Task, TaskProgressColumn,
-                           TextColumn)
+from rich.progress import Progress, Task
 from rich.progress_bar import ProgressBar
 from rich.table import Table
 from rich.text import Text
@@ -30,7 +32,10 @@ from rich.text import Text
 from .exceptions import ViewInternalError
 from .typing import LogLevel
 
-UVICORN_ROUTE_REGEX = re.compile(r'.*"(.+) (\/.*) .+" ([0-9]{1,3}).*')
+if TYPE_CHECKING:
+    from _view import ViewApp
+
+    from ._dashboard import Sampler
 
 
 # see https://github.com/Textualize/rich/issues/433
@@ -101,24 +106,9 @@ class UvicornHijack(logging.Filter):
     def filter(self, record: logging.LogRecord):
         if record.exc_text:
             Service.error(record.exc_text)
-        STATUS_TO_SVC = {
-            logging.DEBUG: Service.debug,
-            logging.INFO: Service.info,
-            logging.WARNING: Service.warning,
-            logging.ERROR: Service.error,
-            logging.CRITICAL: Service.critical,
-        }
-        message = record.getMessage()
-        match = UVICORN_ROUTE_REGEX.match(message)
-
-        if match:
-            # its a route message
-            method = match.group(1)
-            path = match.group(2)
-            status = int(match.group(3))
-            route(path, status, method)
-        else:
-            STATUS_TO_SVC[record.levelno](message)
+
+        # access logs come from _view, so these are only server messages
+        _LEVEL_TO_SVC[record.levelno](record.getMessage())
         return False
 
 
@@ -139,8 +129,150 @@ class ViewFormatter(logging.Formatter):
         )
 
 
+# the same syntax that rich uses for markup
+_MARKUP = re.compile(r"(\\*)\[([a-z#/@][^[]*?)]")
+
+
+def _plain_markup(match: re.Match[str]) -> str:
+    backslashes, escaped = divmod(len(match.group(1)), 2)
+    return ("\\" * backslashes) + (f"[{match.group(2)}]" if escaped else "")
+
+
+def strip_markup(message: str) -> str:
+    """Remove rich markup tags from a message, without rendering it."""
+    if "[" not in message:
+        return message
+
+    return _MARKUP.sub(_plain_markup, message)
+
+
+class JSONHandler(logging.Handler):
+    """Writes log records as newline-delimited JSON.
+
+    Fields that don't change between records (such as the process ID) are
+    encoded once per process and appended to every line. Lines are buffered
+    and written in batches, either by a background thread every `interval`
+    seconds or once `batch_size` lines are waiting. Errors are written
+    immediately."""
+
+    def __init__(
+        self,
+        stream: IO[str] | None = None,
+        *,
+        batch_size: int = 64,
+        interval: float = 0.25,
+    ) -> None:
+        super().__init__()
+        self.stream = stream
+        self.batch_size = batch_size
+        self.interval = interval
+        self._suffix: str | None = None
+        self._buffer: list[str] = []
+        self._stop = Event()
+        self._thread: Thread | None = None
+        _JSON_HANDLERS.add(self)
+
+    def _after_fork(self) -> None:
+        # the flush thread and anything buffered belong to the parent
+        self._suffix = None
+        self._buffer = []
+        self._stop = Event()
+        self._thread = None
+
+    def _encode(self, record: logging.LogRecord) -> str:
+        data: dict[str, Any] = {
+            "time": record.created,
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": strip_markup(record.getMessage()),
+        }
+        fields: dict[str, Any] | None = getattr(record, "fields", None)
+
+        if fields:
+            data.update(fields)
+
+        if record.exc_info:
+            data["exception"] = logging.Formatter().formatException(
+                record.exc_info
+            )
+
+        if self._suffix is None:
+            static = json.dumps(
+                {"pid": os.getpid(), "host": socket.gethostname()}
+            )
+            self._suffix = f", {static[1:]}\n"
+
+        return json.dumps(data, default=str)[:-1] + self._suffix
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self._encode(record)
+        except Exception:  # noqa: BLE001
+            # same as logging.Handler, formatting runs the caller's __str__
+            self.handleError(record)
+            return
+
+        with self.lock:  # type: ignore
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.batch_size
+
+        if full or (record.levelno >= logging.ERROR):
+            self.flush()
+        elif not self._thread:
+            self._start()
+
+    def _start(self) -> None:
+        with self.lock:  # type: ignore
+            if self._thread:
+                return
+
+            self._stop.clear()
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:  # type: ignore
+            if not self._buffer:
+                return
+
+            lines = "".join(self._buffer)
+            self._buffer.clear()
+            stream = self.stream or sys.stderr
+            stream.write(lines)
+            stream.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread and (thread is not current_thread()):
+            thread.join()
+
+        self._thread = None
+        self.flush()
+        super().close()
+
+
+_JSON_HANDLERS: weakref.WeakSet[JSONHandler] = weakref.WeakSet()
+
+
+def _reset_json_handlers() -> None:
+    for handler in _JSON_HANDLERS:
+        handler._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_json_handlers)
+
+
 svc = logging.getLogger("view.service")
 internal = logging.getLogger("view.internal")
+_RICH_HANDLERS: dict[logging.Logger, logging.Handler] = {}
+_JSON: JSONHandler | None = None
+
 for lg in (svc, internal):
     lg.setLevel("INFO")
     handler = RichHandler(
@@ -151,6 +283,46 @@ for lg in (svc, internal):
     )
     handler.setFormatter(ViewFormatter())
     lg.addHandler(handler)
+    _RICH_HANDLERS[lg] = handler
+
+
+def set_format(
+    format: Literal["rich", "json"],
+    *,
+    stream: IO[str] | None = None,
+) -> None:
+    """Switch the service and internal loggers between rich and JSON output."""
+    global _JSON
+
+    if format == "json":
+        if _JSON and (_JSON.stream is stream):
+            return
+
+        handler = JSONHandler(stream)
+        for lg, rich_handler in _RICH_HANDLERS.items():
+            lg.removeHandler(rich_handler)
+            if _JSON:
+                lg.removeHandler(_JSON)
+            lg.addHandler(handler)
+
+        if _JSON:
+            _JSON.close()
+
+        _JSON = handler
+        return
+
+    if format != "rich":
+        raise ViewInternalError(f"unknown log format: {format!r}")
+
+    if not _JSON:
+        return
+
+    for lg, rich_handler in _RICH_HANDLERS.items():
+        lg.removeHandler(_JSON)
+        lg.addHandler(rich_handler)
+
+    _JSON.close()
+    _JSON = None
 
 
 internal.setLevel(10000)
@@ -303,6 +475,14 @@ class Internal(_Logger):
 
 svc.addFilter(ServiceIntercept())
 
+_LEVEL_TO_SVC: dict[int, Callable[..., None]] = {
+    logging.DEBUG: Service.debug,
+    logging.INFO: Service.info,
+    logging.WARNING: Service.warning,
+    logging.ERROR: Service.error,
+    logging.CRITICAL: Service.critical,
+}
+
 
 def _status_color(status: int) -> str:
     if status >= 500:
@@ -332,7 +512,19 @@ _METHOD_COLORS: dict[str, str] = {
 }
 
 
-def route(path: str, status: int, method: str):
+def route(path: str, status: int, method: str, latency: float | None = None):
+    if _JSON:
+        fields: dict[str, Any] = {
+            "method": method,
+            "path": path,
+            "status": status,
+        }
+        if latency is not None:
+            fields["latency_ms"] = round(latency * 1000, 3)
+
+        svc.info(f"{method} {path} {status}", extra={"fields": fields})
+        return
+
     if _LIVE:
         return _QUEUE.put_nowait(
             QueueItem(
@@ -344,13 +536,53 @@ def route(path: str, status: int, method: str):
             )
         )
     Service.info(
-        f"[bold {_METHOD_COLORS[method]}]{method.lower()}"
+        f"[bold {_METHOD_COLORS.get(method, 'white')}]{method.lower()}"
         f"[/] [bold white]{path}[/]"
-        f" [bold {_status_color(status)}]{status}",
+        f" [bold {_status_color(status)}]{status}[/]"
+        + (f" [dim]{latency * 1000:.2f}ms" if latency is not None else ""),
         highlight=False,
     )
 
 
+class AccessLog:
+    """Writes the access log entries recorded by `_view`.
+
+    Entries are drained from the app's ring buffer in batches by a background
+    thread, so nothing is formatted while a request is being handled."""
+
+    def __init__(self, app: ViewApp, *, interval: float = 0.25) -> None:
+        self.app = app
+        self.interval = interval
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def flush(self) -> None:
+        entries, dropped = self.app._drain_access_log()
+
+        for method, path, status, latency, _ in entries:
+            route(path, status, method, latency)
+
+        if dropped:
+            Service.warning(f"access log buffer was full, dropped {dropped} entries")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+
+
 VIEW_TEXT = (
     r"""        _                           
        (_)                          
@@ -787,7 +1019,87 @@ def convert_kb(value: float):
     return value / 1024
 
 
-def _server_logger():
+def _needs_fancy() -> Panel:
+    return Panel(
+        shell_hint(
+            "pip install plotext",
+            "pip install view.py[fancy]"
+        ),
+        title="This widget needs an external library!"
+    )
+
+
+def _plotext():
+    try:
+        import plotext
+    except ModuleNotFoundError:
+        return None
+
+    return plotext
+
+
+class Plot:
+    """Plot renderable for rich."""
+
+    def __init__(self, name: str, x: str, y: str) -> None:
+        """Args:
+        name: Title of the graph.
+        x: X label of the graph.
+        y: Y label of the graph."""
+        self.title = name
+        self.x_label = x
+        self.y_label = y
+        self.datasets: dict[str, Dataset] = {}
+
+    def dataset(self, name: str, *, point_limit: int | None = None) -> Dataset:
+        """Generate or create a new dataset.
+
+        Args:
+            name: Name of the dataset.
+            point_limit: Limit on the number of points to be allowed on the graph at a time. If not set, terminal size divided by 3 is used.
+        """
+        found = self.datasets.get(name)
+        if found:
+            return found
+
+        size = os.get_terminal_size().lines // 3
+
+        ds = Dataset(name, point_limit=point_limit or size)
+        self.datasets[name] = ds
+        return ds
+
+    def _render(self, plt, width: int, height: int) -> None:
+        plt.clf()
+        plt.xscale("linear")
+        plt.yscale("linear")
+        plt.plotsize(width, height)
+
+        for ds in self.datasets.values():
+            if ds.points:
+                plt.plot(
+                    [x for x in ds.points.keys()],
+                    [y for y in ds.points.values()],
+                    label=ds.name,
+                )
+
+        plt.title(self.title)
+        plt.xlabel(self.x_label)
+        plt.ylabel(self.y_label)
+        plt.theme("pro")
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        plt = _plotext()
+        if not plt:
+            yield _needs_fancy()
+            return
+
+        self._render(plt, options.max_width, options.max_height or 10)
+        yield Text.from_ansi(plt.build())
+
+
+def _server_logger(sampler: Sampler):
     """Fancy logger implementation."""
     global _LIVE
     _LIVE = True
@@ -815,119 +1127,25 @@ def _server_logger():
         errors,
         stdout,
     )
+    from ._dashboard import Dynamic, Widgets
+
+    # everything below is drawn from the samples taken by the app's sampler
+    widgets = Widgets()
+    sampler.subscribers.append(widgets.update)
     layout["right"].split_column(
         feed,
+        Layout(Dynamic(lambda: widgets.routes)),
         Layout(name="corner"),
     )
-    system = HeatedProgress(
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(finished_style="dim red"),
-        TaskProgressColumn(),
-    )
-    cpu = system.add_task("CPU")
-    mem = system.add_task("Memory (Virtual)")
-    smem = system.add_task("Memory (Swap)")
-    disk = system.add_task("Disk Usage")
-    
-    try:
-        import plotext as plt
-    except ModuleNotFoundError as e:
-        plt = None
-    
-    class Plot:
-        """Plot renderable for rich."""
-
-        def __init__(self, name: str, x: str, y: str) -> None:
-            """Args:
-            name: Title of the graph.
-            x: X label of the graph.
-            y: Y label of the graph."""
-            if plt:
-                plt.xscale("linear")
-                plt.yscale("linear")
-
-            self.title = name
-            self.x_label = x
-            self.y_label = y
-            self.datasets: dict[str, Dataset] = {}
-
-        def dataset(self, name: str, *, point_limit: int | None = None) -> Dataset:
-            """Generate or create a new dataset.
-
-            Args:
-                name: Name of the dataset.
-                point_limit: Limit on the number of points to be allowed on the graph at a time. If not set, terminal size divided by 3 is used.
-            """
-            found = self.datasets.get(name)
-            if found:
-                return found
-
-            size = os.get_terminal_size().lines // 3
-
-            ds = Dataset(name, point_limit=point_limit or size)
-            self.datasets[name] = ds
-            return ds
-
-        def _render(self, width: int, height: int) -> None:
-            if not plt:
-                return
-
-            plt.clf()
-            plt.plotsize(width, height)
-
-            for ds in self.datasets.values():
-                if ds.points:
-                    plt.plot(
-                        [x for x in ds.points.keys()],
-                        [y for y in ds.points.values()],
-                        label=ds.name,
-                    )
-
-            plt.title(self.title)
-            plt.xlabel(self.x_label)
-            plt.ylabel(self.y_label)
-            plt.theme("pro")
-
-        def __rich_console__(
-            self, console: Console, options: ConsoleOptions
-        ) -> RenderResult:
-            if not plt:
-                return Panel(
-                    shell_hint(
-                        "pip install plotext",
-                        "pip install view.py[fancy]"
-                    ),
-                    title="This widget needs an external library!"
-                )
-            self._render(options.max_width, options.max_height)
-            yield Text.from_ansi(plt.build())
-
     layout["corner"].split_row(
         Layout(name="left_corner"),
         Layout(name="very_corner"),
     )
-    network = Plot("Network", "Seconds", "Usage (KbPS)")
-    
-    try:
-        import psutil
-    except ModuleNotFoundError:
-        psutil = None
-    
-    if psutil:
-        layout["very_corner"].split_column(Panel(system, title="System"), network)
-    else:
-        layout["very_corner"].split_column(Panel(
-            shell_hint(
-                "pip install plotext",
-                "pip install view.py[fancy]"
-            ),
-            title="This widget needs an external library!"),
-            network
-        )
-
-
-    io = Plot("IO", "Seconds", "Usage (Per Second)")
-    layout["left_corner"].split_column(table, io)
+    layout["very_corner"].split_column(
+        Dynamic(lambda: widgets.system_panel),
+        widgets.network,
+    )
+    layout["left_corner"].split_column(table, widgets.io)
 
     console = Console()
 
@@ -936,61 +1154,6 @@ def _server_logger():
     sys.stdout = _StandardOutProxy(console, sys.stdout, _QUEUE)
     sys.stderr = _StandardErrProxy(console, sys.stderr, _QUEUE)
 
-    def inner():
-        if not psutil:
-            return
-
-        while not _CLOSE.wait(0.3):
-            system.update(cpu, completed=psutil.cpu_percent())
-            system.update(mem, completed=psutil.virtual_memory().percent)
-            system.update(smem, completed=psutil.swap_memory().percent)
-            system.update(disk, completed=psutil.disk_usage("/").percent)
-
-    network.dataset("Upload").add_point(0, 0)
-    network.dataset("Download").add_point(0, 0)
-
-    def net():
-        if not psutil:
-            return
-
-        base = time.time()
-        net_io = psutil.net_io_counters()
-
-        while not _CLOSE.wait(0.5):
-            net_io2 = psutil.net_io_counters()
-            ua = net_io2.bytes_sent - net_io.bytes_sent
-            da = net_io2.bytes_recv - net_io.bytes_recv
-            us = convert_kb(ua)
-            ds = convert_kb(da)
-
-            network.dataset("Upload").add_point(time.time() - base, us)
-            network.dataset("Download").add_point(time.time() - base, ds)
-
-            net_io = net_io2
-
-    def io_count():
-        if not psutil:
-            return
-
-        base = time.time()
-        p = psutil.Process()
-        pio_base = p.io_counters()
-
-        while not _CLOSE.wait(1):
-            p = psutil.Process()
-            pio = p.io_counters()
-            io.dataset("Read").add_point(
-                time.time() - base, pio.read_count - pio_base.read_count
-            )
-            io.dataset("Write").add_point(
-                time.time() - base, pio.write_count - pio_base.write_count
-            )
-
-            pio_base = pio
-
-    for thread in (inner, net, io_count):
-        Thread(target=thread).start()
-
     with Live(
         Align.center(layout),
         screen=True,
@@ -1032,12 +1195,12 @@ def _server_logger():
                 )
 
 
-def enter_server():
+def enter_server(sampler: Sampler):
     """Start fancy mode."""
     if _CLOSE.is_set():
         _CLOSE.clear()
 
-    Thread(target=_server_logger).start()
+    Thread(target=_server_logger, args=(sampler,)).start()
 
 
 def exit_server():
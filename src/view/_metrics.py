@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from ._logging import Internal
+
+if TYPE_CHECKING:
+    from _view import ViewApp
+
+__all__ = ("RouteMetrics", "collect", "render", "SharedMetrics")
+
+# these have to match METRICS_BUCKETS and METRICS_BASE_NS in access.h
+BUCKETS: tuple[float, ...] = tuple(
+    (100_000 * (2**i)) / 1e9 for i in range(18)
+)
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+_ENV = "VIEW_METRICS_DIR"
+# a shared table is the number of routes, followed by a slot for each of
+# them, which has to match metrics_counters in access.h
+_HEADER = struct.Struct("=Q")
+_SLOT = struct.Struct(f"=qQ{len(STATUS_CLASSES)}Q{len(BUCKETS) + 1}Qq")
+
+
+class RouteMetrics(NamedTuple):
+    method: str
+    path: str
+    in_flight: int
+    count: int
+    statuses: tuple[int, ...]
+    buckets: tuple[int, ...]
+    latency_sum: float
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def _read_table(
+    data: bytes,
+    routes: list[RouteMetrics],
+) -> list[RouteMetrics] | None:
+    if len(data) < _HEADER.size:
+        return None
+
+    (length,) = _HEADER.unpack_from(data)
+
+    # workers are forked from the same app, so their routes are registered
+    # in the same order, and a slot's route is the one at the same index here
+    if (length != len(routes)) or (
+        len(data) < _HEADER.size + (length * _SLOT.size)
+    ):
+        return None
+
+    metrics: list[RouteMetrics] = []
+    statuses = len(STATUS_CLASSES)
+
+    for index, route in enumerate(routes):
+        in_flight, count, *counters, latency_sum = _SLOT.unpack_from(
+            data,
+            _HEADER.size + (index * _SLOT.size),
+        )
+        metrics.append(
+            RouteMetrics(
+                route.method,
+                route.path,
+                in_flight,
+                count,
+                tuple(counters[:statuses]),
+                tuple(counters[statuses:]),
+                latency_sum / 1e9,
+            )
+        )
+
+    return metrics
+
+
+def _read_workers(
+    directory: Path,
+    routes: list[RouteMetrics],
+) -> Iterable[list[RouteMetrics]]:
+    own = f"{os.getpid()}.metrics"
+
+    for file in directory.glob("*.metrics"):
+        if file.name == own:
+            continue
+
+        try:
+            metrics = _read_table(file.read_bytes(), routes)
+        except OSError:
+            continue
+
+        if metrics is None:
+            Internal.debug(f"{file.name} doesn't match the route table")
+            continue
+
+        if not _alive(int(file.stem)):
+            # counters from dead workers still count, but their requests
+            # aren't in flight anymore
+            metrics = [i._replace(in_flight=0) for i in metrics]
+
+        yield metrics
+
+
+def _merge(snapshots: Iterable[list[RouteMetrics]]) -> list[RouteMetrics]:
+    merged: dict[tuple[str, str], RouteMetrics] = {}
+
+    for snapshot in snapshots:
+        for metrics in snapshot:
+            key = (metrics.method, metrics.path)
+            existing = merged.get(key)
+
+            if not existing:
+                merged[key] = metrics
+                continue
+
+            merged[key] = RouteMetrics(
+                metrics.method,
+                metrics.path,
+                existing.in_flight + metrics.in_flight,
+                existing.count + metrics.count,
+                tuple(a + b for a, b in zip(existing.statuses, metrics.statuses)),
+                tuple(a + b for a, b in zip(existing.buckets, metrics.buckets)),
+                existing.latency_sum + metrics.latency_sum,
+            )
+
+    return list(merged.values())
+
+
+def collect(app: ViewApp) -> list[RouteMetrics]:
+    """Get the metrics for every route, including other worker processes."""
+    local = [RouteMetrics(*i) for i in app._metrics()]
+    directory = os.environ.get(_ENV)
+
+    if not directory:
+        return _merge([local])
+
+    return _merge([local, *_read_workers(Path(directory), local)])
+
+
+def _label(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def render(metrics: list[RouteMetrics]) -> str:
+    """Render metrics in the Prometheus text format."""
+    requests: list[str] = []
+    in_flight: list[str] = []
+    durations: list[str] = []
+
+    for m in metrics:
+        labels = f'method="{m.method}",route="{_label(m.path)}"'
+        in_flight.append(f"view_requests_in_flight{{{labels}}} {m.in_flight}")
+
+        for status, count in zip(STATUS_CLASSES, m.statuses):
+            if count:
+                requests.append(
+                    f'view_requests_total{{{labels},status="{status}"}} {count}'
+                )
+
+        total = 0
+        for bound, count in zip(BUCKETS, m.buckets):
+            total += count
+            durations.append(
+                f'view_request_duration_seconds_bucket{{{labels},le="{bound:g}"}}'
+                f" {total}"
+            )
+
+        durations.append(
+            f'view_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+            f" {m.count}"
+        )
+        durations.append(
+            f"view_request_duration_seconds_sum{{{labels}}} {m.latency_sum!r}"
+        )
+        durations.append(
+            f"view_request_duration_seconds_count{{{labels}}} {m.count}"
+        )
+
+    return "\n".join(
+        (
+            "# HELP view_requests_total Requests handled by each route.",
+            "# TYPE view_requests_total counter",
+            *requests,
+            "# HELP view_requests_in_flight Requests currently being handled.",
+            "# TYPE view_requests_in_flight gauge",
+            *in_flight,
+            "# HELP view_request_duration_seconds Time taken to send each response.",
+            "# TYPE view_request_duration_seconds histogram",
+            *durations,
+            "",
+        )
+    )
+
+
+class SharedMetrics:
+    """Shares a worker's metrics with the other workers.
+
+    The supervisor sets `VIEW_METRICS_DIR` before forking, and each worker
+    maps a `{pid}.metrics` file there. `_view` records requests into the
+    mapping directly, so any worker can read the others' counters as they
+    change, without them having to write snapshots."""
+
+    def __init__(self, app: ViewApp) -> None:
+        directory = os.environ.get(_ENV)
+        self.app = app
+        self.path = (
+            Path(directory) / f"{os.getpid()}.metrics" if directory else None
+        )
+        self._map: mmap.mmap | None = None
+
+    def start(self) -> None:
+        if not self.path:
+            return
+
+        size = _HEADER.size + (len(self.app._metrics()) * _SLOT.size)
+
+        try:
+            with open(self.path, "w+b") as f:
+                f.truncate(size)
+                self._map = mmap.mmap(f.fileno(), size)
+        except OSError as e:
+            Internal.warning(f"failed to share metrics: {e}")
+            return
+
+        self.app._share_metrics(self._map)
+
+    def stop(self) -> None:
+        if not self._map:
+            return
+
+        # the file is left behind, since a dead worker's requests still count
+        self.app._share_metrics(None)
+        self._map.close()
+        self._map = None
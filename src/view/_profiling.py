@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import random
+from typing import NamedTuple
+
+from rich import box
+from rich.table import Table
+
+__all__ = ("PHASES", "phase_durations", "Profiler")
+
+# the phases between the timestamps recorded by _view, see access.h
+PHASES = ("match", "body", "parse", "handler", "send")
+
+
+class _Sample(NamedTuple):
+    status: int
+    durations: tuple[float, ...]
+
+
+def phase_durations(timestamps: tuple[int, ...]) -> tuple[float, ...]:
+    """Convert the timestamps of a profiled request into seconds per phase.
+
+    Phases that the request skipped (such as the body for a `GET`) are `0`."""
+    last = timestamps[0]
+    durations: list[float] = []
+
+    for timestamp in timestamps[1:]:
+        if not timestamp:
+            durations.append(0.0)
+            continue
+
+        durations.append((timestamp - last) / 1e9)
+        last = timestamp
+
+    return tuple(durations)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    index = min(len(values) - 1, int(len(values) * pct))
+    return values[index]
+
+
+class Profiler:
+    """Collects profiled requests, and breaks down where their time went.
+
+    Instances are called by `_view` after each profiled response is sent.
+    Only `max_samples` requests are kept per route, using reservoir sampling
+    once that's reached."""
+
+    def __init__(self, *, max_samples: int = 10_000) -> None:
+        self.max_samples = max_samples
+        self.samples: dict[tuple[str, str], list[_Sample]] = {}
+        self.seen: dict[tuple[str, str], int] = {}
+
+    def __call__(
+        self,
+        method: str,
+        path: str,
+        status: int,
+        timestamps: tuple[int, ...],
+    ) -> None:
+        key = (method, path)
+        samples = self.samples.setdefault(key, [])
+        seen = self.seen.get(key, 0) + 1
+        self.seen[key] = seen
+        sample = _Sample(status, phase_durations(timestamps))
+
+        if len(samples) < self.max_samples:
+            samples.append(sample)
+            return
+
+        index = random.randrange(seen)
+        if index < self.max_samples:
+            samples[index] = sample
+
+    def report(self) -> Table:
+        """Get a table with the mean and p99 time of each phase, per route."""
+        table = Table(
+            title="Time per phase (mean / p99, ms)",
+            box=box.ROUNDED,
+        )
+        table.add_column("Route")
+        table.add_column("Requests", justify="right")
+
+        for phase in (*PHASES, "total"):
+            table.add_column(phase.capitalize(), justify="right")
+
+        for (method, path), samples in sorted(self.samples.items()):
+            row = [f"{method} {path}", str(self.seen[(method, path)])]
+
+            for index in range(len(PHASES) + 1):
+                if index == len(PHASES):
+                    values = sorted(sum(i.durations) for i in samples)
+                else:
+                    values = sorted(i.durations[index] for i in samples)
+
+                mean = sum(values) / len(values)
+                row.append(
+                    f"{mean * 1000:.3f} / {_percentile(values, 0.99) * 1000:.3f}"
+                )
+
+            table.add_row(*row)
+
+        return table
@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import signal
+import socket
+import time
+from collections import deque
+from email.utils import formatdate
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+
+from _view import parse_http
+
+from ._logging import Internal, Service
+
+if TYPE_CHECKING:
+    from .app import App
+    from .typing import AsgiDict
+
+__all__ = ("serve",)
+
+_MAX_HEAD = 64 * 1024
+_MAX_BODY = 16 * 1024 * 1024
+_MAX_PENDING = 32
+_KEEP_ALIVE_TIMEOUT = 5
+_ASGI = {"version": "3.0", "spec_version": "2.3"}
+
+_REASONS: dict[int, bytes] = {
+    status.value: status.phrase.encode() for status in HTTPStatus
+}
+_date_cache: list[Any] = [0, b""]
+# field names are tokens (RFC 9110), and a value with a CR or LF in it
+# would let the app (or whoever controls the value) split the response
+_TOKEN = re.compile(rb"[!#$%&'*+\-.^_`|~0-9A-Za-z]+")
+_BAD_VALUE = re.compile(rb"[\r\n\0]")
+
+
+def _date() -> bytes:
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache[0] = now
+        _date_cache[1] = formatdate(now, usegmt=True).encode()
+
+    return _date_cache[1]
+
+
+def _raw_response(status: int) -> bytes:
+    body = _REASONS.get(status, b"")
+    return b"".join(
+        (
+            b"HTTP/1.1 %d %s\r\n" % (status, body),
+            b"content-type: text/plain\r\n",
+            b"content-length: %d\r\n" % len(body),
+            b"connection: close\r\n",
+            b"\r\n",
+            body,
+        )
+    )
+
+
+class _Request:
+    __slots__ = ("scope", "body", "keep_alive")
+
+    def __init__(
+        self,
+        scope: AsgiDict,
+        body: bytes,
+        keep_alive: bool,
+    ) -> None:
+        self.scope = scope
+        self.body = body
+        self.keep_alive = keep_alive
+
+
+class _Response:
+    """ASGI send/receive pair for a single request."""
+
+    __slots__ = (
+        "protocol",
+        "request",
+        "status",
+        "headers",
+        "length",
+        "started",
+        "chunked",
+        "complete",
+        "received",
+    )
+
+    def __init__(self, protocol: _HTTPProtocol, request: _Request) -> None:
+        self.protocol = protocol
+        self.request = request
+        self.status = 200
+        self.headers: list[bytes] = []
+        self.length: int | None = None
+        self.started = False
+        self.chunked = False
+        self.complete = False
+        self.received = False
+
+    async def receive(self) -> AsgiDict:
+        if not self.received:
+            self.received = True
+            return {
+                "type": "http.request",
+                "body": self.request.body,
+                "more_body": False,
+            }
+
+        await self.protocol.disconnected
+        return {"type": "http.disconnect"}
+
+    def _head(self, body: bytes | None) -> bytes:
+        parts = [
+            b"HTTP/1.1 %d %s\r\n" % (self.status, _REASONS.get(self.status, b"")),
+            b"date: %s\r\n" % _date(),
+            *self.headers,
+        ]
+
+        # if the app set a content-length, the body is written as is
+        if self.length is None:
+            if body is not None:
+                parts.append(b"content-length: %d\r\n" % len(body))
+            else:
+                parts.append(b"transfer-encoding: chunked\r\n")
+
+        if not self.request.keep_alive:
+            parts.append(b"connection: close\r\n")
+
+        parts.append(b"\r\n")
+        return b"".join(parts)
+
+    async def send(self, message: AsgiDict) -> None:
+        if self.complete:
+            return
+
+        tp = message["type"]
+        transport = self.protocol.transport
+        assert transport
+
+        if tp == "http.response.start":
+            self.status = message["status"]
+            headers: list[bytes] = []
+
+            for key, value in message.get("headers", ()):
+                if (not _TOKEN.fullmatch(key)) or _BAD_VALUE.search(value):
+                    raise RuntimeError(f"invalid response header: {key!r}")
+
+                if key.lower() == b"content-length":
+                    if (self.length is not None) or (not value.isdigit()):
+                        raise RuntimeError(
+                            f"invalid content-length: {value!r}",
+                        )
+                    self.length = int(value)
+
+                headers.append(b"%s: %s\r\n" % (key, value))
+
+            self.headers = headers
+            return
+
+        if tp != "http.response.body":
+            raise RuntimeError(f"unexpected asgi message: {tp}")
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+
+            if not more:
+                # the common case, write everything in one go
+                self.complete = True
+                transport.write(self._head(body) + body)
+                return
+
+            self.chunked = self.length is None
+            transport.write(self._head(None))
+
+        if body:
+            transport.write(
+                b"%x\r\n%s\r\n" % (len(body), body) if self.chunked else body
+            )
+
+        if not more:
+            self.complete = True
+            if self.chunked:
+                transport.write(b"0\r\n\r\n")
+
+        await self.protocol.drain()
+
+
+class _HTTPProtocol(asyncio.Protocol):
+    def __init__(self, server: _Server) -> None:
+        self.server = server
+        self.app = server.app.asgi_app_entry
+        self.loop = server.loop
+        self.transport: asyncio.Transport | None = None
+        self.buffer = bytearray()
+        self.pending: deque[_Request] = deque()
+        self.task: asyncio.Task[None] | None = None
+        self.disconnected: asyncio.Future[None] = self.loop.create_future()
+        self.paused = False
+        self.writable: asyncio.Event | None = None
+        self.closing = False
+        self.error: bytes | None = None
+        self.idle_handle: asyncio.TimerHandle | None = None
+        self.client: tuple[str, int] | None = None
+        self.server_addr: tuple[str, int] | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        assert isinstance(transport, asyncio.Transport)
+        self.transport = transport
+        self.client = transport.get_extra_info("peername")
+        self.server_addr = transport.get_extra_info("sockname")
+        self.server.connections.add(self)
+        self._reset_idle()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.server.connections.discard(self)
+        self.closing = True
+        self._cancel_idle()
+
+        if not self.disconnected.done():
+            self.disconnected.set_result(None)
+
+        if self.writable:
+            self.writable.set()
+
+    def pause_writing(self) -> None:
+        self.writable = asyncio.Event()
+
+    def resume_writing(self) -> None:
+        if self.writable:
+            self.writable.set()
+            self.writable = None
+
+    async def drain(self) -> None:
+        if self.writable:
+            await self.writable.wait()
+
+    def _reset_idle(self) -> None:
+        self._cancel_idle()
+        self.idle_handle = self.loop.call_later(
+            _KEEP_ALIVE_TIMEOUT,
+            self._close_idle,
+        )
+
+    def _cancel_idle(self) -> None:
+        if self.idle_handle:
+            self.idle_handle.cancel()
+            self.idle_handle = None
+
+    def _close_idle(self) -> None:
+        if (not self.task) and self.transport:
+            self.transport.close()
+
+    def close(self) -> None:
+        self.closing = True
+        if (not self.task) and self.transport:
+            self.transport.close()
+
+    def _fail(self, status: int) -> None:
+        # this is written once the requests in flight have finished
+        self.closing = True
+        self.buffer.clear()
+        self.error = _raw_response(status)
+
+    def data_received(self, data: bytes) -> None:
+        if self.closing:
+            return
+
+        self.buffer += data
+
+        while self.buffer:
+            try:
+                parsed = parse_http(self.buffer)
+            except NotImplementedError:
+                self._fail(411)
+                break
+            except ValueError:
+                self._fail(400)
+                break
+
+            if parsed is None:
+                if len(self.buffer) > _MAX_HEAD:
+                    self._fail(431)
+                break
+
+            head, method, path, query, headers, length, keep_alive = parsed
+            if length > _MAX_BODY:
+                self._fail(413)
+                break
+
+            end = head + length
+
+            if len(self.buffer) < end:
+                # wait for the rest of the body
+                break
+
+            body = bytes(self.buffer[head:end])
+            del self.buffer[:end]
+            self.pending.append(
+                _Request(
+                    {
+                        "type": "http",
+                        "asgi": _ASGI,
+                        "http_version": "1.1",
+                        "method": method,
+                        "scheme": "http",
+                        "path": path,
+                        "query_string": query,
+                        "headers": headers,
+                        "client": self.client,
+                        "server": self.server_addr,
+                    },
+                    body,
+                    keep_alive,
+                ),
+            )
+
+            if not keep_alive:
+                self.closing = True
+                break
+
+        if not self.task:
+            assert self.transport
+            if self.pending:
+                self._cancel_idle()
+                self.task = self.loop.create_task(self._process())
+            elif self.error:
+                self.transport.write(self.error)
+                self.transport.close()
+
+        if (len(self.pending) > _MAX_PENDING) and (not self.paused):
+            assert self.transport
+            self.paused = True
+            self.transport.pause_reading()
+
+    async def _process(self) -> None:
+        assert self.transport
+        transport = self.transport
+
+        while self.pending and (not transport.is_closing()):
+            request = self.pending.popleft()
+            response = _Response(self, request)
+
+            try:
+                # dispatch goes through the regular asgi entry point, since
+                # middleware and the route inputs are built from the scope
+                await self.app(request.scope, response.receive, response.send)
+            except BaseException as e:
+                Service.exception("unhandled error in native server")
+                if not response.started:
+                    transport.write(_raw_response(500))
+                transport.close()
+
+                if not isinstance(e, Exception):
+                    raise
+                break
+
+            if not response.complete:
+                transport.write(_raw_response(500))
+                transport.close()
+                break
+
+            if not request.keep_alive:
+                break
+
+            if self.paused and (len(self.pending) <= _MAX_PENDING // 2):
+                self.paused = False
+                transport.resume_reading()
+
+        self.task = None
+
+        if self.error and (not transport.is_closing()):
+            transport.write(self.error)
+
+        if self.closing:
+            transport.close()
+        elif not transport.is_closing():
+            self._reset_idle()
+
+
+class _Server:
+    def __init__(self, app: App) -> None:
+        self.app = app
+        self.loop = asyncio.get_running_loop()
+        self.connections: set[_HTTPProtocol] = set()
+
+    async def run(
+        self,
+        host: str,
+        port: int,
+        sockets: list[socket.socket] | None,
+    ) -> None:
+        servers: list[asyncio.AbstractServer] = []
+
+        if sockets:
+            for sock in sockets:
+                servers.append(
+                    await self.loop.create_server(
+                        lambda: _HTTPProtocol(self),
+                        sock=sock,
+                        backlog=2048,
+                    )
+                )
+        else:
+            servers.append(
+                await self.loop.create_server(
+                    lambda: _HTTPProtocol(self),
+                    host=host,
+                    port=port,
+                    reuse_address=True,
+                    backlog=2048,
+                )
+            )
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                # windows, or not running in the main thread
+                ...
+
+        self.app._startup()
+        Service.info(f"view server running on http://{host}:{port}")
+
+        try:
+            await stop.wait()
+        finally:
+            Internal.info("closing native server")
+            for server in servers:
+                server.close()
+
+            for conn in tuple(self.connections):
+                conn.close()
+
+            tasks = [c.task for c in self.connections if c.task]
+            if tasks:
+                await asyncio.wait(tasks)
+
+            for server in servers:
+                await server.wait_closed()
+
+            self.app._cleanup()
+
+
+async def serve(
+    app: App,
+    *,
+    host: str,
+    port: int,
+    sockets: list[socket.socket] | None = None,
+) -> None:
+    """Run the app on the built-in HTTP/1.1 server."""
+    await _Server(app).run(host, port, sockets)
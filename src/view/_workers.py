@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from typing import TYPE_CHECKING
+
+from ._logging import Internal, Service
+from .exceptions import ConfigurationError, ViewError
+
+if TYPE_CHECKING:
+    from .app import App
+
+__all__ = ("Supervisor",)
+
+_DRAIN_TIMEOUT = 30
+_POLL_INTERVAL = 0.1
+# the delay before restarting a worker doubles for each failed start in a
+# row, and the supervisor gives up after too many
+_RESTART_DELAY = 0.5
+_MAX_RESTART_DELAY = 30
+_MAX_FAILURES = 5
+# workers that exit sooner than this after being started count as failed
+_STABLE_AFTER = 5
+
+
+def _bind(host: str, port: int, *, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+
+    return os.WEXITSTATUS(status)
+
+
+class Supervisor:
+    """Forks worker processes and keeps them alive.
+
+    When `SO_REUSEPORT` is available, each worker binds its own socket and
+    the kernel balances connections between them. Otherwise, the workers
+    all accept on a single socket created by the supervisor."""
+
+    def __init__(self, app: App) -> None:
+        if not hasattr(os, "fork"):
+            raise ConfigurationError(
+                "multiple workers are not supported on this platform",
+            )
+
+        self.app = app
+        self.workers = app.config.server.workers
+        self.host = str(app.config.server.host)
+        self.port = app.config.server.port
+        self.reuse_port = hasattr(socket, "SO_REUSEPORT")
+        # worker pids, and when they were started
+        self.children: dict[int, float] = {}
+        # when each worker waiting to be restarted is due
+        self.restarts: list[float] = []
+        self.failures = 0
+        self.closing = False
+        self._shared: socket.socket | None = None
+
+    def _serve(self) -> None:
+        sock = self._shared or _bind(self.host, self.port, reuse_port=True)
+        self.app._run(sockets=[sock])
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+
+        if pid == 0:
+            # we're in the worker
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            os.environ["_VIEW_WORKER"] = "1"
+            code = 1
+
+            try:
+                self._serve()
+                code = 0
+            finally:
+                # whatever happened, the worker mustn't return into the
+                # supervisor's code
+                if code:
+                    Service.exception("worker crashed")
+                os._exit(code)
+
+        Internal.info(f"spawned worker {pid}")
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def _shutdown(self, signum: int, _) -> None:
+        if self.closing:
+            return
+
+        Service.info(f"received signal {signum}, draining workers")
+        self._close()
+
+    def _close(self) -> None:
+        self.closing = True
+        self.restarts.clear()
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                ...
+
+    def _kill_remaining(self) -> None:
+        for pid in list(self.children):
+            Service.warning(f"worker {pid} did not exit in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                ...
+
+    def _exited(self, pid: int, status: int, started: float) -> None:
+        if self.closing:
+            Internal.info(f"worker {pid} exited")
+            return
+
+        now = time.monotonic()
+        code = _exit_code(status)
+
+        if (now - started) < _STABLE_AFTER:
+            self.failures += 1
+        else:
+            self.failures = 0
+
+        if self.failures >= _MAX_FAILURES:
+            Service.error(
+                f"worker {pid} exited with status {code}, and workers failed"
+                f" to start {self.failures} times in a row, shutting down",
+            )
+            self._close()
+            return
+
+        delay = min(
+            _RESTART_DELAY * (2 ** max(self.failures - 1, 0)),
+            _MAX_RESTART_DELAY,
+        )
+        Service.warning(
+            f"worker {pid} exited with status {code},"
+            f" restarting it in {delay:g}s",
+        )
+        self.restarts.append(now + delay)
+
+    def _reap(self) -> None:
+        # this polls instead of blocking in waitpid(), which is retried
+        # after signals, so that deadlines and restarts are never missed
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+
+            if pid == 0:
+                return
+
+            started = self.children.pop(pid, None)
+
+            if started is not None:
+                self._exited(pid, status, started)
+
+    def _restart_due(self) -> None:
+        now = time.monotonic()
+        due = [i for i in self.restarts if i <= now]
+
+        if due:
+            self.restarts = [i for i in self.restarts if i > now]
+
+            for _ in due:
+                self._spawn()
+
+    def run(self) -> None:
+        if not self.reuse_port:
+            self._shared = _bind(self.host, self.port, reuse_port=False)
+
+        # fancy mode takes over the terminal, which can't be shared
+        self.app.config.log.fancy = False
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self._shutdown)
+
+        Service.info(
+            f"starting {self.workers} workers on {self.host}:{self.port}"
+            f" ({'SO_REUSEPORT' if self.reuse_port else 'shared socket'})"
+        )
+
+        metrics_dir: str | None = None
+        if self.app.config.metrics.enabled:
+            # each worker writes its metrics here, see _metrics.py
+            metrics_dir = tempfile.mkdtemp(prefix="view-metrics-")
+            os.environ["VIEW_METRICS_DIR"] = metrics_dir
+
+        for _ in range(self.workers):
+            self._spawn()
+
+        deadline: float | None = None
+        killed = False
+
+        while self.children or self.restarts:
+            if self.closing and (not deadline):
+                deadline = time.monotonic() + _DRAIN_TIMEOUT
+
+            self._reap()
+
+            if deadline and (not killed) and (time.monotonic() > deadline):
+                self._kill_remaining()
+                killed = True
+
+            if not self.closing:
+                self._restart_due()
+
+            time.sleep(_POLL_INTERVAL)
+
+        if self._shared:
+            self._shared.close()
+
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+        Service.info("all workers closed")
+
+        if self.failures >= _MAX_FAILURES:
+            raise ViewError("workers kept failing to start, see the log")
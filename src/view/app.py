@@ -7,6 +7,8 @@ import importlib
 import inspect
 import logging
 import os
+import signal
+import socket
 import sys
 import warnings
 import weakref
@@ -15,37 +17,51 @@ from dataclasses import dataclass
 from functools import lru_cache
 from io import UnsupportedOperation
 from pathlib import Path
-from threading import Thread
+from threading import Thread, Timer
 from types import TracebackType as Traceback
-from typing import (Any, Callable, Coroutine, Generic, TextIO, TypeVar,
-                    get_type_hints, overload)
+from typing import (TYPE_CHECKING, Any, Callable, Coroutine, Generic,
+                    TextIO, TypeVar, get_type_hints, overload)
 from urllib.parse import urlencode
 
 import ujson
 import uvicorn
 from rich import print
+from rich.console import Console
 from rich.traceback import install
 from typing_extensions import Unpack
 
 from _view import ViewApp
 
+from ._cors import build_cors, check_cors
+from ._dashboard import Sampler, TopServer
 from ._docs import markdown_docs
-from ._loader import finalize, load_fs, load_patterns, load_simple
-from ._logging import (Internal, Service, UvicornHijack, enter_server,
-                       exit_server, format_warnings)
+from ._executors import ExecutorPool
+from ._loader import (finalize, format_limits, load_fs, load_patterns,
+                      load_simple)
+from ._metrics import SharedMetrics, collect, render
+from ._profiling import Profiler
+from ._logging import (AccessLog, Internal, Service, UvicornHijack,
+                       enter_server, exit_server, format_warnings, set_format)
 from ._parsers import supply_parsers
-from ._util import make_hint
+from ._util import make_hint, needs_dep
+from ._server import serve
+from ._workers import Supervisor
 from .config import Config, load_config
 from .exceptions import (BadEnvironmentError, ConfigurationError, ViewError,
                          ViewInternalError)
-from .logging import _LogArgs, log
-from .routing import Route, RouteOrCallable, V, _NoDefault, _NoDefaultType
+from .logging import _LogArgs, _LogSink, _use_sink, log
+from .routing import (RateLimit, Route, RouteOrCallable, V, _NoDefault,
+                      _NoDefaultType)
 from .routing import body as body_impl
 from .routing import delete, get, options, patch, post, put
 from .routing import query as query_impl
-from .typing import Callback, DocsType
+from .tracing import BatchExporter, OTLPJSONExporter, Tracer
+from .typing import AfterHook, BeforeHook, Callback, DocsType, ExecutorType
 from .util import enable_debug
 
+if TYPE_CHECKING:
+    from .templates import TemplateRegistry
+
 get_type_hints = lru_cache(get_type_hints)
 
 __all__ = "App", "new_app", "get_app"
@@ -90,19 +106,28 @@ class TestingContext:
     ) -> None:
         self.app = app
         self._lifespan = asyncio.Queue()
-        self._lifespan.put_nowait("lifespan.startup")
+        self._lifespan.put_nowait({"type": "lifespan.startup"})
+        self._started = asyncio.Event()
+        self._task: asyncio.Future[None] | None = None
 
     async def start(self):
         async def receive():
             return await self._lifespan.get()
 
         async def send(obj: dict[str, Any]):
-            pass
+            if obj["type"] == "lifespan.startup.complete":
+                self._started.set()
 
-        await self.app({"type": "lifespan"}, receive, send)
+        self._task = asyncio.ensure_future(
+            self.app({"type": "lifespan"}, receive, send),
+        )
+        await self._started.wait()
 
     async def stop(self):
-        await self._lifespan.put("lifespan.shutdown")
+        await self._lifespan.put({"type": "lifespan.shutdown"})
+
+        if self._task:
+            await self._task
 
     async def _request(
         self,
@@ -111,9 +136,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
         body_q = asyncio.Queue()
         start = asyncio.Queue()
+        chunks: list[str] = []
 
         async def receive():
             return {
@@ -131,7 +158,10 @@ class TestingContext:
                     )
                 )
             elif obj["type"] == "http.response.body":
-                await body_q.put(obj["body"].decode())
+                chunks.append(obj["body"].decode())
+
+                if not obj.get("more_body"):
+                    await body_q.put("".join(chunks))
             else:
                 raise ViewInternalError(f"bad type: {obj['type']}")
 
@@ -146,7 +176,10 @@ class TestingContext:
                 "query_string": urlencode(query_str).encode()
                 if query
                 else b"",  # noqa
-                "headers": [],
+                "headers": [
+                    (k.lower().encode(), v.encode())
+                    for k, v in (headers or {}).items()
+                ],
                 "method": method,
             },
             receive,
@@ -164,8 +197,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
-        return await self._request("GET", route, body=body, query=query)
+        return await self._request(
+            "GET", route, body=body, query=query, headers=headers
+        )
 
     async def post(
         self,
@@ -173,8 +209,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
-        return await self._request("POST", route, body=body, query=query)
+        return await self._request(
+            "POST", route, body=body, query=query, headers=headers
+        )
 
     async def put(
         self,
@@ -182,8 +221,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
-        return await self._request("PUT", route, body=body, query=query)
+        return await self._request(
+            "PUT", route, body=body, query=query, headers=headers
+        )
 
     async def patch(
         self,
@@ -191,8 +233,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
-        return await self._request("PATCH", route, body=body, query=query)
+        return await self._request(
+            "PATCH", route, body=body, query=query, headers=headers
+        )
 
     async def delete(
         self,
@@ -200,8 +245,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
-        return await self._request("DELETE", route, body=body, query=query)
+        return await self._request(
+            "DELETE", route, body=body, query=query, headers=headers
+        )
 
     async def options(
         self,
@@ -209,8 +257,11 @@ class TestingContext:
         *,
         body: dict[str, Any] | None = None,
         query: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> TestingResponse:
-        return await self._request("OPTIONS", route, body=body, query=query)
+        return await self._request(
+            "OPTIONS", route, body=body, query=query, headers=headers
+        )
 
 
 @dataclass
@@ -245,6 +296,42 @@ class App(ViewApp):
         self._docs: DocsType = {}
         self.loaded_routes: list[Route] = []
         self.templaters: dict[str, Any] = {}
+        self._templates: TemplateRegistry | None = None
+        self._access_log: AccessLog | None = None
+        self._shared_metrics: SharedMetrics | None = None
+        self._tracer: Tracer | None = None
+        self.executors = ExecutorPool(config.executor)
+        self._startup_hooks: list[Callback] = []
+        self._cleanup_hooks: list[Callback] = []
+        self._before_hooks: list[BeforeHook] = []
+        self._after_hooks: list[AfterHook] = []
+        self._set_lifespan(self._startup, self._cleanup)
+
+        self._log_sink = _LogSink(
+            queue_size=config.log.user.queue_size,
+            max_bytes=config.log.user.max_bytes,
+            backup_count=config.log.user.backup_count,
+        )
+        _use_sink(self._log_sink)
+
+        set_format(config.log.format)
+        if config.metrics.enabled:
+            self._enable_metrics()
+
+        if config.tracing.enabled:
+            self.set_tracer(
+                Tracer(
+                    BatchExporter(
+                        OTLPJSONExporter(
+                            config.tracing.file,
+                            service_name=config.tracing.service_name,
+                        ),
+                        batch_size=config.tracing.batch_size,
+                        interval=config.tracing.interval,
+                    ),
+                    sample_rate=config.tracing.sample_rate,
+                )
+            )
 
         Service.log.setLevel(
             config.log.level
@@ -309,6 +396,139 @@ class App(ViewApp):
             )
         )
 
+    def _startup(self) -> None:
+        Internal.info("running startup hooks")
+        self.executors.start(
+            {r.executor for r in self.loaded_routes if r.executor},
+        )
+
+        if self.config.templates.preload:
+            from .templates import preload
+
+            preload(self)
+
+        for hook in self._startup_hooks:
+            hook()
+
+    def _cleanup(self) -> None:
+        Internal.info("running cleanup hooks")
+        for hook in self._cleanup_hooks:
+            hook()
+
+        self.executors.shutdown()
+        self._log_sink.flush()
+
+    def on_startup(self, hook: Callback) -> Callback:
+        """Register a function to be called when the server starts."""
+        self._startup_hooks.append(hook)
+        return hook
+
+    def on_cleanup(self, hook: Callback) -> Callback:
+        """Register a function to be called when the server shuts down."""
+        self._cleanup_hooks.append(hook)
+        return hook
+
+    def middleware(
+        self,
+        before: BeforeHook | None = None,
+        after: AfterHook | None = None,
+    ) -> None:
+        """Register hooks that run around every request.
+
+        `before` is called with the ASGI scope before the route is looked up.
+        If it returns `None`, the request continues as usual, and anything
+        else is sent as the response instead (the same as a route's return
+        value). It may be async.
+
+        `after` is called with the scope and the `http.response.start`
+        message of every response, including errors, before it's sent. It
+        can change the `status`, or add to the `headers`. It can't be async.
+
+        Hooks run in the order they were registered, and are called directly
+        by view's C extension. Without any hooks, requests skip them entirely.
+        """
+        if after and inspect.iscoroutinefunction(after):
+            raise TypeError("after hooks cannot be async")
+
+        if before:
+            self._before_hooks.append(before)
+
+        if after:
+            self._after_hooks.append(after)
+
+        if self.loaded:
+            self._load_middleware()
+
+    def _load_middleware(self) -> None:
+        self._set_middleware(
+            tuple(self._before_hooks),
+            tuple(self._after_hooks),
+        )
+
+    def cors(
+        self,
+        origins: list[str] | None = None,
+        *,
+        headers: list[str] | None = None,
+        expose_headers: list[str] | None = None,
+        credentials: bool | None = None,
+        max_age: int | None = None,
+    ) -> None:
+        """Enable CORS, overriding any of the `cors` settings in the config.
+
+        The preflight response for each route is built when the app is loaded,
+        and preflight requests are answered by view's C extension without
+        calling any routes or middleware. Responses to allowed origins get the
+        `Access-Control-*` headers added to them.
+        """
+        config = self.config.cors
+        check_cors(
+            config.origins if origins is None else origins,
+            config.credentials if credentials is None else credentials,
+        )
+        config.enabled = True
+
+        if origins is not None:
+            config.origins = origins
+
+        if headers is not None:
+            config.headers = headers
+
+        if expose_headers is not None:
+            config.expose_headers = expose_headers
+
+        if credentials is not None:
+            config.credentials = credentials
+
+        if max_age is not None:
+            config.max_age = max_age
+
+        if self.loaded:
+            self._load_cors()
+
+    def _load_cors(self) -> None:
+        self._set_cors(*build_cors(self.config.cors, self.loaded_routes))
+
+    def _load_limits(self) -> None:
+        config = self.config.limits
+
+        try:
+            rate_limit = (
+                RateLimit(config.rate, config.burst, config.per_client)
+                if config.rate is not None
+                else None
+            )
+        except ValueError as e:
+            raise ConfigurationError(f"invalid limits: {e}") from e
+
+        if (config.max_in_flight is not None) and (config.max_in_flight < 1):
+            raise ConfigurationError("max_in_flight must be at least 1")
+
+        limits = format_limits(rate_limit, config.max_in_flight)
+
+        if limits:
+            self._set_limits(limits)
+
     def _push_route(self, route: Route) -> None:
         if route in self._manual_routes:
             return
@@ -321,38 +541,150 @@ class App(ViewApp):
         doc: str | None,
         cache_rate: int,
         target: Callable[..., Any],
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
         # i dont really feel like typing this properly
     ) -> Callable[[RouteOrCallable], Route]:
         def inner(route: RouteOrCallable) -> Route:
-            new_route = target(path, doc, cache_rate=cache_rate)(route)
+            new_route = target(
+                path,
+                doc,
+                cache_rate=cache_rate,
+                executor=executor,
+                rate_limit=rate_limit,
+                max_in_flight=max_in_flight,
+            )(route)
             self._push_route(new_route)
             return new_route
 
         return inner
 
-    def get(self, path: str, doc: str | None = None, *, cache_rate: int = -1):
+    def get(
+        self,
+        path: str,
+        doc: str | None = None,
+        *,
+        cache_rate: int = -1,
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Set a GET route."""
-        return self._method_wrapper(path, doc, cache_rate, get)
+        return self._method_wrapper(
+            path,
+            doc,
+            cache_rate,
+            get,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
-    def post(self, path: str, doc: str | None = None, *, cache_rate: int = -1):
+    def post(
+        self,
+        path: str,
+        doc: str | None = None,
+        *,
+        cache_rate: int = -1,
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Set a POST route."""
-        return self._method_wrapper(path, doc, cache_rate, post)
+        return self._method_wrapper(
+            path,
+            doc,
+            cache_rate,
+            post,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
-    def delete(self, path: str, doc: str | None = None, *, cache_rate: int = -1):
+    def delete(
+        self,
+        path: str,
+        doc: str | None = None,
+        *,
+        cache_rate: int = -1,
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Set a DELETE route."""
-        return self._method_wrapper(path, doc, cache_rate, delete)
+        return self._method_wrapper(
+            path,
+            doc,
+            cache_rate,
+            delete,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
-    def patch(self, path: str, doc: str | None = None, *, cache_rate: int = -1,):
+    def patch(
+        self,
+        path: str,
+        doc: str | None = None,
+        *,
+        cache_rate: int = -1,
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Set a PATCH route."""
-        return self._method_wrapper(path, doc, cache_rate, patch)
+        return self._method_wrapper(
+            path,
+            doc,
+            cache_rate,
+            patch,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
-    def put(self, path: str, doc: str | None = None, *, cache_rate: int = -1):
+    def put(
+        self,
+        path: str,
+        doc: str | None = None,
+        *,
+        cache_rate: int = -1,
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Set a PUT route."""
-        return self._method_wrapper(path, doc, cache_rate, put)
+        return self._method_wrapper(
+            path,
+            doc,
+            cache_rate,
+            put,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
-    def options(self, path: str, doc: str | None = None, *, cache_rate: int = -1):
+    def options(
+        self,
+        path: str,
+        doc: str | None = None,
+        *,
+        cache_rate: int = -1,
+        executor: ExecutorType | None = None,
+        rate_limit: RateLimit | float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Set a OPTIONS route."""
-        return self._method_wrapper(path, doc, cache_rate, options)
+        return self._method_wrapper(
+            path,
+            doc,
+            cache_rate,
+            options,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
     def _set_log_arg(self, kwargs: _LogArgs, key: str) -> None:
         if key not in kwargs:
@@ -464,6 +796,22 @@ class App(ViewApp):
         else:
             finalize([*(routes or ()), *self._manual_routes], self)
 
+        if self.config.metrics.enabled:
+            # it may have been enabled after the app was created
+            self._enable_metrics()
+
+            if self.config.metrics.endpoint:
+                finalize(
+                    [self._metrics_route(self.config.metrics.endpoint)],
+                    self,
+                )
+
+        self._load_middleware()
+
+        if self.config.cors.enabled:
+            self._load_cors()
+
+        self._load_limits()
         self.loaded = True
 
         for r in self.loaded_routes:
@@ -483,6 +831,69 @@ class App(ViewApp):
                 r.doc or "No description provided.", body, query
             )
 
+    def _metrics_route(self, path: str) -> Route:
+        async def metrics():
+            return (
+                self.metrics(),
+                200,
+                {"content-type": "text/plain; version=0.0.4; charset=utf-8"},
+            )
+
+        return get(path, "Prometheus metrics for each route.")(metrics)
+
+    def metrics(self) -> str:
+        """Get the metrics for each route in the Prometheus text format.
+
+        With multiple workers, this includes the metrics of every worker."""
+        if not self.config.metrics.enabled:
+            raise ConfigurationError("metrics are not enabled")
+
+        return render(collect(self))
+
+    def set_profiler(
+        self,
+        profiler: Callable[[str, str, int, tuple[int, ...]], Any] | None,
+        *,
+        every: int = 1,
+    ) -> None:
+        """Call a function with the phase timestamps of every `every` requests.
+
+        The profiler is called after the response has been sent, with the
+        method, the route's path (such as `/users/{id}`, or `<no route>` for
+        requests that didn't match one), status, and a tuple of monotonic timestamps (in
+        nanoseconds) for when the request came in, its route was matched, its
+        body was received, its inputs were parsed, its handler returned, and
+        its response was sent. Phases that were skipped are `0`.
+
+        Pass `None` to stop profiling."""
+        self._set_profiler(profiler, every)
+
+    def set_tracer(self, tracer: Tracer | None) -> None:
+        """Create a span for each request, using the given tracer.
+
+        Spans are named after the route (such as `GET /users/{id}`) rather
+        than the requested path, and are ended once the response has been
+        sent. Pass `None` to stop tracing."""
+        if self._tracer and (self._tracer is not tracer):
+            self._tracer.shutdown()
+
+        self._tracer = tracer
+        self._set_tracer(tracer)
+
+    def _start_profiling(self, spec: str) -> Profiler:
+        duration, every = spec.split(":")
+        profiler = Profiler()
+        self.set_profiler(profiler, every=int(every))
+        Service.info(
+            f"profiling 1 in {every} requests for {duration} seconds",
+        )
+
+        # stop the server the same way ctrl+c would
+        timer = Timer(float(duration), signal.raise_signal, (signal.SIGINT,))
+        timer.daemon = True
+        timer.start()
+        return profiler
+
     async def _spawn(self, coro: Coroutine[Any, Any, Any]):
         Internal.info(f"using event loop: {asyncio.get_event_loop()}")
         Internal.info(f"spawning {coro}")
@@ -499,43 +910,140 @@ class App(ViewApp):
             else:
                 Internal.info("hijacking hypercorn")
 
-        if self.config.log.fancy:
-            if not self.config.log.hijack:
-                raise ConfigurationError(
-                    "hijack must be enabled for fancy mode"
-                )
+        fancy = self.config.log.fancy and (self.config.log.format != "json")
+
+        if fancy and (not self.config.log.hijack):
+            raise ConfigurationError("hijack must be enabled for fancy mode")
+
+        top_socket = self.config.log.top_socket
+        sampler: Sampler | None = None
+
+        if fancy or top_socket:
+            # route throughput and latency on the dashboard come from here
+            self._enable_metrics()
+
+            if top_socket and os.environ.get("_VIEW_WORKER"):
+                # every worker has its own socket
+                top_socket = f"{top_socket}.{os.getpid()}"
 
-            enter_server()
+            sampler = Sampler(
+                self,
+                server=TopServer(top_socket) if top_socket else None,
+            )
+
+        if fancy:
+            assert sampler
+            enter_server(sampler)
+
+        if sampler:
+            sampler.start()
+
+        if self.config.log.access_log:
+            if not self._access_log:
+                self._enable_access_log(self.config.log.access_log_size)
+                self._access_log = AccessLog(self)
+
+            self._access_log.start()
+
+        if self.config.metrics.enabled:
+            self._shared_metrics = SharedMetrics(self)
+            self._shared_metrics.start()
+
+        profile = os.environ.get("_VIEW_PROFILE")
+        profiler = self._start_profiling(profile) if profile else None
 
         self.running = True
         Internal.debug("here we go!")
-        await task
-        self.running = False
 
-        if self.config.log.fancy:
+        try:
+            await task
+        finally:
+            self.running = False
+
+            if self._access_log:
+                self._access_log.stop()
+
+            if self._shared_metrics:
+                self._shared_metrics.stop()
+
+            if sampler:
+                sampler.stop()
+
+            if self._tracer:
+                self._tracer.shutdown()
+
+            if profiler:
+                self.set_profiler(None)
+                # sys.stdout may still be hijacked, so it isn't used
+                Console(file=sys.__stdout__).print(profiler.report())
+
+        if fancy:
             exit_server()
 
         Internal.info("server closed")
 
-    def _run(self, start_target: Callable[..., Any] | None = None) -> Any:
-        self.load()
-        Internal.info("starting server!")
-        server = self.config.server.backend
-        uvloop_enabled = False
-
-        if self.config.app.uvloop is True:
-            uvloop = importlib.import_module("uvloop")
-            uvloop.install()
-            uvloop_enabled = True
-        elif self.config.app.uvloop == "decide":
-            with suppress(ModuleNotFoundError):
+    def _select_stack(self) -> tuple[str, str]:
+        """Install uvloop (if enabled) and pick the HTTP parser.
+
+        Returns the names of the event loop and the HTTP implementation."""
+        loop = "asyncio"
+        use_uvloop = self.config.app.uvloop
+
+        if use_uvloop is not False:
+            try:
                 uvloop = importlib.import_module("uvloop")
+            except ModuleNotFoundError as e:
+                if use_uvloop is True:
+                    needs_dep("uvloop", e, "fast")
+            else:
                 uvloop.install()
-                uvloop_enabled = True
+                loop = "uvloop"
+
+        if self.config.server.backend == "view":
+            return loop, "the native parser"
+
+        http = self.config.server.extra_args.get("http")
+
+        if not http:
+            try:
+                importlib.import_module("httptools")
+                http = "httptools"
+            except ModuleNotFoundError:
+                http = "h11"
+
+        return loop, http
+
+    def _run(
+        self,
+        start_target: Callable[..., Any] | None = None,
+        *,
+        sockets: list[socket.socket] | None = None,
+    ) -> Any:
+        if not self.loaded:
+            self.load()
+
+        if (
+            (self.config.server.workers > 1)
+            and (not start_target)
+            and (sockets is None)
+        ):
+            return Supervisor(self).run()
+
+        Internal.info("starting server!")
+        server = self.config.server.backend
+        loop, http = self._select_stack()
+        Service.info(f"using {server} with the {loop} event loop and {http}")
 
         start = start_target or asyncio.run
 
         if server == "uvicorn":
+            # access logs are recorded by _view instead
+            args: dict[str, Any] = {
+                "loop": loop,
+                "http": http,
+                "access_log": False,
+            }
+            args.update(self.config.server.extra_args)
             config = uvicorn.Config(
                 self._app,
                 port=self.config.server.port,
@@ -544,12 +1052,11 @@ class App(ViewApp):
                 lifespan="on",
                 factory=False,
                 interface="asgi3",
-                loop="uvloop" if uvloop_enabled else "asyncio",
-                **self.config.server.extra_args,
+                **args,
             )
             server = uvicorn.Server(config)
 
-            return start(self._spawn(server.serve()))
+            return start(self._spawn(server.serve(sockets=sockets)))
 
         elif server == "hypercorn":
             raise NotImplementedError
@@ -567,8 +1074,19 @@ class App(ViewApp):
                     self._app, conf
                 )
             )
+        elif server == "view":
+            return start(
+                self._spawn(
+                    serve(
+                        self,
+                        host=str(self.config.server.host),
+                        port=self.config.server.port,
+                        sockets=sockets,
+                    )
+                )
+            )
         else:
-            raise NotImplementedError("viewserver is not implemented yet")
+            raise NotImplementedError(f"unknown backend: {server}")
 
     def run(self, *, fancy: bool | None = None) -> None:
         """Run the app."""
@@ -625,6 +1143,7 @@ class App(ViewApp):
         """Open the testing context."""
         self.load()
         ctx = TestingContext(self.asgi_app_entry)
+        await ctx.start()
         try:
             yield ctx
         finally:
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import ast
+import hashlib
 import inspect
+import os
 from abc import ABC, abstractmethod
 from pathlib import Path
 from types import CodeType as Code
 from types import FrameType as Frame
 from types import ModuleType
-from typing import Any, Callable, Dict, Union
+from typing import Any, Awaitable, Callable, Dict, Tuple, Union
 
 from .__about__ import __version__
+from ._logging import Internal
 
 SourceCodeLike = Union[str, Code, Frame, Callable[..., Any], ModuleType]
 
@@ -600,44 +603,134 @@ return {B_OPEN}
         return source
 
 
-def _compile(data: str, lock_namespace: bool) -> str:
-    mod = ast.parse(data)
-    print(ast.dump(mod, indent=4))
-    result = _Compiler.compile_mod(mod)
+_MAX_CACHED = 256
+_cache: dict[str, str] = {}
 
-    if not lock_namespace:
+
+def _cache_key(data: str, lock_namespace: bool) -> str:
+    return hashlib.sha256(
+        f"{__version__}:{int(lock_namespace)}\n{data}".encode(
+            errors="surrogateescape",
+        ),
+    ).hexdigest()
+
+
+def _compile(
+    data: str,
+    lock_namespace: bool,
+    cache: Path | None = None,
+) -> str:
+    key = _cache_key(data, lock_namespace)
+    result = _cache.get(key)
+
+    if result is not None:
         return result
 
-    return "(() => {" + result + "})();"
+    path = (cache / f"{key}.js") if cache else None
+
+    if path:
+        try:
+            result = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            ...
+
+    if result is None:
+        mod = ast.parse(data)
+        if os.environ.get("VIEW_DEBUG") == "1":
+            Internal.debug(ast.dump(mod, indent=4))
+
+        result = _Compiler.compile_mod(mod)
 
+        if lock_namespace:
+            result = "(() => {" + result + "})();"
 
-def compile(source: SourceCodeLike, *, lock_namespace: bool = False) -> str:
+        if path:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # write then rename, so other processes never see a partial file
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                tmp.write_text(result, encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError:
+                ...
+
+    if len(_cache) >= _MAX_CACHED:
+        # drop the oldest entry
+        del _cache[next(iter(_cache))]
+
+    _cache[key] = result
+    return result
+
+
+def _read_source(source: SourceCodeLike) -> str:
     if isinstance(source, str):
-        return _compile(source, lock_namespace)
+        return source
 
     if isinstance(source, Code):
-        return _compile(
-            Path(source.co_filename).read_text(encoding="utf-8"),
-            lock_namespace,
-        )
+        return Path(source.co_filename).read_text(encoding="utf-8")
 
     if isinstance(source, Frame):
-        return _compile(
-            Path(source.f_code.co_filename).read_text(encoding="utf-8"),
-            lock_namespace,
-        )
+        return Path(source.f_code.co_filename).read_text(encoding="utf-8")
 
     if isinstance(source, ModuleType):
         if not source.__file__:
             raise TypeError(f"{source!r} has no __file__")
-        return _compile(
-            Path(source.__file__).read_text(encoding="utf-8"), lock_namespace
-        )
+        return Path(source.__file__).read_text(encoding="utf-8")
 
     if callable(source):
-        return _compile(inspect.getsource(source), lock_namespace)
+        return inspect.getsource(source)
 
     raise TypeError(
         "expected a string, code, frame, module, or callable"
         f" object, but got {source!r}"
     )
+
+
+def compile(
+    source: SourceCodeLike,
+    *,
+    lock_namespace: bool = False,
+    cache: str | Path | None = None,
+) -> str:
+    """Compile Python source to JavaScript.
+
+    Results are cached in memory by a hash of the source. If `cache` is a
+    directory, results are also stored there, so they survive restarts."""
+    return _compile(
+        _read_source(source),
+        lock_namespace,
+        Path(cache) if cache else None,
+    )
+
+
+_ScriptRoute = Callable[[], Awaitable[Tuple[str, int, Dict[str, str]]]]
+
+
+def script(
+    source: SourceCodeLike,
+    *,
+    lock_namespace: bool = True,
+    cache: str | Path | None = None,
+    max_age: int = 31536000,
+) -> _ScriptRoute:
+    """Compile `source` once, and get a route that serves the result.
+
+    The response has an `ETag` of the compiled script's hash, along with a
+    `Cache-Control` header allowing browsers to cache it for `max_age` seconds.
+
+    Example:
+        ```py
+        app.get("/helpers.js")(script(helpers))
+        ```"""
+    js = compile(source, lock_namespace=lock_namespace, cache=cache)
+    etag = f'"{hashlib.sha256(js.encode()).hexdigest()[:32]}"'
+    headers = {
+        "content-type": "text/javascript",
+        "etag": etag,
+        "cache-control": f"public, max-age={max_age}, immutable",
+    }
+
+    async def compiled_script():
+        return js, 200, headers
+
+    return compiled_script
@@ -1,14 +1,91 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Literal
+import functools
+from html import escape
+from typing import Any, Callable, Dict, Literal, overload
 
-from typing_extensions import NotRequired, TypedDict, Unpack
+from typing_extensions import NotRequired, ParamSpec, TypedDict, Unpack
+
+_P = ParamSpec("_P")
+
+
+# elements whose text content can't contain character references
+_RAW_TEXT = frozenset(("script", "style"))
 
 
 class DOMNode:
-    def __init__(self, data: str | DOMNode) -> None:
-        self.data = str(data)
-        self.compiler_ready = False
+    """An HTML element. Nodes hold their children instead of rendering them
+    right away, so the whole tree is serialized in a single pass when it's
+    converted to a string.
+
+    Passing a string creates a node containing that markup as-is."""
+
+    __slots__ = ("name", "attrs", "children")
+
+    def __init__(
+        self,
+        data: str | DOMNode | None = None,
+        *,
+        name: str | None = None,
+        attrs: str = "",
+        children: tuple[Any, ...] = (),
+    ) -> None:
+        if data is not None:
+            # raw markup, this isn't escaped
+            self.name = None
+            self.attrs = ""
+            self.children: tuple[Any, ...] = (str(data),)
+        else:
+            self.name = name
+            self.attrs = attrs
+            self.children = children
+
+    @property
+    def data(self) -> str:
+        """The rendered HTML."""
+        out: list[str] = []
+        append = out.append
+        # closing tags and separators go on the stack as plain strings,
+        # so this doesn't recurse on deep trees
+        stack: list[Any] = [self]
+        pop = stack.pop
+        push = stack.append
+
+        while stack:
+            item = pop()
+
+            if item.__class__ is str:
+                append(item)
+                continue
+
+            if item.name is None:
+                append(item.children[0])
+                continue
+
+            name = item.name
+            children = item.children
+            raw = name in _RAW_TEXT
+
+            if (len(children) == 1) and (children[0].__class__ is str):
+                # elements with just text (the common case) are written directly
+                text = children[0] if raw else escape(children[0])
+                append(f"<{name}{item.attrs}>{text}</{name}>")
+                continue
+
+            append(f"<{name}{item.attrs}>")
+            push(f"</{name}>")
+
+            for i in range(len(children) - 1, -1, -1):
+                child = children[i]
+                if isinstance(child, DOMNode):
+                    push(child)
+                else:
+                    push(str(child) if raw else escape(str(child)))
+
+                if i:
+                    push(NEWLINE)
+
+        return "".join(out)
 
     def __str__(self) -> str:
         return self.data
@@ -42,40 +119,116 @@ class GlobalAttributes(TypedDict):
 NEWLINE = "\n"
 
 
+def _attribute(key: str, value: Any) -> str:
+    if value is None:
+        return ""
+
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+
+    key = key.replace("_", "-")
+    if value == "":
+        return f" {key}"
+
+    return f' {key}="{escape(str(value))}"'
+
+
+@overload
+def static_component(
+    func: Callable[_P, DOMNode],
+) -> Callable[_P, DOMNode]:
+    ...
+
+
+@overload
+def static_component(
+    *,
+    maxsize: int = 128,
+) -> Callable[[Callable[_P, DOMNode]], Callable[_P, DOMNode]]:
+    ...
+
+
+def static_component(
+    func: Callable[_P, DOMNode] | None = None,
+    *,
+    maxsize: int = 128,
+) -> Any:
+    """Cache the rendered HTML of a component.
+
+    The component is rendered once for each set of arguments, and later calls
+    return the cached markup, which is copied straight into the output.
+    Calls with unhashable arguments aren't cached.
+
+    Args:
+        maxsize: The maximum number of argument sets to keep."""
+
+    def decorator(target: Callable[_P, DOMNode]) -> Callable[_P, DOMNode]:
+        cache: dict[Any, DOMNode] = {}
+
+        @functools.wraps(target)
+        def inner(*args: _P.args, **kwargs: _P.kwargs) -> DOMNode:
+            key = (args, tuple(kwargs.items())) if kwargs else args
+
+            try:
+                node = cache.get(key)
+            except TypeError:
+                return target(*args, **kwargs)
+
+            if node is None:
+                result = target(*args, **kwargs)
+                node = DOMNode(
+                    result.data
+                    if isinstance(result, DOMNode)
+                    else escape(str(result))
+                )
+
+                if len(cache) >= maxsize:
+                    # drop the oldest entry
+                    del cache[next(iter(cache))]
+
+                cache[key] = node
+
+            return node
+
+        inner.cache_clear = cache.clear  # type: ignore
+        return inner
+
+    if func:
+        return decorator(func)
+
+    return decorator
+
+
 def _node(
     name: str,
-    text: tuple[str | DOMNode],
+    text: tuple[str | DOMNode, ...],
     attrs: dict[str, Any],
     kwargs: GlobalAttributes,
 ) -> DOMNode:
-    attributes: dict[str, str | None] = {**kwargs, **attrs}
+    attr_str = ""
+    cls = None
+    data = None
 
-    cls = kwargs.get("cls")
-    if cls:
-        attributes["class"] = cls
-        kwargs.pop("cls")
-        attributes.pop("cls")
     for k, v in kwargs.items():
-        if isinstance(v, bool):
-            attributes[k] = "true" if v else "false"
+        if k == "cls":
+            cls = v
+        elif k == "data":
+            data = v
+        elif k not in attrs:
+            attr_str += _attribute(k, v)
 
-    for k, v in (kwargs.get("data") or {}).items():
-        attributes[f"data-{k}"] = v
+    for k, v in attrs.items():
+        if v is not None:
+            attr_str += _attribute(k, v)
 
-    attr_str = ""
+    if cls:
+        attr_str += _attribute("class", cls)
 
-    for k, v in attributes.items():
-        if v is None:
-            continue
+    if data:
+        for k, v in data.items():
+            attr_str += _attribute(f"data-{k}", v)
 
-        k = k.replace("_", "-")
-        if v:
-            attr_str += f" {k}={v!r}"
-        else:
-            attr_str += f" {k}"
-    return DOMNode(
-        f"<{name}{attr_str}>{NEWLINE.join([str(i) for i in text])}</{name}>",
-    )
+    return DOMNode(name=name, attrs=attr_str, children=text)
 
 
 def a(
@@ -2000,6 +2153,8 @@ def js(url: str) -> DOMNode:
 
 
 __all__ = (
+    "DOMNode",
+    "static_component",
     "a",
     "abbr",
     "acronym",
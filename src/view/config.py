@@ -4,7 +4,7 @@ import importlib.util
 import sys
 from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Any, Dict, Literal, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from configzen import ConfigField, ConfigModel, field_validator
 
@@ -39,10 +39,17 @@ class AppConfig(ConfigModel, env_prefix="view_app_"):
 class ServerConfig(ConfigModel, env_prefix="view_server_"):
     host: IPv4Address = IPv4Address("0.0.0.0")
     port: int = 5000
-    backend: Literal["uvicorn"] = "uvicorn"
+    backend: Literal["uvicorn", "view"] = "uvicorn"
+    workers: int = 1
     extra_args: Dict[str, Any] = ConfigField(default_factory=dict)
 
 
+class ExecutorConfig(ConfigModel, env_prefix="view_executor_"):
+    thread_workers: Optional[int] = None
+    process_workers: Optional[int] = None
+    max_queue: int = 64
+
+
 class UserLogConfig(ConfigModel, env_prefix="view_user_log_"):
     urgency: Urgency = "info"
     log_file: Union[Path, str, None] = None
@@ -52,6 +59,9 @@ class UserLogConfig(ConfigModel, env_prefix="view_user_log_"):
     show_urgency: bool = True
     file_write: FileWriteMethod = "both"
     strftime: str = "%H:%M:%S"
+    queue_size: int = 1024
+    max_bytes: int = 0
+    backup_count: int = 3
 
 
 class LogConfig(ConfigModel, env_prefix="view_log_"):
@@ -59,11 +69,45 @@ class LogConfig(ConfigModel, env_prefix="view_log_"):
         Literal["debug", "info", "warning", "error", "critical"], int
     ] = "info"
     hijack: bool = True
+    format: Literal["rich", "json"] = "rich"
+    access_log: bool = True
+    access_log_size: int = 4096
     fancy: bool = True
+    top_socket: Optional[str] = None
     pretty_tracebacks: bool = True
     user: UserLogConfig = ConfigField(default_factory=UserLogConfig)
 
 
+class MetricsConfig(ConfigModel, env_prefix="view_metrics_"):
+    enabled: bool = False
+    endpoint: Optional[str] = "/metrics"
+
+
+class TracingConfig(ConfigModel, env_prefix="view_tracing_"):
+    enabled: bool = False
+    service_name: str = "view"
+    sample_rate: float = 1.0
+    file: Optional[str] = None
+    batch_size: int = 512
+    interval: float = 5.0
+
+
+class CorsConfig(ConfigModel, env_prefix="view_cors_"):
+    enabled: bool = False
+    origins: List[str] = ConfigField(default_factory=lambda: ["*"])
+    headers: List[str] = ConfigField(default_factory=lambda: ["*"])
+    expose_headers: List[str] = ConfigField(default_factory=list)
+    credentials: bool = False
+    max_age: int = 600
+
+
+class LimitsConfig(ConfigModel, env_prefix="view_limits_"):
+    rate: Optional[float] = None
+    burst: Optional[int] = None
+    per_client: bool = False
+    max_in_flight: Optional[int] = None
+
+
 class MongoConfig(ConfigModel, env_prefix="view_mongo_"):
     host: IPv4Address
     port: int
@@ -104,13 +148,19 @@ class TemplatesConfig(ConfigModel, env_prefix="view_templates_"):
     locals: bool = True
     globals: bool = True
     engine: TemplateEngine = "view"
+    preload: bool = False
 
 
 class Config(ConfigModel):
     dev: bool = True
     app: AppConfig = ConfigField(default_factory=AppConfig)
     server: ServerConfig = ConfigField(default_factory=ServerConfig)
+    executor: ExecutorConfig = ConfigField(default_factory=ExecutorConfig)
     log: LogConfig = ConfigField(default_factory=LogConfig)
+    metrics: MetricsConfig = ConfigField(default_factory=MetricsConfig)
+    tracing: TracingConfig = ConfigField(default_factory=TracingConfig)
+    cors: CorsConfig = ConfigField(default_factory=CorsConfig)
+    limits: LimitsConfig = ConfigField(default_factory=LimitsConfig)
     templates: TemplatesConfig = ConfigField(default_factory=TemplatesConfig)
 
 
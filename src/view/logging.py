@@ -1,23 +1,29 @@
 from __future__ import annotations
 
+import atexit
 import inspect
+import os
+import queue
 import sys
+import weakref
 from datetime import datetime as DateTime
 from pathlib import Path
+from threading import Lock, Thread
 from types import FrameType as Frame
-from typing import TextIO, TypedDict
+from typing import IO, NamedTuple, TextIO, TypedDict
 
 from rich.console import Console
+from rich.errors import MarkupError
 from typing_extensions import NotRequired, Unpack
 
-from ._logging import _QUEUE, QueueItem
+from ._logging import Service
 from .typing import FileWriteMethod
 from .typing import LogLevel as Urgency
 
 __all__ = (
     "log",
     "Urgency",
-    "log",
+    "flush",
     "debug",
     "info",
     "warning",
@@ -39,6 +45,213 @@ _URGENCY_COLORS: dict[str, str] = {
 }
 
 
+class _Record(NamedTuple):
+    message: str
+    file_out: TextIO | None
+    log_file: Path | TextIO | None
+    show_color: bool
+
+
+class _LogSink:
+    """Writes user log messages from a background thread.
+
+    Messages are put on a bounded queue, and are dropped (and counted) if it's
+    full, so logging never blocks a route. Log files are opened once and kept
+    open, and are optionally rotated once they reach `max_bytes`.
+
+    Each app owns a sink, made from its config. Messages logged before an
+    app is created go to a default one."""
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = 1024,
+        max_bytes: int = 0,
+        backup_count: int = 3,
+    ) -> None:
+        self.queue: queue.Queue[_Record | None] = queue.Queue(queue_size)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._thread: Thread | None = None
+        self._lock = Lock()
+        self._files: dict[Path, IO[str]] = {}
+        self._consoles: dict[int, tuple[IO[str], Console]] = {}
+        _SINKS.add(self)
+
+    def _before_fork(self) -> None:
+        # anything still buffered would be written again by the child
+        for file in list(self._files.values()):
+            file.flush()
+
+    def _after_fork(self) -> None:
+        # the writer thread doesn't exist in the child, and the queue and lock
+        # may have been in use by it when the process forked
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.dropped = 0
+        self._thread = None
+        self._lock = Lock()
+
+    def put(self, record: _Record) -> None:
+        if not self._thread:
+            with self._lock:
+                if not self._thread:
+                    self._thread = Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _console(self, file: IO[str]) -> Console:
+        cached = self._consoles.get(id(file))
+        # the file is kept in the cache too, so its id can't be reused
+        if cached and (cached[0] is file):
+            return cached[1]
+
+        console = Console(file=file)
+        self._consoles[id(file)] = (file, console)
+        return console
+
+    def _rotate(self, path: Path) -> None:
+        self._files.pop(path).close()
+        self._consoles = {
+            k: v for k, v in self._consoles.items() if not v[0].closed
+        }
+
+        for i in range(self.backup_count - 1, 0, -1):
+            source = path.with_name(f"{path.name}.{i}")
+            if source.exists():
+                os.replace(source, path.with_name(f"{path.name}.{i + 1}"))
+
+        if self.backup_count:
+            os.replace(path, path.with_name(f"{path.name}.1"))
+        else:
+            path.unlink()
+
+    def _write_file(self, record: _Record) -> None:
+        target = record.log_file
+        assert target
+
+        if not isinstance(target, Path):
+            self._console(target).print(
+                record.message,
+                markup=record.show_color,
+                highlight=record.show_color,
+            )
+            return
+
+        file = self._files.get(target)
+        if not file:
+            file = open(target, "a", encoding="utf-8")
+            self._files[target] = file
+
+        self._console(file).print(
+            record.message,
+            markup=record.show_color,
+            highlight=record.show_color,
+        )
+
+        if self.max_bytes and (file.tell() >= self.max_bytes):
+            self._rotate(target)
+
+    def _write(self, record: _Record) -> None:
+        if record.file_out:
+            self._console(record.file_out).print(
+                record.message,
+                markup=record.show_color,
+                highlight=record.show_color,
+            )
+
+        if record.log_file:
+            self._write_file(record)
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get()
+
+            try:
+                if record is None:
+                    return
+
+                self._write(record)
+
+                if self.dropped and self.queue.empty():
+                    dropped = self.dropped
+                    self.dropped = 0
+                    Service.warning(
+                        f"log queue was full, dropped {dropped} messages",
+                    )
+            except (OSError, ValueError, MarkupError) as e:
+                # there's nowhere else to report it
+                print(f"failed to write log message: {e!r}", file=sys.__stderr__)
+            finally:
+                self.queue.task_done()
+
+    def flush(self) -> None:
+        """Wait for all queued messages to be written."""
+        if self._thread:
+            self.queue.join()
+
+        for file in self._files.values():
+            file.flush()
+
+    def close(self) -> None:
+        """Write all queued messages, then stop the writer and close files."""
+        with self._lock:
+            if self._thread:
+                self.queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+        for file in self._files.values():
+            file.close()
+
+        self._files.clear()
+        self._consoles.clear()
+
+
+_SINKS: weakref.WeakSet[_LogSink] = weakref.WeakSet()
+
+
+def _before_fork() -> None:
+    for sink in _SINKS:
+        sink._before_fork()
+
+
+def _after_fork_in_child() -> None:
+    for sink in _SINKS:
+        sink._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_child=_after_fork_in_child,
+    )
+
+# the sink that log() writes to, which is replaced by the latest app's
+_sink = _LogSink()
+atexit.register(lambda: _sink.close())
+
+
+def _use_sink(sink: _LogSink) -> None:
+    global _sink
+    previous = _sink
+    _sink = sink
+
+    if previous is not sink:
+        # nothing is sent to the old sink anymore, and closing it writes
+        # what's left in its queue first, so messages stay in order
+        previous.close()
+
+
+def flush() -> None:
+    """Wait for all log messages to be written."""
+    _sink.flush()
+
+
 def log(
     *messages: object,
     urgency: Urgency = "info",
@@ -77,33 +290,20 @@ def log(
         + " ".join([str(i) for i in messages])
     )
 
-    if file_write != "only":
-        Console(file=file_out or sys.stdout).print(
-            msg,
-            markup=show_color,
-            highlight=show_color,
-        )
-        _QUEUE.put_nowait(
-            QueueItem(True, False, urgency, msg + "\n", is_stdout=True)
-        )
+    # sys.stdout is looked up now, since fancy mode may replace it later
+    target_out = (file_out or sys.stdout) if file_write != "only" else None
+    target_file: Path | TextIO | None = None
 
     if (file_write != "never") and log_file:
-        if isinstance(log_file, (str, Path)):
-            log_path = Path(log_file)
-
-            if log_path.exists():
-                log_f = open(log_path, "a")
-            else:
-                log_f = open(log_path, "w")
-        else:
-            log_f = log_file
-
-        Console(file=log_f).print(
-            msg,
-            markup=show_color,
-            highlight=show_color,
+        target_file = (
+            Path(log_file).resolve()
+            if isinstance(log_file, (str, Path))
+            else log_file
         )
 
+    if target_out or target_file:
+        _sink.put(_Record(msg, target_out, target_file, show_color))
+
 
 class _LogArgs(TypedDict):
     file_out: NotRequired[TextIO]
@@ -1,29 +1,75 @@
 from __future__ import annotations
 
-from io import StringIO
+from html import escape
 from typing import Any, NamedTuple
 
+from .components import DOMNode
+
+__all__ = ("ViewNode", "new_node", "render_node")
+
+
+def _attributes(attributes: dict[str, Any]) -> str:
+    result = ""
+
+    for k, v in attributes.items():
+        if (v is None) or (v is False):
+            continue
+
+        if (v is True) or (v == ""):
+            result += f" {k}"
+        else:
+            result += f' {k}="{escape(str(v))}"'
+
+    return result
+
+
+def render_node(node: ViewNode) -> str:
+    """Render a node tree into a single string."""
+    out: list[str] = []
+    append = out.append
+    # closing tags go on the stack as plain strings, so deep trees
+    # don't hit the recursion limit
+    stack: list[Any] = [node]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        item = pop()
+
+        if item.__class__ is str:
+            append(item)
+            continue
+
+        name = item.name
+        append(f"<{name}{_attributes(item.attributes)}>")
+        push(f"</{name}>")
+        content = item.content
+
+        for i in range(len(content) - 1, -1, -1):
+            child = content[i]
+
+            if isinstance(child, ViewNode):
+                push(child)
+            elif isinstance(child, DOMNode):
+                push(child.data)
+            else:
+                push(escape(str(child)))
+
+    return "".join(out)
+
 
 class ViewNode(NamedTuple):
     name: str
-    content: tuple[Any]
+    content: tuple[Any, ...]
     attributes: dict[str, Any]
 
-    def __str__(self):
-        attrs = StringIO()
+    def __str__(self) -> str:
+        return render_node(self)
 
-        if self.attributes:
-            attrs.write(" ")
-
-        for k, v in self.attributes.items():
-            if v:
-                attrs.write(f"{k}={v} ")
-            else:
-                attrs.write(f"{k} ")
+    def __bytes__(self) -> bytes:
+        return render_node(self).encode()
 
-        return (
-            f"<{self.name}{attrs.getvalue()}>{''.join(self.content)}" f"</{self.name}>"
-        )
+    __view_result__ = __str__
 
 
 def new_node(name: str, *content: Any, **attributes: Any) -> ViewNode:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime as DateTime
 from pathlib import Path
-from typing import Generic, TextIO, TypeVar
+from typing import AsyncIterable, Generic, TextIO, TypeVar
 
 from .components import DOMNode
 from .typing import BodyTranslateStrategy, SameSite
@@ -32,6 +32,8 @@ class Response(Generic[T]):
         self._raw_headers: list[tuple[bytes, bytes]] = []
         if body_translate:
             self.translate = body_translate
+        elif hasattr(body, "__aiter__"):
+            self.translate = "stream"
         else:
             self.translate = (
                 "str" if not hasattr(body, "__view_result__") else "result"
@@ -103,6 +105,14 @@ class Response(Generic[T]):
         return tuple(headers)
 
     def __view_result__(self):
+        if self.translate == "stream":
+            # _view sends each chunk as soon as the iterator produces it
+            return (
+                self.body.__aiter__(),  # type: ignore
+                self.status,
+                self._build_headers(),
+            )
+
         body: str = ""
         if self.translate == "str":
             body = str(self.body)
@@ -130,11 +140,11 @@ class HTML(Response[str]):
 
     def __init__(
         self,
-        body: TextIO | str | Path | DOMNode,
+        body: TextIO | str | Path | DOMNode | AsyncIterable[str],
         status: int = 200,
         headers: dict[str, str] | None = None,
     ) -> None:
-        parsed_body = ""
+        parsed_body: str | AsyncIterable[str] = ""
 
         if isinstance(body, Path):
             parsed_body = body.read_text()
@@ -142,13 +152,15 @@ class HTML(Response[str]):
             parsed_body = body
         elif isinstance(body, DOMNode):
             parsed_body = body.data
+        elif hasattr(body, "__aiter__"):
+            parsed_body = body
         else:
             try:
                 parsed_body = body.read()
             except AttributeError:
                 raise TypeError(
-                    f"expected TextIO, str, Path, or DOMNode, not {type(body)}",  # noqa
+                    f"expected TextIO, str, Path, DOMNode, or async iterable, not {type(body)}",  # noqa
                 ) from None
 
-        super().__init__(parsed_body, status, headers)
+        super().__init__(parsed_body, status, headers)  # type: ignore
         self._raw_headers.append((b"content-type", b"text/html"))
@@ -10,7 +10,7 @@ from typing import Any, Callable, Generic, Type, TypeVar, Union
 
 from ._util import LoadChecker, make_hint
 from .exceptions import InvalidRouteError, MistakeError
-from .typing import Validator, ValueType, ViewResponse, ViewRoute
+from .typing import ExecutorType, Validator, ValueType, ViewResponse, ViewRoute
 
 __all__ = (
     "get",
@@ -23,6 +23,7 @@ __all__ = (
     "body",
     "route_types",
     "BodyParam",
+    "RateLimit",
 )
 
 PART = re.compile(r"{(((\w+)(: *(\w+)))|(\w+))}")
@@ -46,6 +47,26 @@ class BodyParam(Generic[V]):
     default: V
 
 
+@dataclass(frozen=True)
+class RateLimit:
+    """A token bucket for a route, refilled at `rate` requests per second.
+
+    `burst` is how many requests can be made at once, and defaults to one
+    second's worth. If `per_client` is set, each client address gets its own
+    bucket."""
+
+    rate: float
+    burst: int | None = None
+    per_client: bool = False
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0:
+            raise ValueError("rate must be positive")
+
+        if (self.burst is not None) and (self.burst < 1):
+            raise ValueError("burst must be at least 1")
+
+
 @dataclass
 class RouteInput(Generic[V]):
     name: str
@@ -75,6 +96,9 @@ class Route(LoadChecker):
     errors: dict[int, ViewRoute] | None = None
     extra_types: dict[str, Any] = field(default_factory=dict)
     parts: list[str | Part[Any]] = field(default_factory=list)
+    executor: ExecutorType | None = None
+    rate_limit: RateLimit | None = None
+    max_in_flight: int | None = None
 
     def error(self, status_code: int):
         def wrapper(handler: ViewRoute):
@@ -131,11 +155,28 @@ def _method(
     raw_path: str | None,
     doc: str | None,
     method: Method,
-    cache_rate: int
+    cache_rate: int,
+    executor: ExecutorType | None,
+    rate_limit: RateLimit | float | None,
+    max_in_flight: int | None,
 ) -> Route:
     route = _ensure_route(r)
     route.method = method
     route.cache_rate = cache_rate
+    route.executor = executor
+    try:
+        route.rate_limit = (
+            RateLimit(rate_limit)
+            if isinstance(rate_limit, (int, float))
+            else rate_limit
+        )
+    except ValueError as e:
+        raise InvalidRouteError(f"invalid rate_limit: {e}") from e
+
+    if (max_in_flight is not None) and (max_in_flight < 1):
+        raise InvalidRouteError("max_in_flight must be at least 1")
+
+    route.max_in_flight = max_in_flight
     util_path = raw_path or "/"
 
     if not util_path.startswith("/"):
@@ -205,13 +246,25 @@ def _method_wrapper(
     path_or_route: str | None | RouteOrCallable,
     doc: str | None,
     method: Method,
-    cache_rate: int
+    cache_rate: int,
+    executor: ExecutorType | None,
+    rate_limit: RateLimit | float | None,
+    max_in_flight: int | None,
 ) -> Path:
     def inner(r: RouteOrCallable) -> Route:
         if (not isinstance(path_or_route, str)) and path_or_route:
             raise TypeError(f"{path_or_route!r} is not a string")
 
-        return _method(r, path_or_route, doc, method, cache_rate)
+        return _method(
+            r,
+            path_or_route,
+            doc,
+            method,
+            cache_rate,
+            executor,
+            rate_limit,
+            max_in_flight,
+        )
 
     if not path_or_route:
         return inner
@@ -227,8 +280,19 @@ def get(
     doc: str | None = None,
     *,
     cache_rate: int = -1,
+    executor: ExecutorType | None = None,
+    rate_limit: RateLimit | float | None = None,
+    max_in_flight: int | None = None,
 ) -> Path:
-    return _method_wrapper(path_or_route, doc, Method.GET, cache_rate)
+    return _method_wrapper(
+        path_or_route,
+        doc,
+        Method.GET,
+        cache_rate,
+        executor,
+        rate_limit,
+        max_in_flight,
+    )
 
 
 def post(
@@ -236,8 +300,19 @@ def post(
     doc: str | None = None,
     *,
     cache_rate: int = -1,
+    executor: ExecutorType | None = None,
+    rate_limit: RateLimit | float | None = None,
+    max_in_flight: int | None = None,
 ):
-    return _method_wrapper(path_or_route, doc, Method.POST, cache_rate)
+    return _method_wrapper(
+        path_or_route,
+        doc,
+        Method.POST,
+        cache_rate,
+        executor,
+        rate_limit,
+        max_in_flight,
+    )
 
 
 def patch(
@@ -245,8 +320,19 @@ def patch(
     doc: str | None = None,
     *,
     cache_rate: int = -1,
+    executor: ExecutorType | None = None,
+    rate_limit: RateLimit | float | None = None,
+    max_in_flight: int | None = None,
 ):
-    return _method_wrapper(path_or_route, doc, Method.PATCH, cache_rate)
+    return _method_wrapper(
+        path_or_route,
+        doc,
+        Method.PATCH,
+        cache_rate,
+        executor,
+        rate_limit,
+        max_in_flight,
+    )
 
 
 def put(
@@ -254,8 +340,19 @@ def put(
     doc: str | None = None,
     *,
     cache_rate: int = -1,
+    executor: ExecutorType | None = None,
+    rate_limit: RateLimit | float | None = None,
+    max_in_flight: int | None = None,
 ):
-    return _method_wrapper(path_or_route, doc, Method.PUT, cache_rate)
+    return _method_wrapper(
+        path_or_route,
+        doc,
+        Method.PUT,
+        cache_rate,
+        executor,
+        rate_limit,
+        max_in_flight,
+    )
 
 
 def delete(
@@ -263,8 +360,19 @@ def delete(
     doc: str | None = None,
     *,
     cache_rate: int = -1,
+    executor: ExecutorType | None = None,
+    rate_limit: RateLimit | float | None = None,
+    max_in_flight: int | None = None,
 ):
-    return _method_wrapper(path_or_route, doc, Method.DELETE, cache_rate)
+    return _method_wrapper(
+        path_or_route,
+        doc,
+        Method.DELETE,
+        cache_rate,
+        executor,
+        rate_limit,
+        max_in_flight,
+    )
 
 
 def options(
@@ -272,8 +380,19 @@ def options(
     doc: str | None = None,
     *,
     cache_rate: int = -1,
+    executor: ExecutorType | None = None,
+    rate_limit: RateLimit | float | None = None,
+    max_in_flight: int | None = None,
 ):
-    return _method_wrapper(path_or_route, doc, Method.OPTIONS, cache_rate)
+    return _method_wrapper(
+        path_or_route,
+        doc,
+        Method.OPTIONS,
+        cache_rate,
+        executor,
+        rate_limit,
+        max_in_flight,
+    )
 
 
 class _NoDefault:
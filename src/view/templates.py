@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import ast
+import builtins
+import copy
+import html
 import inspect
 from pathlib import Path
+from types import CodeType, FunctionType
 from types import FrameType as Frame
-from typing import TYPE_CHECKING, Any, Iterator, Type
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable,
+                    Dict, Type)
 import aiofiles
+from ._logging import Internal, Service
 from ._util import needs_dep
 from .app import get_app, App
 from .config import TemplatesConfig
@@ -16,7 +23,8 @@ import os
 import sys
 
 if TYPE_CHECKING:
-    from bs4 import Tag
+    from bs4 import PageElement, Tag
+    from django.template import Engine as DjangoEngine
 
 _ConfigSpecified = None
 _DEFAULT_CONF = TemplatesConfig()
@@ -36,199 +44,519 @@ sys.modules["_view_django"] = _DJANGO_HOOK
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "_view_django")
 
 
-class ViewRenderer:
-    def __init__(self, parameters: dict[str, Any]):
-        self.parameters = parameters
-        self._last_if: bool | None = None
+_Renderer = Callable[[Dict[str, Any]], Awaitable[str]]
+_Streamer = Callable[[Dict[str, Any]], AsyncIterator[str]]
 
-    async def _render_children(self, view: Tag, result: list[Any], *, defer: bool = False) -> None:
-        from bs4 import Tag
 
-        for child in view.children:
-            if isinstance(child, Tag):
-                if child.name == "view":
-                    ele = await self._tag(child, defer=defer)
-                    if ele:
-                        result.append(ele)
-            else:
-                result.append(child)
+class _Template:
+    """A compiled template, for any engine."""
 
-    async def _tag(
+    __slots__ = ("render", "_stream", "names")
+
+    def __init__(
         self,
-        view: Tag,
+        render: _Renderer,
+        stream: _Streamer | None = None,
         *,
-        defer: bool = False
-    ) -> Tag | str | None:
-        if not view.attrs:
-            raise InvalidTemplateError("<view> tags must have at least one attribute")
-        
-        iterator_obj: Iterator[Any] | None = None
-        iterator_name: str | None = None
+        names: frozenset[str] | None = None,
+    ) -> None:
+        self.render = render
+        self._stream = stream
+        # variables the template uses, or None if the engine can't tell
+        self.names = names
+
+    async def _render_once(self, parameters: dict[str, Any]) -> AsyncIterator[str]:
+        yield await self.render(parameters)
+
+    def stream(self, parameters: dict[str, Any]) -> AsyncIterator[str]:
+        """Render the template in chunks. Engines without incremental output yield a single chunk."""
+        if not self._stream:
+            return self._render_once(parameters)
+
+        return self._stream(parameters)
+
 
-        def _iter_render(itera: str, item: str) -> None:
-            if not itera:
-                raise InvalidTemplateError('"iter" attribute cannot be empty')
-            
-            if not item:
-                raise InvalidTemplateError('"item" attribute cannot be empty')
+class _ViewTemplate:
+    """A `<view>` template compiled into an async function."""
 
-            nonlocal iterator_obj
-            iterator_obj = iter(eval(itera, self.parameters))
-            nonlocal iterator_name
-            iterator_name = item
+    __slots__ = ("code", "stream_code", "names")
 
-        result = []
+    def __init__(
+        self,
+        code: CodeType,
+        stream_code: CodeType,
+        names: frozenset[str] | None,
+    ) -> None:
+        self.code = code
+        self.stream_code = stream_code
+        self.names = names
+
+    async def render(self, parameters: dict[str, Any]) -> str:
+        # parameters are the globals of the render function, so
+        # expressions are looked up the same way eval() would. they're
+        # copied, since the function adds to them (such as loop items)
+        parameters = {"__builtins__": builtins, **parameters}
+        func = FunctionType(self.code, parameters)
+        return await func(parameters, template, html.escape)
+
+    def stream(self, parameters: dict[str, Any]) -> AsyncIterator[str]:
+        parameters = {"__builtins__": builtins, **parameters}
+        func = FunctionType(self.stream_code, parameters)
+        return func(parameters, template, html.escape)
+
+
+class _ViewCompiler:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.lines: list[str] = []
+        # indexes of lines that only exist in the streaming version
+        self.stream_only: set[int] = set()
+        self.static: list[str] = []
+        self.names: set[str] = set()
+        # included templates can use anything from the caller
+        self.includes = False
+        self.depth = 1
+        self.seen_if = False
+
+    def _flush(self) -> None:
+        if self.static:
+            self.lines.append(
+                ("    " * self.depth) + f"__a({''.join(self.static)!r})"
+            )
+            self.static.clear()
+
+    def _emit(self, line: str) -> None:
+        self._flush()
+        self.lines.append(("    " * self.depth) + line)
+
+    def _expr(self, source: str, key: str) -> str:
+        if not source:
+            raise InvalidTemplateError(f"{key!r} attribute cannot be empty")
+
+        try:
+            tree = ast.parse(source, self.name, "eval")
+        except SyntaxError as e:
+            raise InvalidTemplateError(
+                f"invalid expression in {key!r} attribute: {source!r}"
+            ) from e
+
+        self.names.update(
+            node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+        )
+
+        # the newline stops comments in the expression from eating the paren
+        return f"({source}\n)"
+
+    def _block(self, header: str) -> None:
+        self._emit(header)
+        self.depth += 1
+
+    def _node(self, node: PageElement) -> None:
+        from bs4 import NavigableString, Tag
+
+        if isinstance(node, Tag):
+            if node.name == "view":
+                self._view(node)
+            elif not node.find("view"):
+                self.static.append(node.decode())
+            else:
+                empty = copy.copy(node)
+                empty.clear()
+                html = empty.decode()
+                close = html.rindex("</")
+                self.static.append(html[:close])
+
+                for child in node.children:
+                    self._node(child)
+
+                self.static.append(html[close:])
+        else:
+            assert isinstance(node, NavigableString)
+            self.static.append(node.output_ready())
+
+    def _view(self, view: Tag) -> None:
+        if not view.attrs:
+            raise InvalidTemplateError(
+                "<view> tags must have at least one attribute"
+            )
+
+        depth = self.depth
+        output: list[str] = []
+        loop: tuple[str, str] | None = None
 
         for key, value in view.attrs.items():
             if key == "ref":
-                result.append(str(eval(value, self.parameters)))
+                output.append(
+                    f"__a(__escape(str({self._expr(value, key)})))"
+                )
             elif key == "template":
-                result.append(await template(value))
+                self.includes = True
+                output.append(f"__a((await __template({value!r})).body)")
             elif key == "if":
-                self._last_if = bool(eval(value, self.parameters))
-                if not self._last_if:
-                    if not defer:
-                        view.replace_with("")
-                    return None
-            elif (key in {"else", "elif"}) and (self._last_if is None):
-                raise InvalidTemplateError(f'{key} can only be used if an "if" attribute was used prior')  # noqa
+                self.seen_if = True
+                self._emit(f"__last_if = bool({self._expr(value, key)})")
+                self._block("if __last_if:")
+            elif (key in {"else", "elif"}) and (not self.seen_if):
+                raise InvalidTemplateError(
+                    f'{key} can only be used if an "if" attribute was used prior'  # noqa
+                )
             elif key == "else":
-                if self._last_if is True:
-                    if not defer:
-                        view.replace_with("")
-                    return None
+                self._block("if not __last_if:")
             elif key == "elif":
-                if self._last_if is False:
-                    self._last_if = bool(eval(value, self.parameters))
-                    if not self._last_if:
-                        if not defer:
-                            view.replace_with("")
-                        return None
-                else:
-                    if not defer:
-                        view.replace_with("")
-                    return None
-
-            elif key == "iter":
+                self._block("if not __last_if:")
+                self._emit(f"__last_if = bool({self._expr(value, key)})")
+                self._block("if __last_if:")
+            elif key in {"iter", "item"}:
+                itera = view.attrs.get("iter")
                 item = view.attrs.get("item")
-                if not item:
-                    raise InvalidTemplateError(f'<view> tags with an "iter" attribute must have an "item" attribute')  # noqa
 
-                _iter_render(value, item)
-            elif key == "item":
-                iter_name = view.attrs.get("iter")
-                if not iter_name:
-                    raise InvalidTemplateError(f'<view> tags with an "item" attribute must have an "iter" attribute')  # noqa
+                if itera is None:
+                    raise InvalidTemplateError(
+                        '<view> tags with an "item" attribute must have an "iter" attribute'  # noqa
+                    )
+
+                if item is None:
+                    raise InvalidTemplateError(
+                        '<view> tags with an "iter" attribute must have an "item" attribute'  # noqa
+                    )
+
+                if not item:
+                    raise InvalidTemplateError(
+                        '"item" attribute cannot be empty'
+                    )
 
-                _iter_render(iter_name, value)
+                loop = (self._expr(itera, "iter"), item)
             else:
-                raise InvalidTemplateError(f"unknown key {key!r} in <view> tag")
+                raise InvalidTemplateError(
+                    f"unknown key {key!r} in <view> tag"
+                )
 
-        if iterator_obj:
-            assert iterator_name, "iterator_name is None (this is a bug!)"
-            
-            for i in iterator_obj:  # type: ignore
-                self.parameters[iterator_name] = i
-                await self._render_children(view, result, defer=True)
+        for line in output:
+            self._emit(line)
 
-            iterator_obj = None
-        else:
-            await self._render_children(view, result)
+        if loop:
+            self._block(f"for __item in {loop[0]}:")
+            self._emit(f"__p[{loop[1]!r}] = __item")
+
+        for child in view.children:
+            self._node(child)
+
+        self._flush()
+        if self.lines[-1].endswith(":"):
+            self._emit("pass")
 
-        return view.replace_with(*result) if not defer else "\n".join(result)
+        if loop:
+            # send what each iteration produced
+            self.stream_only.add(len(self.lines))
+            self._emit('yield "".join(__out)')
+            self.stream_only.add(len(self.lines))
+            self._emit("__out.clear()")
 
+        self.depth = depth
 
-    async def render(self, content: str) -> str:
+    def compile(self, source: str) -> _ViewTemplate:
         try:
-            from bs4 import BeautifulSoup, Tag
+            from bs4 import BeautifulSoup
         except ModuleNotFoundError as e:
             needs_dep("beautifulsoup4", e, "templates")
 
-        soup = BeautifulSoup(content, features="html.parser")
+        soup = BeautifulSoup(source, features="html.parser")
 
-        for view in soup.find_all("view"):
-            assert isinstance(view, Tag), "found non-tag somehow (this is a bug!)"
-            await self._tag(view)
+        for node in soup.contents:
+            self._node(node)
 
-        return str(soup)
+        self._flush()
+        render = [
+            line for i, line in enumerate(self.lines) if i not in self.stream_only
+        ]
+        return _ViewTemplate(
+            self._build("__view_render", render, '    return "".join(__out)'),
+            self._build("__view_stream", self.lines, '    yield "".join(__out)'),
+            None if self.includes else frozenset(self.names),
+        )
 
+    def _build(self, name: str, lines: list[str], end: str) -> CodeType:
+        code = "\n".join(
+            (
+                f"async def {name}(__p, __template, __escape):",
+                "    __out = []",
+                "    __a = __out.append",
+                "    __last_if = None",
+                *lines,
+                end,
+            )
+        )
+        module = compile(code, self.name, "exec")
 
-async def render(
-    source: str,
-    engine: TemplateEngine = "view",
-    parameters: dict[str, Any] | None | _CurrentFrameType = _CurrentFrame,
-    *,
-    app: App | None = None,
-) -> str:
-    """Render a template from the source instead of a filename. Generally should be used internally."""
-    if parameters is _CurrentFrame:
-        parameters = {}
-        frame = inspect.currentframe()
-        assert frame, "failed to get frame"
-        while frame.f_code.co_filename == __file__:
-            frame = frame.f_back
-            assert frame, "frame has no f_back"
+        # the function's code is a constant of the module, so it doesn't have
+        # to be run to get it
+        for const in module.co_consts:
+            if isinstance(const, CodeType) and (const.co_name == name):
+                return const
 
-        assert isinstance(frame, Frame)
+        raise AssertionError(f"{name} wasn't compiled")
 
-        parameters.update(frame.f_globals)
-        parameters.update(frame.f_locals)
 
-    try:
-        templaters = (app or get_app()).templaters
-    except BadEnvironmentError:
-        templaters = {}
+def _compile_view(source: str, name: str = "<view template>") -> _ViewTemplate:
+    return _ViewCompiler(name).compile(source)
 
-    if engine == "view":
-        view = ViewRenderer(parameters or {})  # type: ignore
-        return await view.render(source)
-    elif engine == "jinja":
-        try:
-            from jinja2 import Environment
-        except ModuleNotFoundError as e:
-            needs_dep("jinja2", e, "templates")
 
-        env: Environment | None = templaters.get("jinja")
-        if not env:
-            templaters["jinja"] = Environment()
-            env = templaters["jinja"]
-            env.is_async = True
+_MAX_SOURCES = 256
 
-        return await env.from_string(source).render_async(**parameters)  # type: ignore
-    elif engine == "mako":
-        try:
-            from mako.template import Template
-        except ModuleNotFoundError as e:
-            needs_dep("mako", e, "templates")
 
-        return Template(source).render_unicode(**parameters)  # type: ignore
-    elif engine == "chameleon":
-        try:
-            from chameleon.zpt.template import PageTemplate
-        except ModuleNotFoundError as e:
-            needs_dep("chameleon", e, "templates")
+class TemplateRegistry:
+    """Compiled templates for an app, keyed by engine and resolved path."""
+
+    def __init__(
+        self,
+        templaters: dict[str, Any],
+        *,
+        directory: Path = _DEFAULT_CONF.directory,
+        check_mtime: bool = True,
+    ) -> None:
+        self.templaters = templaters
+        self.directory = directory
+        self.check_mtime = check_mtime
+        self._files: dict[tuple[TemplateEngine, Path], tuple[int, _Template]] = {}
+        self._sources: dict[tuple[TemplateEngine, str], _Template] = {}
+
+    def _django(self) -> DjangoEngine:
+        engine: DjangoEngine | None = self.templaters.get("django")
+        if engine:
+            return engine
 
-        return PageTemplate(source)(**parameters)  # type: ignore
-    elif engine == "django":
         try:
-            from django.template import Template, Context
-            from django.conf import settings
             from django import setup
+            from django.conf import settings
+            from django.template import Engine
         except ModuleNotFoundError as e:
             needs_dep("django", e, "templates")
 
-        TEMPLATES = [{
-            "BACKEND": "django.template.backends.django.DjangoTemplates",
-            "DIRS": [],
-            "APP_DIRS": False,
-            "OPTIONS": {}
-        }]
-        settings.configure(TEMPLATES=TEMPLATES)
+        if not settings.configured:
+            settings.configure()
+
         setup()
 
-        return Template(source).render(Context(parameters))
-    else:
-        raise InvalidTemplateError(f'{engine!r} is not a supported template engine')
+        engine = Engine(dirs=[str(self.directory)])
+        self.templaters["django"] = engine
+        return engine
+
+    def compile(
+        self,
+        source: str,
+        engine: TemplateEngine,
+        name: str = "<template>",
+    ) -> _Template:
+        """Compile a template with the target engine."""
+        if engine == "view":
+            view_template = _compile_view(source, name)
+            return _Template(
+                view_template.render,
+                view_template.stream,
+                names=view_template.names,
+            )
+        elif engine == "jinja":
+            try:
+                from jinja2 import Environment, meta
+            except ModuleNotFoundError as e:
+                needs_dep("jinja2", e, "templates")
+
+            env: Environment | None = self.templaters.get("jinja")
+            if not env:
+                env = Environment(enable_async=True)
+                self.templaters["jinja"] = env
+
+            jinja_template = env.from_string(source)
+            names = frozenset(meta.find_undeclared_variables(env.parse(source)))
+
+            async def render_jinja(parameters: dict[str, Any]) -> str:
+                return await jinja_template.render_async(**parameters)
+
+            def stream_jinja(parameters: dict[str, Any]) -> AsyncIterator[str]:
+                return jinja_template.generate_async(**parameters)
+
+            return _Template(render_jinja, stream_jinja, names=names)
+        elif engine == "mako":
+            try:
+                from mako.template import Template
+            except ModuleNotFoundError as e:
+                needs_dep("mako", e, "templates")
+
+            mako_template = Template(source)
+
+            async def render_mako(parameters: dict[str, Any]) -> str:
+                return mako_template.render_unicode(**parameters)
+
+            return _Template(render_mako)
+        elif engine == "chameleon":
+            try:
+                from chameleon.zpt.template import PageTemplate
+            except ModuleNotFoundError as e:
+                needs_dep("chameleon", e, "templates")
+
+            page_template = PageTemplate(source)
+
+            async def render_chameleon(parameters: dict[str, Any]) -> str:
+                return page_template(**parameters)
+
+            return _Template(render_chameleon)
+        elif engine == "django":
+            try:
+                from django.template import Context
+            except ModuleNotFoundError as e:
+                needs_dep("django", e, "templates")
+
+            django_template = self._django().from_string(source)
+
+            async def render_django(parameters: dict[str, Any]) -> str:
+                # render() returns a SafeString, which _view won't accept
+                # (and str() on a SafeString returns itself)
+                return str.__str__(
+                    django_template.render(Context(parameters)),
+                )
+
+            return _Template(render_django)
+        else:
+            raise InvalidTemplateError(f'{engine!r} is not a supported template engine')
+
+    def from_source(self, source: str, engine: TemplateEngine) -> _Template:
+        """Get the compiled version of a template source."""
+        key = (engine, source)
+        compiled = self._sources.get(key)
+
+        if not compiled:
+            if len(self._sources) >= _MAX_SOURCES:
+                # drop the oldest entry
+                del self._sources[next(iter(self._sources))]
+
+            compiled = self.compile(source, engine)
+            self._sources[key] = compiled
+
+        return compiled
+
+    async def get(self, path: Path, engine: TemplateEngine) -> _Template:
+        """Get the compiled template at `path`, recompiling it if the file changed."""
+        key = (engine, path)
+        cached = self._files.get(key)
+
+        if cached and (not self.check_mtime):
+            return cached[1]
+
+        mtime = path.stat().st_mtime_ns
+
+        if cached and (cached[0] == mtime):
+            return cached[1]
+
+        async with aiofiles.open(path) as f:
+            source = await f.read()
+
+        compiled = self.compile(source, engine, str(path))
+        self._files[key] = (mtime, compiled)
+        return compiled
+
+    def preload(self, directory: Path, engine: TemplateEngine) -> int:
+        """Compile every template in `directory` ahead of time."""
+        count = 0
+
+        for path in directory.rglob("*.html"):
+            path = path.resolve()
+            mtime = path.stat().st_mtime_ns
+            compiled = self.compile(path.read_text(), engine, str(path))
+            self._files[(engine, path)] = (mtime, compiled)
+            count += 1
+
+        return count
+
+
+_DEFAULT_REGISTRY = TemplateRegistry({})
+
+
+def _registry(app: App | None = None) -> TemplateRegistry:
+    try:
+        target = app or get_app()
+    except BadEnvironmentError:
+        return _DEFAULT_REGISTRY
+
+    if not target._templates:
+        target._templates = TemplateRegistry(
+            target.templaters,
+            directory=target.config.templates.directory,
+            check_mtime=target.config.dev,
+        )
+
+    return target._templates
+
+
+def preload(app: App) -> None:
+    """Compile all templates in the configured directory."""
+    conf = app.config.templates
+    if not conf.directory.exists():
+        Service.warning(f"template directory {conf.directory} does not exist")
+        return
+
+    count = _registry(app).preload(conf.directory, conf.engine)
+    Internal.info(f"preloaded {count} templates")
+
+
+def _caller() -> Frame:
+    frame = inspect.currentframe()
+    assert frame, "failed to get frame"
+    while frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+        assert frame, "frame has no f_back"
+
+    return frame
+
+
+def _frame_parameters(
+    frame: Frame,
+    names: frozenset[str] | None,
+    *,
+    use_globals: bool = True,
+    use_locals: bool = True,
+) -> dict[str, Any]:
+    if names is None:
+        # the engine can't tell us what it needs, so copy everything
+        params: dict[str, Any] = {}
+        if use_globals:
+            params.update(frame.f_globals)
+
+        if use_locals:
+            params.update(frame.f_locals)
+
+        return params
+
+    scopes = []
+    if use_locals:
+        scopes.append(frame.f_locals)
+
+    if use_globals:
+        scopes.append(frame.f_globals)
+
+    params = {}
+    for name in names:
+        for scope in scopes:
+            if name in scope:
+                params[name] = scope[name]
+                break
+
+    return params
+
+
+async def render(
+    source: str,
+    engine: TemplateEngine = "view",
+    parameters: dict[str, Any] | None | _CurrentFrameType = _CurrentFrame,
+    *,
+    app: App | None = None,
+) -> str:
+    """Render a template from the source instead of a filename. Generally should be used internally."""
+    compiled = _registry(app).from_source(source, engine)
+
+    if parameters is _CurrentFrame:
+        parameters = _frame_parameters(_caller(), compiled.names)
+
+    return await compiled.render(parameters or {})  # type: ignore
 
 
 async def template(
@@ -236,9 +564,16 @@ async def template(
     directory: str | Path | None = _ConfigSpecified,
     engine: TemplateEngine | None = _ConfigSpecified,
     frame: Frame | None | _CurrentFrameType = _CurrentFrame,
+    *,
+    stream: bool = False,
+    context: dict[str, Any] | None = None,
     **parameters: Any,
 ) -> HTML:
-    """Render a template with the specified engine. This returns a view.py HTML response."""
+    """Render a template with the specified engine. This returns a view.py HTML response.
+
+    If `stream` is `True`, the response is sent in chunks as the template renders them.
+    If `context` is passed, it's used as the template's variables and the caller's
+    frame isn't inspected."""
     try:
         conf = get_app().config.templates
     except BadEnvironmentError:
@@ -254,26 +589,27 @@ async def template(
         name = Path(name)
 
     path = directory / name
-    params: dict[str, Any] = {}
-    if frame:
+    compiled = await _registry().get(path.resolve(), engine)
+
+    if context is not None:
+        params = {**context}
+    elif frame and (conf.globals or conf.locals):
         if frame is _CurrentFrame:
-            frame = inspect.currentframe()
-            assert frame, "failed to get frame"
-            while frame.f_code.co_filename == __file__:
-                frame = frame.f_back
-                assert frame, "frame has no f_back"
+            frame = _caller()
 
         assert isinstance(frame, Frame)
-
-        if conf.globals:
-            params.update(frame.f_globals)
-
-        if conf.locals:
-            params.update(frame.f_locals)
+        params = _frame_parameters(
+            frame,
+            compiled.names,
+            use_globals=conf.globals,
+            use_locals=conf.locals,
+        )
+    else:
+        params = {}
 
     params.update(parameters)
 
-    async with aiofiles.open(path) as f:
-        source = await f.read()
-    
-    return HTML(await render(source, engine, params))
+    if stream:
+        return HTML(compiled.stream(params))
+
+    return HTML(await compiled.render(params))
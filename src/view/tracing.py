@@ -0,0 +1,521 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import sys
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from pathlib import Path
+from threading import Event, Lock, Thread, current_thread
+from typing import IO, Any, Iterator, NamedTuple, Sequence, Union
+
+from .__about__ import __version__
+from ._logging import Internal
+
+__all__ = (
+    "SpanContext",
+    "Span",
+    "Tracer",
+    "SpanExporter",
+    "BatchExporter",
+    "OTLPJSONExporter",
+    "parse_traceparent",
+    "current_span",
+    "start_span",
+    "inject",
+)
+
+# span kinds and status codes, as numbered by OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$"
+)
+_INVALID_TRACE = "0" * 32
+_INVALID_SPAN = "0" * 16
+
+AttributeValue = Union[str, bool, int, float]
+
+
+class SpanContext(NamedTuple):
+    """The part of a span that's propagated between services."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool
+    state: str | None = None
+
+    @property
+    def traceparent(self) -> str:
+        """The W3C `traceparent` header for this context."""
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id}-{self.span_id}-{flags}"
+
+
+def parse_traceparent(
+    traceparent: str,
+    tracestate: str | None = None,
+) -> SpanContext | None:
+    """Parse a W3C `traceparent` header, or `None` if it's invalid."""
+    match = _TRACEPARENT.match(traceparent.strip())
+    if not match:
+        return None
+
+    version, trace_id, span_id, flags, rest = match.groups()
+
+    if (version == "ff") or ((version == "00") and rest):
+        return None
+
+    if (trace_id == _INVALID_TRACE) or (span_id == _INVALID_SPAN):
+        return None
+
+    return SpanContext(
+        trace_id,
+        span_id,
+        bool(int(flags, 16) & 1),
+        tracestate or None,
+    )
+
+
+def _trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    """A timed operation, such as a request or part of one.
+
+    Spans for requests are created by the app's `Tracer`, and ended by `_view`
+    once the response has been sent."""
+
+    __slots__ = (
+        "name",
+        "context",
+        "parent_id",
+        "kind",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status",
+        "status_message",
+        "tracer",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        *,
+        parent_id: str | None,
+        kind: int,
+        tracer: Tracer,
+        start_time: int | None = None,
+        attributes: dict[str, AttributeValue] | None = None,
+    ) -> None:
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_time = start_time or time.time_ns()
+        self.end_time: int | None = None
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.status_message: str | None = None
+        self.tracer = tracer
+        self._token: Token[Span | None] | None = None
+
+    def __repr__(self) -> str:
+        context = self.context
+        return f"Span({self.name!r}, {context.trace_id}/{context.span_id})"
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str | None = None) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def end(self, status: int | None = None) -> None:
+        """End the span. For request spans, `status` is the response status."""
+        token = self._token
+        self._token = None
+
+        try:
+            if self.end_time:
+                return
+
+            self.end_time = time.time_ns()
+
+            if status is not None:
+                self.attributes["http.response.status_code"] = status
+
+                if status >= 500:
+                    self.status = STATUS_ERROR
+
+            if self.context.sampled:
+                self.tracer.exporter.export((self,))
+        finally:
+            # otherwise, the next request handled by the same task (such as
+            # a pipelined one) would start out with this span as its current
+            if token is not None:
+                _CURRENT.reset(token)
+
+
+_CURRENT: ContextVar[Span | None] = ContextVar("view_span", default=None)
+
+
+class Tracer:
+    """Creates a span for each request, and passes them to an exporter.
+
+    The `traceparent` and `tracestate` headers of incoming requests are
+    respected, so spans join the caller's trace. Requests without a sampled
+    parent are sampled at `sample_rate`."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        *,
+        sample_rate: float = 1.0,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def _sample(self) -> bool:
+        return (self.sample_rate >= 1) or (random.random() < self.sample_rate)
+
+    def __call__(
+        self,
+        method: str,
+        route: str,
+        scope: dict[str, Any],
+        elapsed: int,
+    ) -> Span:
+        # called by _view once the route has been found
+        traceparent: str | None = None
+        tracestate: str | None = None
+
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+            elif key == b"tracestate":
+                tracestate = value.decode("latin-1")
+
+        parent = (
+            parse_traceparent(traceparent, tracestate) if traceparent else None
+        )
+
+        if parent:
+            context = SpanContext(
+                parent.trace_id,
+                _span_id(),
+                parent.sampled,
+                parent.state,
+            )
+        else:
+            context = SpanContext(_trace_id(), _span_id(), self._sample())
+
+        attributes: dict[str, AttributeValue] = {
+            "http.request.method": method,
+            "http.route": route,
+            "url.path": scope["path"],
+            "url.scheme": scope.get("scheme", "http"),
+        }
+        client = scope.get("client")
+
+        if client:
+            attributes["client.address"] = client[0]
+
+        span = Span(
+            f"{method} {route}",
+            context,
+            parent_id=parent.span_id if parent else None,
+            kind=SPAN_KIND_SERVER,
+            tracer=self,
+            start_time=time.time_ns() - elapsed,
+            attributes=attributes,
+        )
+        # this runs in the request's task, so the route sees it too
+        span._token = _CURRENT.set(span)
+        return span
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+
+def current_span() -> Span | None:
+    """Get the span of the request being handled, if it's being traced."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def start_span(
+    name: str,
+    **attributes: AttributeValue,
+) -> Iterator[Span | None]:
+    """Time part of a route as a child of the request's span.
+
+    If the request isn't being traced, this yields `None` and does nothing."""
+    parent = _CURRENT.get()
+
+    if not parent:
+        yield None
+        return
+
+    span = Span(
+        name,
+        parent.context._replace(span_id=_span_id()),
+        parent_id=parent.context.span_id,
+        kind=SPAN_KIND_INTERNAL,
+        tracer=parent.tracer,
+        attributes=attributes,
+    )
+    token = _CURRENT.set(span)
+
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(repr(e))
+        raise
+    finally:
+        _CURRENT.reset(token)
+        span.end()
+
+
+def inject(headers: dict[str, str] | None = None) -> dict[str, str]:
+    """Add the current span's trace context to outgoing request headers."""
+    headers = {} if headers is None else headers
+    span = _CURRENT.get()
+
+    if span:
+        headers["traceparent"] = span.context.traceparent
+
+        if span.context.state:
+            headers["tracestate"] = span.context.state
+
+    return headers
+
+
+class SpanExporter(ABC):
+    """Sends finished spans somewhere."""
+
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        ...
+
+
+class BatchExporter(SpanExporter):
+    """Collects spans and passes them to another exporter in batches.
+
+    Spans are exported by a background thread every `interval` seconds, or
+    once `batch_size` spans are waiting. If more than `max_queue` spans are
+    waiting, new ones are dropped (and counted) instead of slowing down
+    requests."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        *,
+        batch_size: int = 512,
+        interval: float = 5.0,
+        max_queue: int = 2048,
+    ) -> None:
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._spans: list[Span] = []
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            room = self.max_queue - len(self._spans)
+
+            if len(spans) > room:
+                self.dropped += len(spans) - room
+                spans = spans[:room]
+
+            self._spans.extend(spans)
+            full = len(self._spans) >= self.batch_size
+
+        if not self._thread:
+            self._start()
+
+        if full:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread:
+                return
+
+            self._stop.clear()
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        while True:
+            with self._lock:
+                batch = self._spans[: self.batch_size]
+                del self._spans[: self.batch_size]
+                dropped = self.dropped
+                self.dropped = 0
+
+            if dropped:
+                Internal.warning(
+                    f"dropped {dropped} span(s), the export queue was full",
+                )
+
+            if not batch:
+                return
+
+            try:
+                self.exporter.export(batch)
+            except Exception as e:  # noqa: BLE001
+                # exporters can be user code, and spans are best effort, so
+                # a failing one shouldn't take down the thread
+                Internal.warning(
+                    f"failed to export {len(batch)} span(s): {e!r}",
+                )
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+
+        if thread and (thread is not current_thread()):
+            thread.join()
+
+        self._thread = None
+        self.flush()
+        self.exporter.shutdown()
+
+
+def _attribute(key: str, value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        encoded: dict[str, Any] = {"boolValue": value}
+    elif isinstance(value, int):
+        # 64 bit integers are strings in OTLP-JSON
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+
+    return {"key": key, "value": encoded}
+
+
+def _encode_span(span: Span) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "traceId": span.context.trace_id,
+        "spanId": span.context.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+        "status": {"code": span.status},
+    }
+
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+
+    if span.context.state:
+        data["traceState"] = span.context.state
+
+    if span.status_message:
+        data["status"]["message"] = span.status_message
+
+    return data
+
+
+class OTLPJSONExporter(SpanExporter):
+    """Writes spans in the OTLP-JSON format, one export request per line.
+
+    This is the format read by the OpenTelemetry Collector's `otlpjsonfile`
+    receiver. If `file` is `None`, spans are written to standard output."""
+
+    def __init__(
+        self,
+        file: str | Path | IO[str] | None = None,
+        *,
+        service_name: str = "view",
+    ) -> None:
+        self.file = file
+        self.service_name = service_name
+        self._fd: int | None = None
+
+    def encode(self, spans: Sequence[Span]) -> str:
+        return json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                _attribute("service.name", self.service_name),
+                                _attribute("process.pid", os.getpid()),
+                            ]
+                        },
+                        "scopeSpans": [
+                            {
+                                "scope": {
+                                    "name": "view.py",
+                                    "version": __version__,
+                                },
+                                "spans": [_encode_span(i) for i in spans],
+                            }
+                        ],
+                    }
+                ]
+            },
+            separators=(",", ":"),
+        )
+
+    def export(self, spans: Sequence[Span]) -> None:
+        line = self.encode(spans) + "\n"
+
+        if (self.file is None) or (not isinstance(self.file, (str, Path))):
+            stream = self.file or sys.stdout
+            stream.write(line)
+            stream.flush()
+            return
+
+        if self._fd is None:
+            self._fd = os.open(
+                self.file,
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o644,
+            )
+
+        # a single write, so lines from multiple workers don't get mixed up
+        data = line.encode("utf-8")
+        while data:
+            data = data[os.write(self._fd, data) :]
+
+    def shutdown(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -111,8 +111,13 @@ class Part(Protocol[V]):
 
 
 Callback = Callable[[], Any]
+BeforeHook = Callable[
+    [AsgiDict],
+    Union[ViewResult, None, Awaitable[Union[ViewResult, None]]],
+]
+AfterHook = Callable[[AsgiDict, AsgiDict], Any]
 SameSite = Literal["strict", "lax", "none"]
-BodyTranslateStrategy = Literal["str", "repr", "result"]
+BodyTranslateStrategy = Literal["str", "repr", "result", "stream"]
 
 DocsType = Dict[Tuple[str, str], "RouteDoc"]
 LogLevel = Literal["debug", "info", "warning", "error", "critical"]
@@ -132,3 +137,4 @@ StrMethod = Literal[
     "OPTIONS",
 ]
 TemplateEngine = Literal["view", "jinja", "django", "mako", "chameleon"]
+ExecutorType = Literal["thread", "process"]
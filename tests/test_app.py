@@ -1,3 +1,7 @@
+import asyncio
+import os
+import threading
+import time
 from dataclasses import dataclass, field
 from typing import Dict, List, NamedTuple, TypedDict, Union
 import attrs
@@ -591,3 +595,902 @@ async def _():
         assert (await test.get("/body", body={"test": "b"})).message == "b"
         assert (await test.get("/both", body={"a": "a"}, query={"b": "b"})).message == "ab"
 
+
+@test("executor routes")
+async def _():
+    app = new_app()
+    app.config.executor.max_queue = 1
+    threads = set()
+
+    @app.get("/", executor="thread")
+    @app.query("n", int)
+    def index(n: int):
+        threads.add(threading.get_ident())
+        time.sleep(0.1)
+        return str(n * 2)
+
+    async with app.test() as test:
+        assert (await test.get("/", query={"n": 2})).message == "4"
+        assert threading.get_ident() not in threads
+
+        results = await asyncio.gather(
+            test.get("/", query={"n": 1}),
+            test.get("/", query={"n": 1}),
+        )
+        assert sorted(i.status for i in results) == [200, 503]
+
+
+def _process_route(n: int):
+    # process pool workers look this up by name, so it can't be a local
+    return f"{n * 2} {os.getpid()}"
+
+
+@test("process executor routes")
+async def _():
+    from ward import raises
+
+    from view._executors import _ProcessTarget
+    from view.exceptions import InvalidRouteError
+
+    app = new_app()
+    app.config.executor.process_workers = 1
+    app.get("/", executor="process")(app.query("n", int)(_process_route))
+
+    async with app.test() as test:
+        doubled, pid = (await test.get("/", query={"n": 2})).message.split()
+        assert doubled == "4"
+        assert int(pid) != os.getpid()
+
+    def local():
+        ...
+
+    with raises(InvalidRouteError):
+        _ProcessTarget(local)
+
+    target = _ProcessTarget(_process_route)
+    target.module = "view_missing_module"
+
+    with raises(InvalidRouteError) as exc:
+        target(1)
+
+    assert "view_missing_module._process_route" in str(exc.raised)
+
+
+@test("event loop and parser selection")
+async def _():
+    app = new_app()
+    app.config.app.uvloop = False
+    app.config.server.extra_args = {"http": "h11"}
+
+    assert app._select_stack() == ("asyncio", "h11")
+
+
+@test("error responses")
+async def _():
+    app = new_app()
+    calls = 0
+
+    @app.get("/")
+    @query("name", str)
+    async def index(name: str):
+        return name
+
+    @index.error(400)
+    async def bad_request():
+        nonlocal calls
+        calls += 1
+        return "custom bad request", 400, {"x-error": "1"}
+
+    async with app.test() as test:
+        for _ in range(2):
+            res = await test.get("/missing")
+            assert res.status == 404
+            assert res.message == "Not Found"
+
+            res = await test.get("/")
+            assert res.status == 400
+            assert res.message == "custom bad request"
+            assert res.headers["x-error"] == "1"
+
+    assert calls == 1
+
+
+@test("access log")
+async def _():
+    app = new_app()
+
+    @app.get("/")
+    async def index():
+        return "hello"
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield "a"
+            yield "bc"
+
+        return chunks()
+
+    app._enable_access_log(2)
+
+    async with app.test() as test:
+        await test.get("/")
+        await test.get("/stream")
+        entries, dropped = app._drain_access_log()
+        assert dropped == 0
+        assert [entry[:3] for entry in entries] == [
+            ("GET", "/", 200),
+            ("GET", "/stream", 200),
+        ]
+        assert entries[0][4] == 5
+        assert entries[1][4] == 3
+        assert entries[0][3] >= 0
+
+        for _ in range(3):
+            await test.get("/missing")
+
+        entries, dropped = app._drain_access_log()
+        assert dropped == 1
+        assert [entry[2] for entry in entries] == [404, 404]
+        assert app._drain_access_log() == ([], 0)
+
+
+@test("route metrics")
+async def _():
+    import os
+    import tempfile
+    from pathlib import Path
+
+    from view._metrics import SharedMetrics
+
+    app = new_app()
+    app.config.metrics.enabled = True
+    app._enable_metrics()
+
+    @app.get("/")
+    async def index():
+        return "hello"
+
+    @app.get("/fail")
+    async def fail():
+        return "nope", 503
+
+    async with app.test() as test:
+        await test.get("/")
+        await test.get("/")
+        await test.get("/fail")
+        res = await test.get("/metrics")
+        assert res.headers["content-type"].startswith("text/plain")
+
+    text = res.message
+    assert 'view_requests_total{method="GET",route="/",status="2xx"} 2' in text
+    assert 'view_requests_total{method="GET",route="/fail",status="5xx"} 1' in text
+    assert 'view_requests_in_flight{method="GET",route="/metrics"} 1' in text
+    assert (
+        'view_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"} 2'
+        in text
+    )
+    assert 'view_request_duration_seconds_count{method="GET",route="/"} 2' in text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VIEW_METRICS_DIR"] = tmp
+        try:
+            shared = SharedMetrics(app)
+            # pretend the shared table belongs to another worker, so it's
+            # counted on top of this process' own counters
+            shared.path = Path(tmp) / "1.metrics"
+            shared.start()
+            Path(tmp, "2.metrics").write_bytes(b"\0" * 4)
+
+            async with app.test() as test:
+                await test.get("/")
+
+            text = app.metrics()
+            shared.stop()
+
+            async with app.test() as test:
+                await test.get("/")
+
+            after = app.metrics()
+        finally:
+            del os.environ["VIEW_METRICS_DIR"]
+
+    assert 'view_requests_total{method="GET",route="/",status="2xx"} 6' in text
+    # the counters were recorded into the file, and were kept after it was
+    # unmapped
+    assert 'view_requests_total{method="GET",route="/",status="2xx"} 7' in after
+
+
+@test("dashboard sampler")
+async def _():
+    import os
+    import tempfile
+
+    from view._dashboard import Sampler, TopServer, attach
+
+    app = new_app()
+    app._enable_metrics()
+
+    @app.get("/")
+    async def index():
+        return "hello"
+
+    @app.get("/fail")
+    async def fail():
+        return "nope", 500
+
+    sampler = Sampler(app)
+
+    async with app.test() as test:
+        await test.get("/")
+        await test.get("/")
+        await test.get("/fail")
+
+        snapshot = sampler.sample()
+        routes = {i["path"]: i for i in snapshot["routes"]}
+        assert routes["/"]["total"] == 2
+        assert routes["/"]["rps"] > 0
+        assert routes["/"]["p99_ms"] > 0
+        assert routes["/fail"]["errors"] == 1
+
+        # only the requests since the last sample are counted
+        await test.get("/")
+        routes = {i["path"]: i for i in sampler.sample()["routes"]}
+        assert routes["/"]["total"] == 3
+        assert routes["/"]["mean_ms"] > 0
+        assert routes["/fail"]["errors"] == 0
+        assert routes["/fail"]["rps"] == 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "top.sock")
+        server = TopServer(path)
+        samples = attach(path)
+        # the client only connects once the generator is started
+        receiver = threading.Thread(target=lambda: result.append(next(samples)))
+        result = []
+        receiver.start()
+
+        while receiver.is_alive():
+            server.broadcast({"routes": [], "pid": 1})
+            await asyncio.sleep(0.01)
+
+        assert result == [{"routes": [], "pid": 1}]
+        samples.close()
+        server.close()
+        assert not os.path.exists(path)
+
+        # with multiple workers, each one has its own socket
+        route = {
+            "method": "GET",
+            "path": "/",
+            "in_flight": 1,
+            "rps": 10.0,
+            "mean_ms": 1.0,
+            "p99_ms": 2.0,
+            "errors": 1,
+            "total": 100,
+        }
+        servers = [TopServer(f"{path}.{pid}") for pid in (101, 102)]
+        samples = attach(path)
+        result = []
+        receiver = threading.Thread(target=lambda: result.append(next(samples)))
+        receiver.start()
+
+        while receiver.is_alive():
+            for pid, server in zip((101, 102), servers):
+                server.broadcast(
+                    {
+                        "pid": pid,
+                        "system": None,
+                        "network": None,
+                        "io": {"read": 1.0, "write": 2.0},
+                        "routes": [{**route, "mean_ms": pid - 100.0}],
+                    }
+                )
+            await asyncio.sleep(0.01)
+
+        # the first sample may only be from one of them
+        while result[-1]["workers"] < 2:
+            result.append(next(samples))
+
+        merged = result[-1]
+        assert merged["io"] == {"read": 2.0, "write": 4.0}
+        assert merged["routes"] == [
+            {
+                **route,
+                "in_flight": 2,
+                "rps": 20.0,
+                "mean_ms": 1.5,
+                "errors": 2,
+                "total": 200,
+            }
+        ]
+        samples.close()
+
+        for server in servers:
+            server.close()
+
+
+@test("middleware hooks")
+async def _():
+    app = new_app()
+    calls = []
+
+    @app.get("/")
+    async def index():
+        calls.append("route")
+        return "hello"
+
+    @app.get("/cached", cache_rate=5)
+    async def cached():
+        return "cached"
+
+    def log(scope):
+        calls.append(scope["path"])
+
+    async def auth(scope):
+        await asyncio.sleep(0)
+        if dict(scope["headers"]).get(b"authorization") != b"secret":
+            return "unauthorized", 401
+
+    def boom(scope):
+        if scope["path"] == "/boom":
+            raise RuntimeError("oops")
+
+    def header(scope, message):
+        message["headers"].append((b"x-middleware", b"1"))
+        if message["status"] == 401:
+            message["status"] = 403
+
+    app._enable_metrics()
+    app.middleware(before=log, after=header)
+    app.middleware(before=auth)
+    app.middleware(before=boom)
+
+    async with app.test() as test:
+        res = await test.get("/", headers={"authorization": "secret"})
+        assert res.message == "hello"
+        assert res.headers["x-middleware"] == "1"
+        assert calls == ["/", "route"]
+
+        res = await test.get("/")
+        assert res.message == "unauthorized"
+        assert res.status == 403
+        assert res.headers["x-middleware"] == "1"
+        assert calls == ["/", "route", "/"]
+
+        # 404s go through the hooks too
+        res = await test.get("/nope", headers={"authorization": "secret"})
+        assert res.status == 404
+        assert res.headers["x-middleware"] == "1"
+
+        res = await test.get("/boom", headers={"authorization": "secret"})
+        assert res.status == 500
+
+        # cached responses share their headers, which shouldn't grow
+        for _ in range(3):
+            res = await test.get("/cached", headers={"authorization": "secret"})
+            assert res.message == "cached"
+            assert res.headers["x-middleware"] == "1"
+
+    # requests continue to be measured after an async hook
+    counts = {path: count for _, path, _, count, *_ in app._metrics()}
+    assert counts["/"] == 1
+    assert counts["/cached"] == 3
+
+    try:
+        app.middleware(after=auth)  # type: ignore
+    except TypeError:
+        ...
+    else:
+        raise AssertionError("async after hook was accepted")
+
+
+@test("cached responses are copied for outer middleware")
+async def _():
+    from view.app import TestingContext
+
+    app = new_app()
+
+    @app.get("/")
+    @query("name", str)
+    async def index(name: str):
+        return name
+
+    @index.error(400)
+    async def bad_request():
+        return "custom bad request", 400, {"x-error": "1"}
+
+    @app.get("/cached", cache_rate=5)
+    async def cached():
+        return "cached", {"x-cached": "1"}
+
+    app.load()
+
+    # an ASGI middleware is allowed to change the messages it's sent
+    async def middleware(scope, receive, send):
+        async def mutate(message):
+            if message["type"] == "http.response.start":
+                message["status"] = 418
+                message["headers"].append((b"x-outer", b"1"))
+                message["headers"][0] = (b"x-replaced", b"1")
+            elif message["type"] == "http.response.body":
+                message["body"] = b"changed"
+
+            await send(message)
+
+        await app.asgi_app_entry(scope, receive, mutate)
+
+    ctx = TestingContext(middleware)
+    await ctx.start()
+    try:
+        for _ in range(3):
+            for path in ("/nope", "/", "/cached"):
+                res = await ctx.get(path)
+                assert res.status == 418
+                assert res.message == "changed"
+    finally:
+        await ctx.stop()
+
+    async with app.test() as test:
+        res = await test.get("/nope")
+        assert (res.status, res.message) == (404, "Not Found")
+        assert "x-outer" not in res.headers
+
+        res = await test.get("/")
+        assert (res.status, res.message) == (400, "custom bad request")
+        assert res.headers["x-error"] == "1"
+
+        res = await test.get("/cached")
+        assert res.message == "cached"
+        assert res.headers["x-cached"] == "1"
+        assert "x-outer" not in res.headers
+        assert "x-replaced" not in res.headers
+
+
+@test("cors")
+async def _():
+    from ward import raises
+
+    from view._cors import build_cors
+    from view.config import CorsConfig
+    from view.exceptions import ConfigurationError
+
+    app = new_app()
+    calls = []
+
+    @app.get("/")
+    async def index():
+        calls.append("route")
+        return "hello"
+
+    @app.post("/")
+    async def create():
+        return "created", 201
+
+    @app.get("/cached", cache_rate=5)
+    async def cached():
+        return "cached"
+
+    app.middleware(before=lambda scope: calls.append("hook"))
+    app.cors(expose_headers=["x-total"])
+
+    preflight = {
+        "origin": "https://example.com",
+        "access-control-request-method": "POST",
+    }
+
+    origin = preflight["origin"]
+
+    async with app.test() as test:
+        res = await test.options("/", headers=preflight)
+        assert res.status == 204
+        assert res.headers["access-control-allow-origin"] == "*"
+        assert res.headers["access-control-allow-methods"] == "GET, POST"
+        assert res.headers["access-control-allow-headers"] == "*"
+        assert res.headers["access-control-max-age"] == "600"
+        # preflights never reach the routes or middleware
+        assert calls == []
+
+        for _ in range(2):
+            res = await test.get("/cached", headers={"origin": "https://a.b"})
+            assert res.message == "cached"
+            assert res.headers["access-control-allow-origin"] == "*"
+            assert res.headers["access-control-expose-headers"] == "x-total"
+
+        # requests without an origin aren't cross-origin
+        res = await test.get("/")
+        assert "access-control-allow-origin" not in res.headers
+
+        app.cors(["https://example.com"], credentials=True, max_age=60)
+
+        res = await test.options(
+            "/",
+            headers={
+                **preflight,
+                "access-control-request-headers": "x-token",
+            },
+        )
+        assert res.status == 204
+        assert res.headers["access-control-allow-origin"] == origin
+        assert res.headers["access-control-allow-credentials"] == "true"
+        assert res.headers["access-control-allow-headers"] == "x-token"
+        assert res.headers["access-control-max-age"] == "60"
+        assert res.headers["vary"] == "Origin"
+
+        res = await test.options(
+            "/",
+            headers={**preflight, "origin": "https://evil.com"},
+        )
+        assert res.status == 400
+        assert res.headers["vary"] == "Origin"
+
+        res = await test.get("/", headers={"origin": "https://evil.com"})
+        assert res.message == "hello"
+        assert "access-control-allow-origin" not in res.headers
+        # the response still depends on the origin
+        assert res.headers["vary"] == "Origin"
+
+        res = await test.get("/")
+        assert "access-control-allow-origin" not in res.headers
+        assert res.headers["vary"] == "Origin"
+
+        res = await test.get("/nope", headers={"origin": origin})
+        assert res.status == 404
+        assert res.headers["access-control-allow-origin"] == origin
+
+    with raises(ConfigurationError):
+        app.cors(["*"])
+
+    # the settings are left alone
+    assert app.config.cors.origins == ["https://example.com"]
+
+    with raises(ConfigurationError):
+        build_cors(CorsConfig(origins=["*"], credentials=True), [])
+
+
+@test("rate and in-flight limits")
+async def _():
+    from view import InvalidRouteError, RateLimit
+    from view.exceptions import ConfigurationError
+
+    app = new_app()
+    calls = []
+    release = asyncio.Event()
+
+    @app.get("/limited", rate_limit=RateLimit(1, burst=2))
+    @app.query("name", str)
+    async def limited(name: str):
+        calls.append(name)
+        return name
+
+    @app.get("/slow", max_in_flight=1)
+    async def slow():
+        await release.wait()
+        return "done"
+
+    app.config.limits.max_in_flight = 10
+
+    async with app.test() as test:
+        for _ in range(2):
+            res = await test.get("/limited", query={"name": "a"})
+            assert res.message == "a"
+
+        # rejected before the query is parsed
+        res = await test.get("/limited")
+        assert res.status == 429
+        assert res.headers["retry-after"] == "1"
+        assert calls == ["a", "a"]
+
+        first = asyncio.create_task(test.get("/slow"))
+        await asyncio.sleep(0.01)
+
+        res = await test.get("/slow")
+        assert res.status == 503
+
+        release.set()
+        assert (await first).message == "done"
+        assert (await test.get("/slow")).message == "done"
+
+    try:
+        app.get("/bad", max_in_flight=0)(lambda: "")
+    except InvalidRouteError:
+        ...
+    else:
+        raise AssertionError("max_in_flight of 0 was accepted")
+
+    try:
+        app.get("/bad", rate_limit=0)(lambda: "")
+    except InvalidRouteError:
+        ...
+    else:
+        raise AssertionError("rate_limit of 0 was accepted")
+
+    # the global limits apply to every route, before they're matched
+    app = new_app()
+    app.config.limits.rate = 1
+    app.config.limits.burst = 2
+    app.config.limits.max_in_flight = 1
+    release = asyncio.Event()
+
+    @app.get("/")
+    async def index():
+        await release.wait()
+        return "hello"
+
+    async with app.test() as test:
+        first = asyncio.create_task(test.get("/"))
+        await asyncio.sleep(0.01)
+
+        assert (await test.get("/")).status == 503
+        assert (await test.get("/nope")).status == 503
+
+        release.set()
+        assert (await first).message == "hello"
+
+        # requests over max_in_flight didn't take a token, so there's one
+        # left of the burst
+        assert (await test.get("/")).message == "hello"
+        res = await test.get("/")
+        assert res.status == 429
+        assert res.headers["retry-after"] == "1"
+
+    app = new_app()
+    app.config.limits.rate = 0
+
+    try:
+        app.load()
+    except ConfigurationError:
+        ...
+    else:
+        raise AssertionError("a global rate of 0 was accepted")
+
+    # the 429 and 503 messages are shared, so outer middleware gets copies
+    from view.app import TestingContext
+
+    app = new_app()
+    app.config.limits.rate = 1
+    app.config.limits.burst = 1
+
+    @app.get("/", rate_limit=RateLimit(1, burst=2))
+    async def limited_index():
+        return "hello"
+
+    app.load()
+    seen = []
+
+    async def middleware(scope, receive, send):
+        async def mutate(message):
+            if message["type"] == "http.response.start":
+                seen.append((message["status"], list(message["headers"])))
+                message["status"] = 418
+                message["headers"].append((b"x-outer", b"1"))
+                message["headers"][0] = (b"x-replaced", b"1")
+            else:
+                message["body"] = b"changed"
+
+            await send(message)
+
+        await app.asgi_app_entry(scope, receive, mutate)
+
+    ctx = TestingContext(middleware)
+    await ctx.start()
+    try:
+        for _ in range(3):
+            assert (await ctx.get("/")).message == "changed"
+    finally:
+        await ctx.stop()
+
+    assert [status for status, _ in seen] == [200, 429, 429]
+    assert seen[1][1] == seen[2][1]
+    assert (b"retry-after", b"1") in seen[2][1]
+    assert (b"x-outer", b"1") not in seen[2][1]
+
+
+@test("tracing spans")
+async def _():
+    import io
+    import json
+
+    from view.tracing import (
+        OTLPJSONExporter,
+        SpanExporter,
+        Tracer,
+        current_span,
+        inject,
+        parse_traceparent,
+        start_span,
+    )
+
+    class Collect(SpanExporter):
+        def __init__(self):
+            self.spans = []
+
+        def export(self, spans):
+            self.spans.extend(spans)
+
+    exporter = Collect()
+    app = new_app()
+    app.set_tracer(Tracer(exporter))
+    outgoing = {}
+
+    @app.get("/")
+    async def index():
+        with start_span("work", items=3):
+            outgoing.update(inject())
+
+        return "hello"
+
+    @app.get("/fail")
+    async def fail():
+        assert current_span()
+        return "nope", 503
+
+    parent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    async with app.test() as test:
+        await test.get("/", headers={"traceparent": parent, "tracestate": "a=b"})
+        await test.get("/fail")
+
+    work, root, failed = exporter.spans
+    assert root.name == "GET /"
+    assert root.parent_id == "b7ad6b7169203331"
+    assert root.context.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.context.state == "a=b"
+    assert root.attributes["http.response.status_code"] == 200
+    assert root.start_time <= work.start_time <= work.end_time <= root.end_time
+    assert work.parent_id == root.context.span_id
+    assert work.attributes["items"] == 3
+
+    # outgoing requests continue the trace from the inner span
+    context = parse_traceparent(outgoing["traceparent"])
+    assert context
+    assert context.trace_id == root.context.trace_id
+    assert context.span_id == work.context.span_id
+    assert outgoing["tracestate"] == "a=b"
+
+    assert failed.name == "GET /fail"
+    assert failed.parent_id is None
+    assert failed.status == 2
+
+    # the span stops being current once it ends, even in the same task
+    scope = {"headers": [], "path": "/"}
+    span = Tracer(exporter)("GET", "/", scope, 0)
+    assert current_span() is span
+    span.end(200)
+    assert current_span() is None
+
+    assert not parse_traceparent("00-" + "0" * 32 + "-b7ad6b7169203331-01")
+    assert not parse_traceparent("zz-nope")
+
+    stream = io.StringIO()
+    OTLPJSONExporter(stream, service_name="test").export([root])
+    data = json.loads(stream.getvalue())
+    resource = data["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0] == {
+        "key": "service.name",
+        "value": {"stringValue": "test"},
+    }
+    span = resource["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "GET /"
+    assert span["kind"] == 2
+    assert span["parentSpanId"] == "b7ad6b7169203331"
+    assert {
+        "key": "http.response.status_code",
+        "value": {"intValue": "200"},
+    } in span["attributes"]
+
+
+@test("profiling hooks")
+async def _():
+    from view._profiling import PHASES, Profiler, phase_durations
+
+    app = new_app()
+
+    @app.get("/")
+    async def index():
+        return "hello"
+
+    @app.post("/body")
+    @app.body("name", str)
+    async def with_body(name: str):
+        return name
+
+    calls = []
+    app.set_profiler(lambda *args: calls.append(args))
+
+    async with app.test() as test:
+        await test.get("/")
+        await test.post("/body", body={"name": "a"})
+
+        method, path, status, timestamps = calls[0]
+        assert (method, path, status) == ("GET", "/", 200)
+        assert len(timestamps) == len(PHASES) + 1
+        # GET routes don't receive a body
+        assert timestamps[2] == 0
+        assert all(i >= 0 for i in phase_durations(timestamps))
+
+        timestamps = calls[1][3]
+        assert all(timestamps)
+        assert list(timestamps) == sorted(timestamps)
+
+        profiler = Profiler()
+        app.set_profiler(profiler, every=2)
+        for _ in range(4):
+            await test.get("/")
+
+        assert len(profiler.samples[("GET", "/")]) == 2
+        assert profiler.report().row_count == 1
+
+        app.set_profiler(None)
+        await test.get("/")
+        assert len(profiler.samples[("GET", "/")]) == 2
+
+        # profiles are grouped by route, not by the requested path
+        profiler = Profiler()
+        app.set_profiler(profiler)
+        await test.post("/body/", body={"name": "a"})
+        await test.get("/nope")
+        await test.get("/other")
+        app.set_profiler(None)
+
+        assert set(profiler.samples) == {
+            ("POST", "/body"),
+            ("GET", "<no route>"),
+        }
+        assert profiler.seen[("GET", "<no route>")] == 2
+
+
+@test("view profile command")
+def _():
+    import os
+    import socket
+    import subprocess
+    import sys
+    import tempfile
+    import time
+    import urllib.request
+    from pathlib import Path
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "app.py").write_text(
+            "import view\n"
+            "app = view.new_app()\n"
+            "@app.get('/hello')\n"
+            "async def hello():\n"
+            "    return 'hello'\n"
+            "app.run()\n"
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-m", "view", "profile", "--duration", "4"],
+            cwd=tmp,
+            env={**os.environ, "view_server_port": str(port)},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+
+        try:
+            deadline = time.monotonic() + 15
+            while True:
+                try:
+                    with urllib.request.urlopen(
+                        f"http://127.0.0.1:{port}/hello"
+                    ) as res:
+                        assert res.read() == b"hello"
+                    break
+                except OSError:
+                    assert time.monotonic() < deadline, "server didn't start"
+                    time.sleep(0.1)
+
+            output, _ = process.communicate(timeout=30)
+        finally:
+            process.kill()
+
+    assert "Time per phase" in output
+    assert "/hello" in output
+    assert "rich.table.Table object" not in output
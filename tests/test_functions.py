@@ -80,3 +80,324 @@ def _():
 | - | - | - | - |
 | friend | Your friend's info. | `Person` | **Required** |"""
     )
+
+
+@test("components")
+def _():
+    from view.components import DOMNode, div, p, script, span
+
+    node = div(
+        p("a < b", cls="text"),
+        span("hi", data={"id": 1}),
+        DOMNode("<hr>"),
+        script("if (a < b) {}"),
+        draggable=True,
+        title='"quoted"',
+    )
+    assert str(node) == "\n".join(
+        (
+            '<div draggable="true" title="&quot;quoted&quot;"><p class="text">a &lt; b</p>',
+            '<span data-id="1">hi</span>',
+            "<hr>",
+            "<script>if (a < b) {}</script></div>",
+        )
+    )
+
+    deep = div()
+    for _ in range(5000):
+        deep = div(deep)
+
+    assert str(deep) == ("<div>" * 5001) + ("</div>" * 5001)
+
+
+@test("static components")
+def _():
+    from view.components import a, div, nav, static_component
+
+    calls = []
+
+    @static_component
+    def navbar(active: str):
+        calls.append(active)
+        return nav(a("Home", href="/", cls="active" if active == "home" else None))
+
+    page = div(navbar("home"), "<body>")
+    assert str(page) == '<div><nav><a href="/" class="active">Home</a></nav>\n&lt;body&gt;</div>'
+    assert str(div(navbar("home"))) == '<div><nav><a href="/" class="active">Home</a></nav></div>'
+    assert calls == ["home"]
+
+    navbar("about")
+    assert calls == ["home", "about"]
+
+    @static_component(maxsize=1)
+    def listing(items):
+        calls.append(items)
+        return div(*items)
+
+    listing(["a"])
+    listing(["a"])
+    assert calls[2:] == [["a"], ["a"]]  # lists can't be cached
+
+    navbar.cache_clear()
+    navbar("home")
+    assert calls[-1] == "home"
+
+
+@test("view codec cache")
+def _():
+    import os
+    import tempfile
+
+    from view import _codec
+
+    assert _codec.is_view_source(b"# coding: view\nx = 1")
+    assert _codec.is_view_source(b"#!/usr/bin/env python\n# -*- coding: view -*-\n")
+    assert not _codec.is_view_source(b"# coding: utf-8\n")
+    assert not _codec.is_view_source(b"\n\n# coding: view\n")
+
+    source = "x = <p>a</p>\n"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["view_codec_cache"] = tmp
+        try:
+            result = _codec.transform(source)
+            assert "_vpy_newnode('p', a)" in result
+            assert len(os.listdir(tmp)) == 1
+
+            original = _codec._transform
+            _codec._transform = lambda code: "not cached"
+            try:
+                assert _codec.transform(source) == result
+                assert _codec.transform("y = 1\n") == "not cached"
+            finally:
+                _codec._transform = original
+
+            os.environ["view_codec_cache"] = ""
+            assert _codec.cache_directory() is None
+        finally:
+            del os.environ["view_codec_cache"]
+
+
+@test("view nodes")
+def _():
+    from view.components import b
+    from view.nodes import new_node
+
+    node = new_node("p", "a < b", b("bold"), 1, title='"hi"', hidden=True, x=None)
+    assert str(node) == '<p title="&quot;hi&quot;" hidden>a &lt; b<b>bold</b>1</p>'
+    assert bytes(node) == str(node).encode()
+
+    deep = new_node("div")
+    for _ in range(5000):
+        deep = new_node("div", deep)
+
+    assert str(deep) == ("<div>" * 5001) + ("</div>" * 5001)
+
+
+@test("compiler caching")
+async def _():
+    import tempfile
+    from pathlib import Path
+
+    from view import compiler
+
+    source = "x = 1\nprint(x)"
+    js = compiler.compile(source)
+    assert "__view_py_name_x = 1" in js
+
+    original = compiler._Compiler.compile_mod
+    compiler._Compiler.compile_mod = None  # type: ignore
+    try:
+        assert compiler.compile(source) == js
+    finally:
+        compiler._Compiler.compile_mod = original
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compiler.compile("y = 2", cache=tmp)
+        assert len(list(Path(tmp).glob("*.js"))) == 1
+
+    app = new_app()
+    app.get("/helpers.js")(compiler.script(source))
+
+    async with app.test() as test:
+        res = await test.get("/helpers.js")
+        assert res.message.startswith("(() => {")
+        assert res.headers["content-type"] == "text/javascript"
+        assert res.headers["etag"].startswith('"')
+        assert "immutable" in res.headers["cache-control"]
+
+
+@test("user log sink")
+def _():
+    import tempfile
+    from pathlib import Path
+
+    from view.logging import _LogSink, _Record
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "app.log"
+        sink = _LogSink(queue_size=100, max_bytes=50, backup_count=2)
+
+        for i in range(20):
+            sink.put(_Record(f"message {i}", None, path, False))
+
+        sink.flush()
+        assert len(sink._files) <= 1
+        assert (Path(tmp) / "app.log.1").exists()
+        assert (Path(tmp) / "app.log.2").exists()
+        assert not (Path(tmp) / "app.log.3").exists()
+        sink.close()
+
+        newest = path if path.exists() else Path(tmp) / "app.log.1"
+        assert newest.read_text().splitlines()[-1] == "message 19"
+        assert not sink._files
+
+        sink = _LogSink(queue_size=1)
+        sink.queue.put(None)  # the writer stops after the first item
+        for i in range(5):
+            sink.put(_Record("x", None, path, False))
+
+        assert sink.dropped >= 4
+
+
+@test("app owned log sink")
+def _():
+    import tempfile
+    from pathlib import Path
+
+    from view import logging
+    from view.config import Config
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "app.log"
+        options = {"log_file": path, "file_write": "only", "show_time": False}
+        logging.log("before", show_caller=False, **options)
+
+        config = Config()
+        config.log.user.queue_size = 8
+        app = App(config)
+        assert logging._sink is app._log_sink
+        assert app._log_sink.queue.maxsize == 8
+
+        logging.log("after", show_caller=False, **options)
+        logging.flush()
+
+        assert path.read_text().split() == [
+            "info:",
+            "before",
+            "info:",
+            "after",
+        ]
+
+
+@test("json service logs")
+def _():
+    import io
+    import json
+
+    from view._logging import Service, route, set_format
+
+    buf = io.StringIO()
+    set_format("json", stream=buf)
+
+    try:
+        Service.warning("[bold red]careful[/] \\[literal]")
+        route("/hello", 404, "GET", 0.0025)
+        Service.log.handlers[0].flush()
+    finally:
+        set_format("rich")
+
+    first, second = [json.loads(i) for i in buf.getvalue().splitlines()]
+    assert first["message"] == "careful [literal]"
+    assert first["level"] == "warning"
+    assert "pid" in first
+    assert second["method"] == "GET"
+    assert second["status"] == 404
+    assert second["latency_ms"] == 2.5
+
+
+@test("json logs after fork")
+def _():
+    import json
+    import logging
+    import os
+    import tempfile
+
+    from view._logging import JSONHandler
+
+    if not hasattr(os, "fork"):
+        return
+
+    with tempfile.TemporaryFile("w+") as stream:
+        handler = JSONHandler(stream, interval=60)
+        record = logging.makeLogRecord(
+            {"msg": "parent", "levelno": logging.INFO, "levelname": "INFO"}
+        )
+        handler.emit(record)
+        assert handler._thread
+
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                assert handler._thread is None
+                handler.emit(logging.makeLogRecord({**record.__dict__, "msg": "child"}))
+                assert handler._thread and handler._thread.is_alive()
+                handler.flush()
+                code = 0
+            finally:
+                os._exit(code)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        handler.close()
+
+        stream.seek(0)
+        lines = [json.loads(i) for i in stream.read().splitlines()]
+
+    assert [(i["message"], i["pid"]) for i in lines] == [
+        ("child", pid),
+        ("parent", os.getpid()),
+    ]
+
+
+@test("user logs after fork")
+def _():
+    import os
+    import signal
+    import tempfile
+    from pathlib import Path
+
+    from view import logging
+
+    if not hasattr(os, "fork"):
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "app.log"
+        options = {"log_file": path, "file_write": "only", "show_time": False}
+        # starts the writer thread in the parent
+        logging.log("parent", show_caller=False, **options)
+
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                # a hung flush() gets the child killed instead
+                signal.alarm(5)
+                logging.log("child", show_caller=False, **options)
+                logging.flush()
+                code = 0
+            finally:
+                os._exit(code)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and (os.WEXITSTATUS(status) == 0)
+        logging.flush()
+
+        assert sorted(path.read_text().split()) == [
+            "child",
+            "info:",
+            "info:",
+            "parent",
+        ]
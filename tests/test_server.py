@@ -0,0 +1,239 @@
+import asyncio
+
+from ward import raises, test
+
+from _view import parse_http
+from view import new_app
+from view._server import _HTTPProtocol, _Server
+
+
+@test("http request parsing")
+async def _():
+    raw = (
+        b"POST /a%20b?x=1 HTTP/1.1\r\nHost: test\r\n"
+        b"Content-Length: 3\r\n\r\nabc"
+    )
+    head, method, path, query, headers, length, keep_alive = parse_http(raw)
+    assert raw[head:] == b"abc"
+    assert method == "POST"
+    assert path == "/a b"
+    assert query == b"x=1"
+    assert headers == [(b"host", b"test"), (b"content-length", b"3")]
+    assert length == 3
+    assert keep_alive is True
+
+    assert parse_http(b"GET / HTTP/1.1\r\nHost: te") is None
+    assert parse_http(b"GET / HTTP/1.0\r\n\r\n")[-1] is False
+    assert (
+        parse_http(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")[-1]
+        is False
+    )
+
+    with raises(ValueError):
+        parse_http(b"GARBAGE\r\n\r\n")
+
+    with raises(ValueError):
+        parse_http(b"GET / HTTP/1.1\r\nContent-Length: nope\r\n\r\n")
+
+    for lengths in (b"3", b"4"), (b"3", b"3"):
+        with raises(ValueError):
+            parse_http(
+                b"POST / HTTP/1.1\r\n"
+                + b"".join(b"Content-Length: " + i + b"\r\n" for i in lengths)
+                + b"\r\nabcd"
+            )
+
+    for header in (
+        b"Transfer-Encoding : chunked",
+        b"X Test: 1",
+        b"X\x00Test: 1",
+        b"X-Test: a\rb",
+    ):
+        with raises(ValueError):
+            parse_http(b"GET / HTTP/1.1\r\n" + header + b"\r\n\r\n")
+
+
+@test("native server pipelining")
+async def _():
+    app = new_app()
+
+    @app.get("/")
+    async def index():
+        return "hello", {"x-test": "1"}
+
+    @app.get("/sync")
+    def sync():
+        return "world", 201
+
+    app.load()
+    server = _Server(app)
+    srv = await asyncio.get_running_loop().create_server(
+        lambda: _HTTPProtocol(server),
+        host="127.0.0.1",
+        port=0,
+    )
+    port = srv.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"GET / HTTP/1.1\r\nHost: test\r\n\r\n"
+        b"GET /sync HTTP/1.1\r\nHost: test\r\n\r\n"
+        b"GET /missing HTTP/1.1\r\nConnection: close\r\n\r\n"
+    )
+    data = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+
+    responses = data.split(b"HTTP/1.1 ")[1:]
+    assert len(responses) == 3
+    assert responses[0].startswith(b"200 OK")
+    assert b"x-test: 1\r\n" in responses[0]
+    assert responses[0].endswith(b"\r\n\r\nhello")
+    assert responses[1].startswith(b"201 Created")
+    assert responses[1].endswith(b"world")
+    assert responses[2].startswith(b"404 Not Found")
+    assert b"connection: close\r\n" in responses[2]
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"POST / HTTP/1.1\r\nContent-Length: 1\r\n"
+        b"content-length: 5\r\n\r\nhello"
+    )
+    data = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    assert data.startswith(b"HTTP/1.1 400 Bad Request")
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"POST / HTTP/1.1\r\nTransfer-Encoding : chunked\r\n\r\n"
+        b"5\r\nhello\r\n0\r\n\r\n"
+    )
+    data = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    srv.close()
+    assert data.startswith(b"HTTP/1.1 400 Bad Request")
+
+
+@test("native server response headers")
+async def _():
+    app = new_app()
+
+    @app.get("/length")
+    async def length():
+        return "hello", {"content-length": "5"}
+
+    @app.get("/split")
+    async def split():
+        return "hello", {"x-test": "1\r\nset-cookie: a=b"}
+
+    @app.get("/name")
+    async def name():
+        return "hello", {"x test": "1"}
+
+    app.load()
+    server = _Server(app)
+    srv = await asyncio.get_running_loop().create_server(
+        lambda: _HTTPProtocol(server),
+        host="127.0.0.1",
+        port=0,
+    )
+    port = srv.sockets[0].getsockname()[1]
+
+    async def request(path: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            b"GET %s HTTP/1.1\r\nConnection: close\r\n\r\n" % path.encode()
+        )
+        data = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return data
+
+    data = await request("/length")
+    assert data.startswith(b"HTTP/1.1 200 OK")
+    assert data.lower().count(b"content-length:") == 1
+    assert data.endswith(b"\r\n\r\nhello")
+
+    for path in "/split", "/name":
+        data = await request(path)
+        assert data.startswith(b"HTTP/1.1 500 Internal Server Error")
+        assert b"set-cookie" not in data
+
+    srv.close()
+
+
+def _supervisor(serve):
+    import os
+
+    from view._workers import Supervisor
+
+    app = new_app()
+    app.config.server.workers = 2
+    supervisor = Supervisor(app)
+    # the workers run this instead of a server
+    supervisor._serve = lambda: (serve(), os._exit(0))
+    return supervisor
+
+
+@test("crashing workers are restarted with a backoff")
+def _():
+    import os
+    import signal
+    import time
+
+    from view import _workers
+    from view.exceptions import ViewError
+
+    handlers = [signal.getsignal(i) for i in (signal.SIGTERM, signal.SIGINT)]
+    defaults = (_workers._RESTART_DELAY, _workers._MAX_FAILURES)
+    _workers._RESTART_DELAY = 0.05
+    _workers._MAX_FAILURES = 4
+
+    try:
+        supervisor = _supervisor(lambda: os._exit(3))
+        start = time.monotonic()
+
+        with raises(ViewError):
+            supervisor.run()
+
+        # the delay doubles for each failure, up to 0.2 seconds here
+        assert time.monotonic() - start >= 0.2
+        assert supervisor.failures == 4
+        assert not supervisor.children
+        assert not supervisor.restarts
+    finally:
+        _workers._RESTART_DELAY, _workers._MAX_FAILURES = defaults
+        signal.signal(signal.SIGTERM, handlers[0])
+        signal.signal(signal.SIGINT, handlers[1])
+
+
+@test("hung workers are killed after the drain timeout")
+def _():
+    import signal
+    import threading
+    import time
+
+    from view import _workers
+
+    handlers = [signal.getsignal(i) for i in (signal.SIGTERM, signal.SIGINT)]
+    _workers._DRAIN_TIMEOUT = 0.5
+
+    def hang():
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        time.sleep(60)
+
+    try:
+        supervisor = _supervisor(hang)
+        timer = threading.Timer(
+            0.5,
+            supervisor._shutdown,
+            (signal.SIGTERM, None),
+        )
+        timer.start()
+        start = time.monotonic()
+        supervisor.run()
+
+        assert time.monotonic() - start < 10
+        assert not supervisor.children
+    finally:
+        _workers._DRAIN_TIMEOUT = 30
+        signal.signal(signal.SIGTERM, handlers[0])
+        signal.signal(signal.SIGINT, handlers[1])
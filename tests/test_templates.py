@@ -69,3 +69,208 @@ async def _():
     
     async with app.test() as test:
         assert (await test.get("/")).message.replace("\n", "") == "1"
+
+
+@test("compiled view templates")
+async def _():
+    import os
+    import tempfile
+
+    from ward import raises
+
+    from view.exceptions import InvalidTemplateError
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "page.html"
+        path.write_text('<p><view ref="x" /></p>')
+
+        x = 1
+        assert (await template("page", directory=directory, engine="view")).body == "<p>1</p>"
+        x = 2
+        assert (await template("page", directory=directory, engine="view")).body == f"<p>{x}</p>"
+
+        path.write_text('<b><view ref="x * 2" /></b>')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert (await template("page", directory=directory, engine="view")).body == f"<b>{x * 2}</b>"
+
+    parameters = {"x": "<script>alert(1)</script>&"}
+    assert (
+        await render('<p><view ref="x" /></p>', parameters=parameters)
+    ) == "<p>&lt;script&gt;alert(1)&lt;/script&gt;&amp;</p>"
+    # the caller's parameters are left alone
+    assert parameters == {"x": "<script>alert(1)</script>&"}
+
+    with raises(InvalidTemplateError):
+        await render('<view ref="1 +" />')
+
+    with raises(InvalidTemplateError):
+        await render('<view else>hi</view>')
+
+
+@test("template preloading")
+async def _():
+    app = new_app()
+    app.config.templates.preload = True
+    app.config.templates.directory = Path.cwd() / "tests" / "templates"
+
+    @app.get("/")
+    async def index():
+        return await template("index", context={"hi": "hello"})
+
+    async with app.test() as test:
+        assert app._templates
+        path = (Path.cwd() / "tests" / "templates" / "index.html").resolve()
+        assert ("view", path) in app._templates._files
+        assert (await test.get("/")).message.replace("\n", "") == "hello"
+
+
+@test("django engine")
+async def _():
+    app = new_app()
+    app.config.templates.directory = Path.cwd() / "tests" / "django_templates"
+    app.config.templates.engine = "django"
+
+    @app.get("/")
+    async def index():
+        name = "world"
+        res = await template("page")
+        assert name in res.body
+        return res
+
+    async with app.test() as test:
+        for _ in range(2):
+            assert (await test.get("/")).message == "Hello world!"
+
+    assert (
+        await render(
+            "{{ name }}",
+            engine="django",
+            app=app,
+            parameters={"name": "<b>"},
+        )
+    ) == "&lt;b&gt;"
+
+
+@test("streaming templates")
+async def _():
+    app = new_app()
+    app.config.templates.directory = Path.cwd() / "tests" / "templates"
+
+    @app.get("/")
+    async def index():
+        return await template(
+            "rows",
+            stream=True,
+            context={"rows": ["a", "b", "c"]},
+        )
+
+    async with app.test() as test:
+        res = await test.get("/")
+        assert res.message.replace("\n", "") == "<ul><li>a</li><li>b</li><li>c</li></ul>"
+        assert res.headers["content-type"] == "text/html"
+
+    from view.templates import _registry
+
+    compiled = _registry(app).from_source(
+        '<p><view iter="rows" item="row"><view ref="row" /></view></p>',
+        "view",
+    )
+    chunks = [chunk async for chunk in compiled.stream({"rows": [1, 2, 3]})]
+    assert chunks == ["<p>1", "2", "3", "</p>"]
+
+    jinja = _registry(app).from_source("{% for i in l %}{{ i }}{% endfor %}", "jinja")
+    assert "".join([chunk async for chunk in jinja.stream({"l": [1, 2]})]) == "12"
+
+
+@test("template parameter capture")
+async def _():
+    from view.templates import _registry
+
+    app = new_app()
+    registry = _registry(app)
+    compiled = registry.from_source('<view ref="a + len(b)" />', "view")
+    assert compiled.names == {"a", "len", "b"}
+    assert registry.from_source('<view template="index" />', "view").names is None
+    assert registry.from_source("{{ x }}{% set y = 1 %}", "jinja").names == {"x"}
+
+    a = 1
+    b = [1, 2]
+    assert (await render('<view ref="a + len(b)" />', app=app)) == str(a + len(b))
+
+    app.config.templates.directory = Path.cwd() / "tests" / "templates"
+
+    @app.get("/")
+    async def index():
+        hi = "local"
+        res = await template("index", context={"hi": "explicit"})
+        assert hi not in res.body
+        return res
+
+    async with app.test() as test:
+        assert (await test.get("/")).message.replace("\n", "") == "explicit"
+
+
+@test("errors while streaming")
+async def _():
+    from view.app import TestingContext
+
+    app = new_app()
+    closed = []
+
+    async def broken(fail):
+        try:
+            yield "a"
+            await fail()
+            yield "b"
+        finally:
+            closed.append(True)
+
+    async def boom():
+        raise RuntimeError("oops")
+
+    @app.get("/")
+    async def index():
+        return broken(boom)
+
+    @app.get("/chunk")
+    async def chunk():
+        async def chunks():
+            try:
+                yield "a"
+                yield 1
+            finally:
+                closed.append(True)
+
+        return chunks()
+
+    app.load()
+    messages = []
+
+    async def record(scope, receive, send):
+        async def inner(message):
+            messages.append(message)
+            await send(message)
+
+        await app.asgi_app_entry(scope, receive, inner)
+
+    ctx = TestingContext(record)
+    await ctx.start()
+    try:
+        for path in ("/", "/chunk"):
+            messages.clear()
+            res = await ctx.get(path)
+            # the response was already started, so it's cut short instead of
+            # being replaced with an error
+            assert res.status == 200
+            assert res.message == "a"
+            assert [i["type"] for i in messages] == [
+                "http.response.start",
+                "http.response.body",
+                "http.response.body",
+            ]
+            assert messages[-1]["more_body"] is False
+    finally:
+        await ctx.stop()
+
+    assert closed == [True, True]